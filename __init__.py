@@ -1,4 +1,5 @@
 import os
+import json
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager
@@ -19,6 +20,55 @@ def create_app():
     app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', 'sqlite:///content_platform.db')
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
     app.config['UPLOAD_FOLDER'] = os.path.join(app.root_path, 'static', 'uploads')
+    app.config['THUMBNAILS_DIR'] = os.path.join(app.root_path, 'static', 'thumbnails')
+    app.config['DASHBOARD_PAGE_SIZE'] = int(os.environ.get('DASHBOARD_PAGE_SIZE', 24))  # content cards per dashboard page
+    app.config['MEDIA_SENDFILE'] = os.environ.get('MEDIA_SENDFILE', '')  # '', 'x-accel' (nginx) or 'x-sendfile' (Apache/lighttpd)
+    app.config['MEDIA_ACCEL_PREFIX'] = os.environ.get('MEDIA_ACCEL_PREFIX', '/protected-media/')
+    app.config['MEDIA_ACCEL_ROOT'] = os.environ.get('MEDIA_ACCEL_ROOT')  # defaults to the static folder
+    app.config['THUMBNAIL_PREVIEWS'] = os.environ.get('THUMBNAIL_PREVIEWS', '1') == '1'  # animated WebP previews for videos
+    app.config['MODEL_MEMORY_BUDGET_MB'] = int(os.environ.get('MODEL_MEMORY_BUDGET_MB', 0))  # 0 = unlimited
+    app.config['PRELOAD_MODELS'] = [name for name in os.environ.get('PRELOAD_MODELS', '').split(',') if name]
+    app.config['DIFFUSION_BATCH_SIZE'] = int(os.environ.get('DIFFUSION_BATCH_SIZE', 4))  # prompts per pipeline call
+    app.config['BATCH_GENERATE_MAX_ITEMS'] = int(os.environ.get('BATCH_GENERATE_MAX_ITEMS', 20))
+    app.config['REMIX_WORKERS'] = int(os.environ.get('REMIX_WORKERS', 4))  # formats rendered concurrently per remix
+    app.config['TRANSCRIBE_WORKERS'] = int(os.environ.get('TRANSCRIBE_WORKERS', 2))  # audio chunks transcribed in parallel
+    app.config['TRANSCRIPT_CACHE_DIR'] = os.environ.get('TRANSCRIPT_CACHE_DIR')  # defaults to UPLOAD_FOLDER/transcript_cache
+    app.config['TRANSCRIPT_CACHE_MAX_MB'] = int(os.environ.get('TRANSCRIPT_CACHE_MAX_MB', 256))
+    app.config['TTS_VOICE'] = os.environ.get('TTS_VOICE', 'default')
+    app.config['TTS_WORKERS'] = int(os.environ.get('TTS_WORKERS', 2))  # sentences synthesized in parallel
+    app.config['TTS_CROSSFADE_MS'] = int(os.environ.get('TTS_CROSSFADE_MS', 30))  # overlap between sentence clips
+    app.config['TTS_CACHE_DIR'] = os.environ.get('TTS_CACHE_DIR')  # defaults to UPLOAD_FOLDER/tts_cache
+    app.config['TTS_CACHE_MAX_MB'] = int(os.environ.get('TTS_CACHE_MAX_MB', 512))
+    app.config['MUSIC_BEDS'] = os.environ.get('MUSIC_BEDS') == '1'  # procedural music under videos, off by default
+    app.config['MUSIC_STYLE'] = os.environ.get('MUSIC_STYLE', 'calm')  # calm, upbeat or dramatic
+    app.config['MUSIC_TEMPO'] = int(os.environ.get('MUSIC_TEMPO', 90))
+    app.config['MUSIC_CACHE_DIR'] = os.environ.get('MUSIC_CACHE_DIR')  # defaults to UPLOAD_FOLDER/music_cache
+    app.config['MUSIC_CACHE_MAX_MB'] = int(os.environ.get('MUSIC_CACHE_MAX_MB', 128))
+    app.config['METRICS_ENABLED'] = os.environ.get('METRICS_ENABLED') == '1'  # Prometheus /metrics endpoint, off by default
+    app.config['METRICS_TOKEN'] = os.environ.get('METRICS_TOKEN')  # bearer token required to scrape, if set
+    app.config['VIDEO_ENCODER'] = os.environ.get('VIDEO_ENCODER', 'pipe')  # pipe (raw frames over stdin) or frames (legacy JPEG dir)
+    app.config['RENDER_SEGMENTS'] = int(os.environ.get('RENDER_SEGMENTS', 1))  # parallel render chunks per video, 0 = one per core
+    app.config['VIDEO_HOLDS'] = os.environ.get('VIDEO_HOLDS', '1') == '1'  # encode runs of identical frames once (VFR output)
+    app.config['VIDEO_ENCODER_SETTINGS'] = json.loads(os.environ.get('VIDEO_ENCODER_SETTINGS', '{}'))  # libx264 options per content type
+    app.config['VIDEO_RENDITIONS'] = [aspect for aspect in os.environ.get('VIDEO_RENDITIONS', '').split(',') if aspect]  # aspect ratios cut at render time (e.g. 9:16,1:1); others are cut on request
+    app.config['VIDEO_HLS'] = os.environ.get('VIDEO_HLS') == '1'  # also package videos as adaptive HLS for the content page
+    app.config['VIDEO_HLS_VARIANTS'] = int(os.environ.get('VIDEO_HLS_VARIANTS', 3))  # bitrate rungs per video
+    app.config['VIDEO_HLS_SEGMENT_SECONDS'] = int(os.environ.get('VIDEO_HLS_SEGMENT_SECONDS', 2))
+    app.config['HLS_JS_URL'] = os.environ.get('HLS_JS_URL')  # hls.js for HLS outside Safari; unset = the MP4 there
+    app.config['HLS_JS_INTEGRITY'] = os.environ.get('HLS_JS_INTEGRITY')  # SRI hash, required when HLS_JS_URL is on another host
+    app.config['FFMPEG_MAX_PROCESSES'] = int(os.environ.get('FFMPEG_MAX_PROCESSES', 0))  # host-wide ffmpeg limit, 0 = half the cores
+    app.config['FFMPEG_TIMEOUT'] = float(os.environ.get('FFMPEG_TIMEOUT', 600))  # seconds before a stuck ffmpeg is killed, 0 = never
+    app.config['FFMPEG_QUEUE_TIMEOUT'] = float(os.environ.get('FFMPEG_QUEUE_TIMEOUT', 300))  # seconds to wait for a free slot, 0 = forever
+    app.config['FFMPEG_LOCK_DIR'] = os.environ.get('FFMPEG_LOCK_DIR')  # slot lock files, shared by every worker on the host
+    app.config['JOB_WORKERS'] = int(os.environ.get('JOB_WORKERS', 2))
+    app.config['JOB_QUEUE_SIZE'] = int(os.environ.get('JOB_QUEUE_SIZE', 32))
+    app.config['JOB_TIMEOUT'] = int(os.environ.get('JOB_TIMEOUT', 3600))  # seconds before an unfinished job from a restarted worker is failed, 0 = never
+    app.config['JOBS_INLINE'] = os.environ.get('JOBS_INLINE') == '1'  # render inside the request (debugging)
+    app.config['RENDER_CACHE_ENABLED'] = os.environ.get('RENDER_CACHE_ENABLED', '1') == '1'
+    app.config['RENDER_CACHE_DIR'] = os.environ.get('RENDER_CACHE_DIR')  # defaults to UPLOAD_FOLDER/render_cache
+    app.config['RENDER_CACHE_MAX_MB'] = int(os.environ.get('RENDER_CACHE_MAX_MB', 2048))
+    app.config['BACKGROUND_CACHE_DIR'] = os.environ.get('BACKGROUND_CACHE_DIR')  # defaults to UPLOAD_FOLDER/background_cache
+    app.config['BACKGROUND_CACHE_MAX_MB'] = int(os.environ.get('BACKGROUND_CACHE_MAX_MB', 1024))
     
     # Ensure the upload folder exists
     os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
@@ -32,17 +82,24 @@ def create_app():
     from ai_content_platform.routes.auth import auth as auth_blueprint
     from ai_content_platform.routes.content import content as content_blueprint
     from ai_content_platform.routes.api import api as api_blueprint
+    from ai_content_platform.routes.metrics import metrics as metrics_blueprint
     
     app.register_blueprint(auth_blueprint)
     app.register_blueprint(content_blueprint)
     app.register_blueprint(api_blueprint)
+    app.register_blueprint(metrics_blueprint)
     
-    # Import models for create_all
-    from ai_content_platform.models.user import User
-    from ai_content_platform.models.content import Content
+    # CLI commands (flask init-db, flask backfill-thumbnails). The schema is
+    # created by `flask init-db`, not on every boot.
+    from ai_content_platform.commands import register_commands
+    register_commands(app)
     
-    # Create database tables
-    with app.app_context():
-        db.create_all()
+    # Configure the shared model registry. Models listed in PRELOAD_MODELS are
+    # loaded here so that with `gunicorn --preload` the workers inherit them.
+    from ai_content_platform.utils.model_registry import registry
+    budget_mb = app.config['MODEL_MEMORY_BUDGET_MB']
+    registry.configure(memory_budget=budget_mb * 1024 * 1024 if budget_mb else None)
+    if app.config['PRELOAD_MODELS']:
+        registry.warmup(app.config['PRELOAD_MODELS'])
     
     return app
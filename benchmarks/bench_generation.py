@@ -0,0 +1,322 @@
+"""Time every generation path with deterministic stand-ins for the ML models.
+
+Run with: python -m ai_content_platform.benchmarks.bench_generation --output results.json
+
+Each case runs ``--repeat`` times against fresh caches (the render cache is
+off) and reports the median wall time, the median CPU time of this process
+and of its children (ffmpeg), and the peak resident set size. Pass
+``--baseline`` with an earlier results file to exit non-zero when a case got
+slower than ``--threshold``.
+"""
+import argparse
+import hashlib
+import json
+import os
+import platform
+import resource
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from types import SimpleNamespace
+import numpy as np
+from PIL import Image
+
+from ai_content_platform.utils.backgrounds import render_background
+from ai_content_platform.utils.model_registry import registry
+
+QUOTE = "The best way to predict the future is to create it."
+REEL_TEXT = "Small steps every day add up to big results over time so keep going"
+
+
+class StubDiffusion:
+    """Stable Diffusion stand-in: a procedural image seeded by each prompt"""
+
+    nbytes = 0
+    device = 'cpu'
+
+    def __call__(self, prompts, **settings):
+        images = []
+        for prompt in prompts:
+            seed = int(hashlib.sha1(prompt.encode('utf-8')).hexdigest()[:8], 16)
+            images.append(Image.fromarray(render_background(512, 512, style='noise', seed=seed)))
+        return SimpleNamespace(images=images)
+
+
+class StubTTS:
+    """TTS stand-in: a 180 Hz tone, 60 ms per character"""
+
+    nbytes = 0
+    sample_rate = 16000
+
+    def __call__(self, text):
+        t = np.arange(int(0.06 * len(text) * self.sample_rate), dtype=np.float32) / self.sample_rate
+        return {'audio': 0.3 * np.sin(2 * np.pi * 180 * t), 'sampling_rate': self.sample_rate}
+
+
+class StubWhisper:
+    """Whisper stand-in: two and a half words per second of audio, evenly spaced"""
+
+    nbytes = 0
+
+    def __call__(self, inputs, return_timestamps=None):
+        duration = len(inputs['raw']) / inputs['sampling_rate']
+        count = max(1, int(duration * 2.5))
+        step = duration / count
+        chunks = [{'text': f" word{i}", 'timestamp': (i * step, (i + 1) * step)} for i in range(count)]
+        return {'text': ''.join(chunk['text'] for chunk in chunks), 'chunks': chunks}
+
+
+def install_stubs():
+    stubs = {'stable-diffusion': StubDiffusion(), 'tts': StubTTS(), 'whisper': StubWhisper()}
+    for name, stub in stubs.items():
+        registry.evict(name)
+        registry.register(name, lambda stub=stub: stub)
+
+
+def diffusion_path():
+    """Which background path the stub actually exercises (seeded diffusion needs torch generators)"""
+    try:
+        import torch  # noqa: F401
+        return 'stub'
+    except ImportError:
+        return 'procedural fallback (torch not installed)'
+
+
+def speech_like_wav(path, seconds, sample_rate=16000):
+    """Deterministic 'speech': 1.2 s amplitude-modulated tone bursts separated by 0.4 s pauses"""
+    from ai_content_platform.utils.synthesis import write_wav
+
+    t = np.arange(int(seconds * sample_rate), dtype=np.float32) / sample_rate
+    voiced = (t % 1.6) < 1.2
+    syllables = 0.5 + 0.5 * np.sin(2 * np.pi * 4 * t)
+    signal = 0.4 * np.sin(2 * np.pi * 180 * t) * syllables * voiced
+    return write_wav(path, signal, sample_rate)
+
+
+class PeakRSS:
+    """Track the peak resident set size of this process while the block runs.
+
+    Linux exposes the current RSS in /proc, so it is sampled on a thread;
+    elsewhere the lifetime peak from getrusage is the best available.
+    """
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    @staticmethod
+    def current():
+        try:
+            with open('/proc/self/statm') as f:
+                return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+        except (OSError, ValueError):
+            peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            return peak if sys.platform == 'darwin' else peak * 1024
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, self.current())
+
+    def __enter__(self):
+        self.peak = self.current()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, self.current())
+
+
+def measure(func):
+    """Run ``func`` once; returns wall, CPU (self and child processes) and peak RSS"""
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    cpu = time.process_time()
+    with PeakRSS() as rss:
+        start = time.perf_counter()
+        func()
+        wall = time.perf_counter() - start
+    cpu = time.process_time() - cpu
+    after = resource.getrusage(resource.RUSAGE_CHILDREN)
+    child_cpu = (after.ru_utime + after.ru_stime) - (children.ru_utime + children.ru_stime)
+    return {'wall_s': wall, 'cpu_s': cpu, 'child_cpu_s': child_cpu, 'peak_rss_mb': rss.peak / 2 ** 20}
+
+
+def build_cases():
+    """(name, size label, setup) triples; ``setup(workdir)`` returns the call to time"""
+    from ai_content_platform.utils.image_utils import create_gradient_background, generate_photo_quote
+    from ai_content_platform.utils.video_utils import generate_video_reel, generate_avatar_video
+    from ai_content_platform.utils.audio_utils import generate_fallback_audio, text_to_speech, transcribe_audio
+
+    cases = []
+    for width, height in [(540, 540), (1080, 1080), (1920, 1080)]:
+        size = f"{width}x{height}"
+        cases.append(('create_gradient_background', size, lambda d, w=width, h=height: lambda: (
+            create_gradient_background(os.path.join(d, 'gradient.png'), w, h, seed=1))))
+        cases.append(('generate_photo_quote', size, lambda d, w=width, h=height: lambda: (
+            generate_photo_quote(QUOTE, 'bench', w, h, seed=1))))
+
+    for seconds in (3, 8, 15):
+        cases.append(('generate_video_reel', f"{seconds}s", lambda d, s=seconds: lambda: (
+            generate_video_reel(REEL_TEXT, 'bench', duration=s, seed=1))))
+
+    def avatar(workdir, seconds):
+        audio_path = speech_like_wav(os.path.join(workdir, 'voice.wav'), seconds)
+        return lambda: generate_avatar_video(REEL_TEXT, 'bench', audio_path=audio_path)
+
+    def transcription(workdir, seconds):
+        audio_path = speech_like_wav(os.path.join(workdir, 'voice.wav'), seconds)
+        return lambda: transcribe_audio(audio_path)
+
+    for seconds in (3, 8, 15):
+        cases.append(('generate_avatar_video', f"{seconds}s", lambda d, s=seconds: avatar(d, s)))
+
+    for seconds in (5, 30, 120):
+        words = ' '.join(['word'] * seconds * 3)
+        cases.append(('generate_fallback_audio', f"{seconds}s", lambda d, s=seconds, t=words: lambda: (
+            generate_fallback_audio(t, os.path.join(d, 'fallback.wav'), duration=s))))
+
+    for sentences in (5, 20, 60):
+        script = ' '.join(f"This is sentence number {i}." for i in range(sentences))
+        cases.append(('text_to_speech', f"{sentences} sentences", lambda d, t=script: lambda: (
+            text_to_speech(t, 'bench'))))
+
+    for seconds in (10, 60, 180):
+        cases.append(('transcribe_audio', f"{seconds}s", lambda d, s=seconds: transcription(d, s)))
+
+    return cases
+
+
+def fresh_workdir(app, root):
+    """Point every output folder and cache at a new empty directory"""
+    workdir = tempfile.mkdtemp(dir=root)
+    app.config.update({
+        'UPLOAD_FOLDER': workdir,
+        'BACKGROUND_CACHE_DIR': os.path.join(workdir, 'backgrounds'),
+        'TRANSCRIPT_CACHE_DIR': os.path.join(workdir, 'transcripts'),
+        'TTS_CACHE_DIR': os.path.join(workdir, 'tts'),
+        'MUSIC_CACHE_DIR': os.path.join(workdir, 'music'),
+    })
+    return workdir
+
+
+def run_case(app, root, setup, repeat):
+    runs = []
+    for _ in range(repeat):
+        workdir = fresh_workdir(app, root)
+        try:
+            runs.append(measure(setup(workdir)))
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+    return {
+        'wall_s': statistics.median(run['wall_s'] for run in runs),
+        'cpu_s': statistics.median(run['cpu_s'] for run in runs),
+        'child_cpu_s': statistics.median(run['child_cpu_s'] for run in runs),
+        'peak_rss_mb': max(run['peak_rss_mb'] for run in runs),
+        'runs': [run['wall_s'] for run in runs],
+    }
+
+
+def compare(results, baseline, threshold, min_delta):
+    """Cases whose median wall time grew by more than ``threshold`` (and ``min_delta`` seconds)
+
+    A case that now fails counts as a regression with an ``after`` of None,
+    whatever the baseline holds for it.
+    """
+    regressions = []
+    for key, result in results.items():
+        before = baseline.get(key)
+        if 'error' in result:
+            regressions.append((key, before.get('wall_s') if before else None, None))
+            continue
+        if not before or 'error' in before:
+            continue
+        delta = result['wall_s'] - before['wall_s']
+        if delta > min_delta and result['wall_s'] > before['wall_s'] * (1 + threshold):
+            regressions.append((key, before['wall_s'], result['wall_s']))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--quick', action='store_true', help='only the smallest size of each case')
+    parser.add_argument('--only', help='comma-separated function names to run')
+    parser.add_argument('--output', help='write results to this JSON file')
+    parser.add_argument('--baseline', help='earlier results JSON to compare against')
+    parser.add_argument('--threshold', type=float, default=0.2, help='allowed slowdown, 0.2 = 20%%')
+    parser.add_argument('--min-delta', type=float, default=0.01,
+                        help='ignore slowdowns smaller than this many seconds')
+    args = parser.parse_args()
+
+    os.environ.setdefault('DATABASE_URL', 'sqlite://')
+    from ai_content_platform import create_app
+
+    app = create_app()
+    app.config.update({'TESTING': True, 'RENDER_CACHE_ENABLED': False, 'MUSIC_BEDS': False})
+    install_stubs()
+
+    cases = build_cases()
+    if args.only:
+        names = set(args.only.split(','))
+        cases = [case for case in cases if case[0] in names]
+    if args.quick:
+        seen = set()
+        cases = [case for case in cases if not (case[0] in seen or seen.add(case[0]))]
+
+    results = {}
+    root = tempfile.mkdtemp(prefix='bench_generation_')
+    try:
+        with app.app_context():
+            for name, size, setup in cases:
+                key = f"{name}[{size}]"
+                try:
+                    results[key] = run_case(app, root, setup, args.repeat)
+                except Exception as e:
+                    results[key] = {'error': f"{e.__class__.__name__}: {e}"}
+                    print(f"{key:<46} error: {results[key]['error']}")
+                    continue
+                r = results[key]
+                print(f"{key:<46} {r['wall_s'] * 1000:10.1f} ms wall {r['cpu_s'] * 1000:10.1f} ms cpu "
+                      f"{r['child_cpu_s'] * 1000:10.1f} ms child {r['peak_rss_mb']:8.1f} MB")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+    report = {
+        'created_at': datetime.utcnow().isoformat(),
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'numpy': np.__version__,
+            'cpus': os.cpu_count(),
+            'diffusion': diffusion_path(),
+        },
+        'settings': {'repeat': args.repeat},
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+        regressions = compare(results, baseline, args.threshold, args.min_delta)
+        for key, before, after in regressions:
+            if after is None:
+                print(f"REGRESSION {key}: {results[key]['error']}")
+            else:
+                print(f"REGRESSION {key}: {before * 1000:.1f} ms -> {after * 1000:.1f} ms")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""Guard web-worker startup: import time, baseline memory and which heavy modules load.
+
+Run with: python -m ai_content_platform.benchmarks.bench_startup
+
+Each run happens in a fresh interpreter that imports the package, calls
+create_app() and builds one request context, which is what a gunicorn
+worker does before serving the dashboard. Exits non-zero when the median
+time or peak RSS exceeds its limit, or when a media/ML library was imported.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# Libraries that only generation paths need; a web worker must not load them at startup
+HEAVY_MODULES = ('cv2', 'PIL', 'numpy', 'pydub', 'speech_recognition', 'transformers', 'torch',
+                 'diffusers', 'librosa', 'ffmpeg')
+
+PROBE = '''
+import json, resource, sys, time
+start = time.perf_counter()
+from ai_content_platform import create_app
+app = create_app()
+with app.test_request_context('/'):
+    pass
+seconds = time.perf_counter() - start
+peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({
+    'seconds': seconds,
+    'peak_rss_mb': peak / 2 ** 20 if sys.platform == 'darwin' else peak / 1024,
+    'heavy_modules': sorted(name for name in %r if name in sys.modules),
+}))
+''' % (HEAVY_MODULES,)
+
+
+def probe():
+    """Start the app in a fresh interpreter; returns its timing, memory and heavy imports"""
+    env = dict(os.environ, DATABASE_URL=os.environ.get('DATABASE_URL', 'sqlite://'))
+    output = subprocess.run([sys.executable, '-c', PROBE], capture_output=True, text=True,
+                            env=env, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--max-seconds', type=float, default=1.0, help='median create_app() time limit')
+    parser.add_argument('--max-rss-mb', type=float, default=80, help='peak RSS limit')
+    parser.add_argument('--output', help='write results to this JSON file')
+    args = parser.parse_args()
+
+    runs = [probe() for _ in range(args.repeat)]
+    result = {
+        'seconds': statistics.median(run['seconds'] for run in runs),
+        'peak_rss_mb': max(run['peak_rss_mb'] for run in runs),
+        'heavy_modules': sorted({name for run in runs for name in run['heavy_modules']}),
+    }
+    print(f"startup {result['seconds'] * 1000:.0f} ms, peak RSS {result['peak_rss_mb']:.1f} MB, "
+          f"heavy modules: {', '.join(result['heavy_modules']) or 'none'}")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=2)
+
+    failures = []
+    if result['seconds'] > args.max_seconds:
+        failures.append(f"startup took {result['seconds']:.2f}s (limit {args.max_seconds:.2f}s)")
+    if result['peak_rss_mb'] > args.max_rss_mb:
+        failures.append(f"peak RSS {result['peak_rss_mb']:.1f} MB (limit {args.max_rss_mb:.0f} MB)")
+    if result['heavy_modules']:
+        failures.append(f"imported at startup: {', '.join(result['heavy_modules'])}")
+    for failure in failures:
+        print(f"FAIL {failure}")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+import click
+from flask.cli import with_appcontext
+from sqlalchemy.orm import load_only
+
+from ai_content_platform import db
+from ai_content_platform.models.content import Content
+
+
+@click.command('init-db')
+@with_appcontext
+def init_db():
+    """Create any missing database tables"""
+    # Every model must be imported for create_all to see its table
+    from ai_content_platform.models.user import User
+    from ai_content_platform.models.job import Job
+
+    db.create_all()
+    click.echo("Database tables created.")
+
+
+@click.command('backfill-thumbnails')
+@click.option('--force', is_flag=True, help='Regenerate thumbnails that already exist.')
+@click.option('--batch-size', default=100, show_default=True, help='Rows loaded and committed per batch.')
+@with_appcontext
+def backfill_thumbnails(force, batch_size):
+    """Create thumbnails and previews for content rendered before they existed"""
+    from ai_content_platform.utils.thumbnails import create_thumbnails
+
+    created = failed = 0
+    last_id = 0
+    while True:
+        query = Content.query.options(load_only(
+            Content.id, Content.output_path, Content.thumbnail_path)).filter(
+            Content.id > last_id, Content.output_path.isnot(None))
+        if not force:
+            query = query.filter(Content.thumbnail_path.is_(None))
+        batch = query.order_by(Content.id).limit(batch_size).all()
+        if not batch:
+            break
+
+        for content_item in batch:
+            try:
+                if create_thumbnails(content_item):
+                    created += 1
+            except Exception as e:
+                failed += 1
+                click.echo(f"Error creating thumbnail for content {content_item.id}: {e}", err=True)
+        last_id = batch[-1].id
+        db.session.commit()
+
+    click.echo(f"Created {created} thumbnails ({failed} failed).")
+
+
+def register_commands(app):
+    app.cli.add_command(init_db)
+    app.cli.add_command(backfill_thumbnails)
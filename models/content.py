@@ -1,8 +1,15 @@
 from datetime import datetime
 import json
 from ai_content_platform import db
+from ai_content_platform.utils.thumbnails import preview_path_for
+CONTENT_TYPES = ('photo_quote', 'video_reel', 'voice_video', 'avatar_video')
 
 class Content(db.Model):
+    # Serves the dashboard's keyset pagination: WHERE user_id = ? ORDER BY created_at, id
+    __table_args__ = (
+        db.Index('ix_content_user_created', 'user_id', 'created_at', 'id'),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
     content_type = db.Column(db.String(50), nullable=False)  # photo_quote, video_reel, voice_video, avatar_video
@@ -30,5 +37,17 @@ class Content(db.Model):
             return json.loads(self.metadata)
         return {}
     
+    @property
+    def preview_path(self):
+        """Animated preview stored next to the thumbnail, for video content"""
+        if not self.thumbnail_path or self.content_type == 'photo_quote':
+            return None
+        return preview_path_for(self.thumbnail_path)
+    
+    @property
+    def cursor(self):
+        """Keyset pagination cursor for rows after this one"""
+        return f"{self.created_at.isoformat()}_{self.id}"
+    
     def __repr__(self):
         return f'<Content {self.title}>'
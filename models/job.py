@@ -0,0 +1,48 @@
+from datetime import datetime
+from ai_content_platform import db
+
+class Job(db.Model):
+    """A background generation task and its progress"""
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+
+    id = db.Column(db.Integer, primary_key=True)
+    job_type = db.Column(db.String(50), nullable=False)  # create, remix
+    status = db.Column(db.String(20), nullable=False, default=QUEUED, index=True)
+    progress = db.Column(db.Float, nullable=False, default=0.0)  # 0.0 to 1.0
+    stage = db.Column(db.String(100), nullable=True)
+    error = db.Column(db.Text, nullable=True)
+
+    # Timestamps
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    # Foreign Keys
+    content_id = db.Column(db.Integer, db.ForeignKey('content.id'), nullable=False, index=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+
+    content = db.relationship('Content', backref=db.backref('jobs', lazy=True, cascade='all, delete-orphan'))
+
+    @property
+    def is_finished(self):
+        return self.status in (self.DONE, self.FAILED)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'job_type': self.job_type,
+            'status': self.status,
+            'progress': round(self.progress or 0.0, 3),
+            'stage': self.stage,
+            'error': self.error,
+            'content_id': self.content_id,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+
+    def __repr__(self):
+        return f'<Job {self.id} {self.status}>'
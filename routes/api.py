@@ -2,12 +2,19 @@ from flask import Blueprint, jsonify, request, current_app
 from flask_login import login_required, current_user
 
 from ai_content_platform import db
-from ai_content_platform.models.content import Content
+from ai_content_platform.models.content import Content, CONTENT_TYPES
+from ai_content_platform.models.job import Job
 from ai_content_platform.utils.text_utils import generate_text_prompt
 from ai_content_platform.utils.agent import ContentAgent
+from ai_content_platform.utils.jobs import job_queue, JobQueueFull
+from ai_content_platform.utils.model_registry import registry
+from ai_content_platform.utils.render_cache import get_render_cache
 
 api = Blueprint('api', __name__, url_prefix='/api')
 
+# Content types whose renders share batched background diffusion
+BATCH_CONTENT_TYPES = ('photo_quote', 'video_reel')
+
 @api.route('/generate-prompts', methods=['POST'])
 @login_required
 def generate_prompts():
@@ -62,17 +69,184 @@ def remix_content(content_id):
         }), 403
     
     data = request.get_json()
-    target_format = data.get('target_format')
+    
+    # One format (target_format) or several at once (target_formats)
+    target_formats = data.get('target_formats') or [data.get('target_format')]
+    if not isinstance(target_formats, list) or any(f not in CONTENT_TYPES for f in target_formats):
+        return jsonify({
+            'success': False,
+            'message': f'Target formats must be among {", ".join(CONTENT_TYPES)}.'
+        }), 400
     
     # Initialize the agent
     agent = ContentAgent()
     
-    # Get remixed content
-    remixed_content = agent.remix_content(content_item, target_format)
+    # Create the remixes now; unchanged formats link to the source, the rest
+    # render together in the background from shared intermediates
+    remixed_contents = agent.create_remixes(content_item, target_formats)
+    pending = [remixed for remixed in remixed_contents
+               if not agent.link_existing(remixed, content_item)]
+    
+    jobs = {}
+    if pending:
+        try:
+            jobs = {
+                job.content_id: job for job in job_queue.enqueue_group(
+                    'remix', pending, agent.render_remixes, source_id=content_item.id)
+            }
+        except JobQueueFull as e:
+            return jsonify({
+                'success': False,
+                'message': str(e)
+            }), 503
+    
+    remixes = [
+        {
+            'content_id': remixed.id,
+            'content_type': remixed.content_type,
+            'job_id': jobs[remixed.id].id if remixed.id in jobs else None,
+            'status': jobs[remixed.id].status if remixed.id in jobs else 'done'
+        }
+        for remixed in remixed_contents
+    ]
+    response = {
+        'success': True,
+        'remixes': remixes
+    }
+    if len(remixes) == 1:
+        response.update({
+            'new_content_id': remixes[0]['content_id'],
+            'job_id': remixes[0]['job_id'],
+            'status': remixes[0]['status']
+        })
+    return jsonify(response)
+
+@api.route('/batch-generate', methods=['POST'])
+@login_required
+def batch_generate():
+    data = request.get_json() or {}
+    items = data.get('items')
+    max_items = current_app.config.get('BATCH_GENERATE_MAX_ITEMS', 20)
+    
+    # Validate the whole batch before creating anything
+    if not isinstance(items, list) or not items:
+        return jsonify({
+            'success': False,
+            'message': 'Provide a non-empty list of items.'
+        }), 400
+    if len(items) > max_items:
+        return jsonify({
+            'success': False,
+            'message': f'A batch can hold at most {max_items} items.'
+        }), 400
+    for item in items:
+        if not isinstance(item, dict) or item.get('content_type') not in BATCH_CONTENT_TYPES \
+                or not item.get('input_text'):
+            return jsonify({
+                'success': False,
+                'message': f'Each item needs input_text and a content_type of {", ".join(BATCH_CONTENT_TYPES)}.'
+            }), 400
+    
+    new_contents = [
+        Content(
+            title=item.get('title') or item['input_text'][:50],
+            content_type=item['content_type'],
+            input_text=item['input_text'],
+            user_id=current_user.id
+        )
+        for item in items
+    ]
+    db.session.add_all(new_contents)
+    db.session.commit()
+    
+    # One worker renders the batch, diffusing all backgrounds up front
+    agent = ContentAgent()
+    try:
+        jobs = job_queue.enqueue_batch('batch', new_contents, agent.generate_content,
+                                       prepare=agent.prepare_batch)
+    except JobQueueFull as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 503
+    
+    return jsonify({
+        'success': True,
+        'content_ids': [content.id for content in new_contents],
+        'job_ids': [job.id for job in jobs]
+    })
+
+@api.route('/jobs/<int:job_id>', methods=['GET'])
+@login_required
+def get_job(job_id):
+    job = Job.query.get_or_404(job_id)
+    
+    # Security check
+    if job.user_id != current_user.id:
+        return jsonify({
+            'success': False,
+            'message': 'You do not have permission to access this job.'
+        }), 403
+    
+    if not job.is_finished and job_queue.fail_stale_jobs(current_user.id):
+        db.session.refresh(job)
+    
+    return jsonify({
+        'success': True,
+        'job': job.to_dict()
+    })
+
+@api.route('/jobs/<int:job_id>/cancel', methods=['POST'])
+@login_required
+def cancel_job(job_id):
+    job = Job.query.get_or_404(job_id)
+    
+    # Security check
+    if job.user_id != current_user.id:
+        return jsonify({
+            'success': False,
+            'message': 'You do not have permission to access this job.'
+        }), 403
+    
+    if not job_queue.cancel(job):
+        return jsonify({
+            'success': False,
+            'message': 'This job has already finished.'
+        }), 409
+    
+    return jsonify({
+        'success': True,
+        'job': job.to_dict()
+    })
+
+@api.route('/models', methods=['GET'])
+@login_required
+def get_model_stats():
+    # Process-wide statistics are for administrators only
+    if not current_user.is_admin():
+        return jsonify({
+            'success': False,
+            'message': 'Only administrators can view these statistics.'
+        }), 403
+    
+    return jsonify({
+        'success': True,
+        'registry': registry.stats()
+    })
+
+@api.route('/render-cache', methods=['GET'])
+@login_required
+def get_render_cache_stats():
+    # Process-wide statistics are for administrators only
+    if not current_user.is_admin():
+        return jsonify({
+            'success': False,
+            'message': 'Only administrators can view these statistics.'
+        }), 403
     
     return jsonify({
         'success': True,
-        'new_content_id': remixed_content.id
+        'render_cache': get_render_cache().stats()
     })
 
 @api.route('/content-calendar', methods=['GET'])
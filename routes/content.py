@@ -1,18 +1,65 @@
 import os
-from flask import Blueprint, render_template, redirect, url_for, flash, request, current_app, jsonify
+from datetime import datetime
+from flask import Blueprint, render_template, redirect, url_for, flash, request, current_app, jsonify, abort
 from flask_login import login_required, current_user
+from sqlalchemy import and_, func, or_
+from sqlalchemy.orm import load_only
+from werkzeug.security import safe_join
 from werkzeug.utils import secure_filename
 
 from ai_content_platform import db
-from ai_content_platform.models.content import Content
-from ai_content_platform.utils.text_utils import generate_text_prompt
-from ai_content_platform.utils.image_utils import generate_photo_quote
-from ai_content_platform.utils.video_utils import generate_video_reel, generate_avatar_video
-from ai_content_platform.utils.audio_utils import transcribe_audio, text_to_speech
+from ai_content_platform.models.content import Content, CONTENT_TYPES
+from ai_content_platform.models.job import Job
 from ai_content_platform.utils.agent import ContentAgent
+from ai_content_platform.utils.jobs import job_queue, JobQueueFull
+from ai_content_platform.utils.media import file_etag, send_media
+from ai_content_platform.utils.thumbnails import remove_thumbnails
+from ai_content_platform.utils.renditions import RENDITIONS, rendition_slug, remove_renditions
+from ai_content_platform.utils.streaming import MASTER_PLAYLIST, stream_dir_for, stream_playlist_for, remove_stream
 
 content = Blueprint('content', __name__)
 
+# Columns rendered on dashboard cards
+CARD_COLUMNS = (Content.id, Content.title, Content.content_type, Content.output_path,
+                Content.thumbnail_path, Content.created_at, Content.user_id)
+
+
+def parse_cursor(cursor):
+    """Split a ``<created_at>_<id>`` dashboard cursor; None if missing or malformed"""
+    if not cursor:
+        return None
+    try:
+        created_at, content_id = cursor.rsplit('_', 1)
+        return datetime.fromisoformat(created_at), int(content_id)
+    except ValueError:
+        return None
+
+
+def content_stats(user_id):
+    """Per-type and this-month counts for the dashboard, computed in the database"""
+    counts = dict(db.session.query(Content.content_type, func.count(Content.id)).filter(
+        Content.user_id == user_id).group_by(Content.content_type).all())
+
+    month_start = datetime.utcnow().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    this_month = db.session.query(func.count(Content.id)).filter(
+        Content.user_id == user_id, Content.created_at >= month_start).scalar()
+
+    return {
+        'total': sum(counts.values()),
+        'photo_quotes': counts.get('photo_quote', 0),
+        'videos': sum(counts.get(t, 0) for t in ('video_reel', 'voice_video', 'avatar_video')),
+        'this_month': this_month,
+    }
+
+
+def save_audio_upload(audio_file):
+    """Save an uploaded audio file to the upload folder and return its path"""
+    audio_filename = secure_filename(audio_file.filename)
+    audio_path = os.path.join(
+        current_app.config['UPLOAD_FOLDER'], f"audio_{current_user.id}_{audio_filename}")
+    audio_file.save(audio_path)
+    return audio_path
+
 
 @content.route('/')
 def index():
@@ -22,9 +69,42 @@ def index():
 @content.route('/dashboard')
 @login_required
 def dashboard():
-    user_content = Content.query.filter_by(
-        user_id=current_user.id).order_by(Content.created_at.desc()).all()
-    return render_template('dashboard.html', content_items=user_content)
+    content_type = request.args.get('type') or None
+    if content_type not in CONTENT_TYPES:
+        content_type = None
+    page_size = current_app.config.get('DASHBOARD_PAGE_SIZE', 24)
+
+    # Only the columns the cards need; input_text and metadata stay unloaded
+    query = Content.query.options(load_only(*CARD_COLUMNS)).filter(
+        Content.user_id == current_user.id)
+    if content_type:
+        query = query.filter(Content.content_type == content_type)
+
+    # Keyset pagination: continue strictly after the last card of the previous page
+    cursor = parse_cursor(request.args.get('cursor'))
+    if cursor:
+        created_at, content_id = cursor
+        query = query.filter(or_(
+            Content.created_at < created_at,
+            and_(Content.created_at == created_at, Content.id < content_id)))
+
+    user_content = query.order_by(
+        Content.created_at.desc(), Content.id.desc()).limit(page_size + 1).all()
+    next_cursor = None
+    if len(user_content) > page_size:
+        user_content = user_content[:page_size]
+        next_cursor = user_content[-1].cursor
+
+    # Jobs still rendering, so the dashboard can poll their status
+    job_queue.fail_stale_jobs(current_user.id)
+    active_jobs = {
+        job.content_id: job for job in Job.query.filter(
+            Job.user_id == current_user.id,
+            Job.status.in_([Job.QUEUED, Job.RUNNING])).all()
+    }
+    return render_template('dashboard.html', content_items=user_content, active_jobs=active_jobs,
+                           stats=content_stats(current_user.id), content_type=content_type,
+                           content_types=CONTENT_TYPES, next_cursor=next_cursor)
 
 
 @content.route('/create', methods=['GET', 'POST'])
@@ -39,41 +119,11 @@ def create_content():
             content_type=content_type,
             user_id=current_user.id
         )
+        audio_path = None
 
-        # Handle different content types
-        if content_type == 'photo_quote':
-            text = request.form['input_text']
-            new_content.input_text = text
-
-            # Save to get an ID
-            db.session.add(new_content)
-            db.session.commit()
-
-            # Generate the content
-            output_path = generate_photo_quote(text, new_content.id)
-            new_content.output_path = output_path
-            new_content.set_metadata({
-                'font': 'default',
-                'style': 'modern',
-                'colors': 'auto'
-            })
-
-        elif content_type == 'video_reel':
-            text = request.form['input_text']
-            new_content.input_text = text
-
-            # Save to get an ID
-            db.session.add(new_content)
-            db.session.commit()
-
-            # Generate the content
-            output_path = generate_video_reel(text, new_content.id)
-            new_content.output_path = output_path
-            new_content.set_metadata({
-                'duration': '15s',
-                'style': 'dynamic',
-                'music': 'auto'
-            })
+        # Collect the inputs for the content type; rendering happens in a job
+        if content_type in ('photo_quote', 'video_reel'):
+            new_content.input_text = request.form['input_text']
 
         elif content_type == 'voice_video':
             # Handle audio file upload
@@ -86,77 +136,28 @@ def create_content():
                 flash('No audio file selected')
                 return redirect(request.url)
 
-            # Save audio file
-            audio_filename = secure_filename(audio_file.filename)
-            audio_path = os.path.join(
-                current_app.config['UPLOAD_FOLDER'], f"audio_{current_user.id}_{audio_filename}")
-            audio_file.save(audio_path)
-
-            # Transcribe audio
-            transcription = transcribe_audio(audio_path)
-            new_content.input_text = transcription
-
-            # Save to get an ID
-            db.session.add(new_content)
-            db.session.commit()
-
-            # Generate video with captions
-            output_path = generate_video_reel(
-                transcription, new_content.id, audio_path=audio_path)
-            new_content.output_path = output_path
-            new_content.set_metadata({
-                'audio_path': audio_path,
-                'transcription': transcription,
-                'style': 'scenic'
-            })
+            audio_path = save_audio_upload(audio_file)
 
         elif content_type == 'avatar_video':
             if 'audio_file' in request.files and request.files['audio_file'].filename != '':
                 # Use uploaded audio file
-                audio_file = request.files['audio_file']
-                audio_filename = secure_filename(audio_file.filename)
-                audio_path = os.path.join(
-                    current_app.config['UPLOAD_FOLDER'], f"audio_{current_user.id}_{audio_filename}")
-                audio_file.save(audio_path)
-
-                # Transcribe audio
-                transcription = transcribe_audio(audio_path)
-                new_content.input_text = transcription
-
-                # Save to get an ID
-                db.session.add(new_content)
-                db.session.commit()
-
-                # Generate avatar video
-                output_path = generate_avatar_video(
-                    transcription, new_content.id, audio_path=audio_path)
-
+                audio_path = save_audio_upload(request.files['audio_file'])
             else:
                 # Use text-to-speech
-                text = request.form['input_text']
-                new_content.input_text = text
-
-                # Save to get an ID
-                db.session.add(new_content)
-                db.session.commit()
+                new_content.input_text = request.form['input_text']
 
-                # Generate speech from text
-                audio_path = text_to_speech(text, new_content.id)
-
-                # Generate avatar video
-                output_path = generate_avatar_video(
-                    text, new_content.id, audio_path=audio_path)
+        # Save to get an ID, then hand the render to the job queue
+        db.session.add(new_content)
+        db.session.commit()
 
-            new_content.output_path = output_path
-            new_content.set_metadata({
-                'avatar_style': 'realistic',
-                'voice_style': 'natural',
-                'background': 'gradient'
-            })
+        agent = ContentAgent()
+        try:
+            job_queue.enqueue('create', new_content, agent.generate_content, audio_path=audio_path)
+        except JobQueueFull:
+            flash('The server is busy right now. Please try again in a few minutes.')
+            return redirect(url_for('content.dashboard'))
 
-        # Final save
-        db.session.commit()
-        flash('Content created successfully!')
+        flash('Content created successfully! It will be ready in a moment.')
         return redirect(url_for('content.view_content', content_id=new_content.id))
 
     return render_template('content_creation.html')
@@ -175,6 +176,76 @@ def view_content(content_id):
     return render_template('content_detail.html', content=content_item)
 
 
+# Renditions are served as e.g. 'rendition_9x16'
+MEDIA_KINDS = ('output', 'thumbnail', 'preview') + tuple(
+    f"rendition_{rendition_slug(aspect)}" for aspect in RENDITIONS)
+
+
+def media_path(content_item, kind):
+    if kind == 'output':
+        return content_item.output_path
+    if kind == 'thumbnail':
+        return content_item.thumbnail_path
+    if kind.startswith('rendition_'):
+        for aspect, path in content_item.get_metadata().get('renditions', {}).items():
+            if kind == f"rendition_{rendition_slug(aspect)}":
+                return path
+        return None
+    return content_item.preview_path
+
+
+@content.app_template_global()
+def media_url(content_item, kind='output'):
+    """Versioned media URL; the version makes the response cacheable forever"""
+    path = media_path(content_item, kind)
+    if not path or not os.path.exists(path):
+        return None
+    return url_for('content.media', content_id=content_item.id, kind=kind, v=file_etag(path))
+
+
+@content.route('/content/<int:content_id>/media/<kind>')
+@login_required
+def media(content_id, kind):
+    if kind not in MEDIA_KINDS:
+        abort(404)
+    content_item = Content.query.get_or_404(content_id)
+
+    # Security check to ensure the user owns this content
+    if content_item.user_id != current_user.id:
+        abort(403)
+
+    path = media_path(content_item, kind)
+    if not path or not os.path.exists(path):
+        abort(404)
+    return send_media(path, version=request.args.get('v'))
+
+
+@content.app_template_global()
+def stream_url(content_item):
+    """URL of the content's HLS master playlist, or None if it was not packaged"""
+    if not stream_playlist_for(content_item.output_path):
+        return None
+    return url_for('content.stream', content_id=content_item.id, name=MASTER_PLAYLIST)
+
+
+@content.route('/content/<int:content_id>/stream/<path:name>')
+@login_required
+def stream(content_id, name):
+    """Playlists and segments of the HLS package; playlists refer to them by relative path"""
+    content_item = Content.query.get_or_404(content_id)
+
+    # Security check to ensure the user owns this content
+    if content_item.user_id != current_user.id:
+        abort(403)
+
+    if not content_item.output_path:
+        abort(404)
+    path = safe_join(stream_dir_for(content_item.output_path), name)
+    if not path or not os.path.isfile(path):
+        abort(404)
+    return send_media(path)
+
+
 @content.route('/content/<int:content_id>/delete', methods=['POST'])
 @login_required
 def delete_content(content_id):
@@ -189,8 +260,9 @@ def delete_content(content_id):
     if content_item.output_path and os.path.exists(content_item.output_path):
         os.remove(content_item.output_path)
 
-    if content_item.thumbnail_path and os.path.exists(content_item.thumbnail_path):
-        os.remove(content_item.thumbnail_path)
+    remove_renditions(content_item)
+    remove_stream(content_item.output_path)
+    remove_thumbnails(content_item)
 
     # Delete from database
     db.session.delete(content_item)
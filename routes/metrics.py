@@ -0,0 +1,20 @@
+import hmac
+from flask import Blueprint, Response, request, current_app, abort
+
+from ai_content_platform.utils.metrics import metrics as registry
+
+metrics = Blueprint('metrics', __name__)
+
+@metrics.route('/metrics')
+def scrape():
+    """Prometheus scrape endpoint when METRICS_ENABLED; guarded by a bearer token when METRICS_TOKEN is set"""
+    if not current_app.config.get('METRICS_ENABLED'):
+        abort(404)
+    
+    token = current_app.config.get('METRICS_TOKEN')
+    if token:
+        supplied = request.headers.get('Authorization', '')
+        if not hmac.compare_digest(supplied.encode(), f"Bearer {token}".encode()):
+            abort(401)
+    
+    return Response(registry.render(), mimetype='text/plain; version=0.0.4')
@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+from ai_content_platform import create_app, db
+from ai_content_platform.utils.model_registry import registry, _load_tts
+
+
+class TinyTTS:
+    """Stand-in for the TTS pipeline: a constant tone, 0.01 s per character"""
+
+    nbytes = 1024
+
+    def __init__(self):
+        self.spoken = []
+
+    def __call__(self, text):
+        self.spoken.append(text)
+        samples = np.full(int(160 * len(text)), 0.25, dtype=np.float32)
+        return {'audio': samples[None, :], 'sampling_rate': 16000}
+
+
+@pytest.fixture
+def app_config():
+    """Settings a test module layers over the ``app`` defaults; override it in the module"""
+    return {}
+
+
+@pytest.fixture
+def app(tmp_path, app_config):
+    """App in testing mode inside an app context; every output folder and cache is under tmp_path"""
+    app = create_app()
+    app.config.update({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+        'UPLOAD_FOLDER': str(tmp_path),
+        'THUMBNAILS_DIR': str(tmp_path / 'thumbnails'),
+        'VIDEO_ENCODER_SETTINGS': {'default': {'preset': 'ultrafast'}},
+    })
+    app.config.update(app_config)
+    with app.app_context():
+        yield app
+
+
+@pytest.fixture
+def database(app):
+    """Empty tables in the app's in-memory database"""
+    db.create_all()
+    yield db
+    db.drop_all()
+
+
+@pytest.fixture
+def tts():
+    """TinyTTS registered as the 'tts' model, the real loader restored afterwards"""
+    tts = TinyTTS()
+    registry.register('tts', lambda: tts)
+    yield tts
+    registry.evict('tts')
+    registry.register('tts', _load_tts)
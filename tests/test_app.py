@@ -1,10 +1,16 @@
 import os
+import sys
+import threading
+import time
 import pytest
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 from werkzeug.security import generate_password_hash
 from ai_content_platform import create_app, db
 from ai_content_platform.models.user import User
 from ai_content_platform.models.content import Content
+from ai_content_platform.models.job import Job
+from ai_content_platform.utils.jobs import job_queue, ProgressReporter, JobCancelled, CANCELLED_ERROR
+from ai_content_platform.utils.ffmpeg_utils import get_executor
 
 @pytest.fixture
 def app():
@@ -70,7 +76,7 @@ def test_index_page(client):
     assert b'AI Content Platform' in response.data
 
 
-def test_register(client):
+def test_register(client, init_database):
     response = client.post('/register', data={
         'username': 'newuser',
         'email': 'new@example.com',
@@ -197,5 +203,202 @@ def test_content_validation(client, init_database):
     assert b'Title is required' in response.data
 
 
+def test_job_status_api(client, init_database):
+    # Login first
+    client.post('/login', data={
+        'username': 'testuser',
+        'password': 'testpass'
+    })
+
+    # Rendering runs inline while testing, so the job is finished on return
+    client.post('/create', data={
+        'content_type': 'photo_quote',
+        'title': 'Job Quote',
+        'input_text': 'Jobs report their status'
+    })
+
+    response = client.get('/api/jobs/1')
+    json_data = response.get_json()
+    assert json_data['success'] == True
+    assert json_data['job']['content_id'] == 2
+    assert json_data['job']['status'] == 'done', json_data['job']['error']
+    assert json_data['job']['progress'] == 1.0
+
+
+def test_batch_generate_api(app, client, init_database):
+    client.post('/login', data={
+        'username': 'testuser',
+        'password': 'testpass'
+    })
+
+    response = client.post('/api/batch-generate', json={'items': [
+        {'content_type': 'photo_quote', 'input_text': 'First quote'},
+        {'content_type': 'photo_quote', 'input_text': 'Second quote', 'title': 'Second'}
+    ]})
+    json_data = response.get_json()
+    assert json_data['success'] == True
+    assert json_data['content_ids'] == [2, 3]
+    assert len(json_data['job_ids']) == 2
+
+    # The batch renders inline while testing: every job is done and has its output
+    for job_id in json_data['job_ids']:
+        job = client.get(f'/api/jobs/{job_id}').get_json()['job']
+        assert job['status'] == 'done', job['error']
+        with app.app_context():
+            output_path = db.session.get(Content, job['content_id']).output_path
+        assert output_path and os.path.exists(output_path)
+
+    # Unsupported types are rejected before anything is created
+    response = client.post('/api/batch-generate', json={'items': [
+        {'content_type': 'avatar_video', 'input_text': 'Hello'}
+    ]})
+    assert response.status_code == 400
+
+
+def test_multi_format_remix_api(app, client, init_database):
+    client.post('/login', data={
+        'username': 'testuser',
+        'password': 'testpass'
+    })
+
+    response = client.post('/api/remix/1', json={'target_formats': ['photo_quote', 'video_reel']})
+    json_data = response.get_json()
+    assert json_data['success'] == True
+    assert [remix['content_type'] for remix in json_data['remixes']] == ['photo_quote', 'video_reel']
+
+    # Both targets render in one task and finish together, with an output each
+    assert [remix['status'] for remix in json_data['remixes']] == ['done', 'done']
+    for remix in json_data['remixes']:
+        if remix['job_id'] is not None:
+            job = client.get(f"/api/jobs/{remix['job_id']}").get_json()['job']
+            assert job['status'] == 'done', job['error']
+        with app.app_context():
+            output_path = db.session.get(Content, remix['content_id']).output_path
+        assert output_path and os.path.exists(output_path)
+
+    response = client.post('/api/remix/1', json={'target_formats': ['podcast']})
+    assert response.status_code == 400
+
+
+def test_dashboard_pagination(app, client, init_database):
+    with app.app_context():
+        created_at = datetime(2024, 1, 1)
+        for i in range(5):
+            db.session.add(Content(
+                title=f'Paged {i}',
+                content_type='video_reel',
+                user_id=1,
+                created_at=created_at  # identical timestamps are ordered by id
+            ))
+        db.session.commit()
+    app.config['DASHBOARD_PAGE_SIZE'] = 2
+
+    client.post('/login', data={
+        'username': 'testuser',
+        'password': 'testpass'
+    })
+
+    # Newest first; the cursor continues exactly where the page ended
+    response = client.get('/dashboard')
+    assert b'Test Content' in response.data
+    assert b'Paged 4' in response.data
+    assert b'Load more' in response.data
+
+    response = client.get(f'/dashboard?cursor={created_at.isoformat()}_6')
+    assert b'Paged 3' in response.data
+    assert b'Paged 2' in response.data
+    assert b'Paged 4' not in response.data
+
+    # Filtering by type
+    response = client.get('/dashboard?type=photo_quote')
+    assert b'Test Content' in response.data
+    assert b'Paged' not in response.data
+    assert b'Load more' not in response.data
+
+
+def test_dashboard_page_size_setting(monkeypatch):
+    assert create_app().config['DASHBOARD_PAGE_SIZE'] == 24
+    monkeypatch.setenv('DASHBOARD_PAGE_SIZE', '12')
+    assert create_app().config['DASHBOARD_PAGE_SIZE'] == 12
+
+
+def test_stale_jobs_are_failed(app, client, init_database):
+    with app.app_context():
+        db.session.add(Job(job_type='create', content_id=1, user_id=1, status=Job.RUNNING,
+                           started_at=datetime.utcnow() - timedelta(hours=2)))
+        db.session.add(Job(job_type='create', content_id=1, user_id=1, status=Job.QUEUED))
+        db.session.commit()
+
+    client.post('/login', data={
+        'username': 'testuser',
+        'password': 'testpass'
+    })
+
+    # Lost with a restarted worker: failed instead of polled forever
+    job = client.get('/api/jobs/1').get_json()['job']
+    assert job['status'] == 'failed'
+    assert 'interrupted' in job['error']
+
+    # A recent job may still be running in another worker
+    assert client.get('/api/jobs/2').get_json()['job']['status'] == 'queued'
+
+
+def test_stats_api_is_admin_only(client, init_database):
+    client.post('/login', data={
+        'username': 'testuser',
+        'password': 'testpass'
+    })
+    assert client.get('/api/models').status_code == 403
+    assert client.get('/api/render-cache').status_code == 403
+
+    User.query.get(1).role = 'admin'
+    db.session.commit()
+    assert 'registry' in client.get('/api/models').get_json()
+    assert 'render_cache' in client.get('/api/render-cache').get_json()
+
+
+def test_cancel_job_api(client, init_database):
+    db.session.add(Job(job_type='create', content_id=1, user_id=1, status=Job.QUEUED))
+    db.session.commit()
+    client.post('/login', data={
+        'username': 'testuser',
+        'password': 'testpass'
+    })
+
+    job = client.post('/api/jobs/1/cancel').get_json()['job']
+    assert job['status'] == 'failed'
+    assert job['error'] == CANCELLED_ERROR
+    assert client.post('/api/jobs/1/cancel').status_code == 409
+
+
+def test_cancel_stops_the_running_job(init_database):
+    def task(content, progress):
+        progress(0.1)
+        job_queue.cancel(Job.query.filter_by(content_id=content.id).one())
+        # The job's cancel event stops the ffmpeg it starts
+        get_executor().run([sys.executable, '-c', 'import time; time.sleep(10)'])
+
+    start = time.monotonic()
+    job = job_queue.enqueue('create', Content.query.get(1), task)
+    assert time.monotonic() - start < 5
+    assert job.status == 'failed'
+    assert job.error == CANCELLED_ERROR
+
+
+def test_cancel_from_another_worker_is_noticed(init_database):
+    job = Job(job_type='create', content_id=1, user_id=1, status=Job.RUNNING)
+    db.session.add(job)
+    db.session.commit()
+    progress = ProgressReporter(job, cancel_event=threading.Event(), check_interval=0)
+    progress(0.5)
+
+    # The cancel request reached another worker, which failed the job in the database
+    db.session.execute(db.update(Job).where(Job.id == job.id).values(status=Job.FAILED))
+    db.session.commit()
+    with pytest.raises(JobCancelled):
+        progress(0.6)
+    assert progress.cancel_event.is_set()
+
+
 if __name__ == '__main__':
     pytest.main(['-v'])
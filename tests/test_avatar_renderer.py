@@ -0,0 +1,61 @@
+import numpy as np
+import cv2
+import pytest
+from ai_content_platform.utils.avatar_renderer import AVATAR_STYLES, AvatarRenderer, AvatarTemplate, wrap_caption
+
+WIDTH, HEIGHT = 640, 480
+
+
+def full_draw(style, mouth_open, blink, caption):
+    """A frame drawn from scratch, the way generate_avatar_video drew every frame before the atlas"""
+    colors = AVATAR_STYLES[style]
+    features = colors['features']
+    frame = np.ones((HEIGHT, WIDTH, 3), dtype=np.uint8) * np.array(colors['background'], dtype=np.uint8)
+    cv2.circle(frame, (WIDTH // 2, HEIGHT // 3), 100, colors['head'], -1)
+
+    eye_y, left_eye_x, right_eye_x = HEIGHT // 3 - 20, WIDTH // 2 - 30, WIDTH // 2 + 30
+    if blink:
+        cv2.line(frame, (left_eye_x - 10, eye_y), (left_eye_x + 10, eye_y), features, 2)
+        cv2.line(frame, (right_eye_x - 10, eye_y), (right_eye_x + 10, eye_y), features, 2)
+    else:
+        cv2.circle(frame, (left_eye_x, eye_y), 5, features, -1)
+        cv2.circle(frame, (right_eye_x, eye_y), 5, features, -1)
+
+    cv2.ellipse(frame, (WIDTH // 2, HEIGHT // 3 + 30), (30, mouth_open), 0, 0, 180, features, -1)
+
+    for idx, line in enumerate(wrap_caption(caption)):
+        cv2.putText(frame, line, (50, HEIGHT - 100 + idx * 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
+    return frame
+
+
+@pytest.mark.parametrize('style', ['default', 'warm', 'dark'])
+def test_atlas_blit_matches_full_draw(style):
+    text = 'The quick brown fox jumps over the lazy dog and keeps running far away'
+    states = [
+        (0, False, ''),
+        (20, False, 'The'),
+        (10, True, 'The quick'),  # blink and mouth change together
+        (10, True, 'The quick'),  # nothing changes
+        (5, False, text),  # caption wraps onto a second line
+        (15, True, text[:20]),  # the second line is cleared again
+        (0, False, text),
+    ]
+    renderer = AvatarRenderer(WIDTH, HEIGHT, style)
+    for mouth_open, blink, caption in states:
+        frame = renderer.render(mouth_open, blink, caption)
+        assert np.array_equal(frame, full_draw(style, mouth_open, blink, caption)), (mouth_open, blink, caption)
+
+
+def test_styles_render_in_their_own_colours():
+    frames = {style: AvatarRenderer(WIDTH, HEIGHT, style).render(10, False, 'Hi').copy()
+              for style in ('default', 'warm', 'dark')}
+    for style, frame in frames.items():
+        assert tuple(frame[5, 5]) == AVATAR_STYLES[style]['background']
+        assert tuple(frame[HEIGHT // 3 + 60, WIDTH // 2]) == AVATAR_STYLES[style]['head']
+        # The eyes and the open mouth are drawn in the feature colour
+        assert tuple(frame[HEIGHT // 3 - 20, WIDTH // 2 - 30]) == AVATAR_STYLES[style]['features']
+        assert tuple(frame[HEIGHT // 3 + 35, WIDTH // 2]) == AVATAR_STYLES[style]['features']
+    assert not np.array_equal(frames['warm'], frames['dark'])
+
+    # Unknown types fall back to the default style
+    assert np.array_equal(AvatarTemplate(WIDTH, HEIGHT, 'unknown').base, AvatarTemplate(WIDTH, HEIGHT).base)
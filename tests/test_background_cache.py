@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+from PIL import Image
+from ai_content_platform.utils.background_cache import BackgroundCache, background_key, background_prompt
+from ai_content_platform.utils.disk_cache import DiskLRUCache
+
+SIZES = [(32, 32), (64, 36)]
+
+
+def noise(seed):
+    pixels = np.random.default_rng(seed).integers(0, 256, (64, 64, 3), dtype=np.uint8)
+    return Image.fromarray(pixels)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return BackgroundCache(DiskLRUCache(tmp_path / 'backgrounds', max_bytes=0))
+
+
+def test_hits_are_keyed_by_prompt(cache):
+    prompt = background_prompt('video_reel', 'Sunrise over the mountains')
+    assert prompt == background_prompt('voice_video', 'Sunrise over the mountains')
+    image = noise(1)
+    cache.put_master(background_key(prompt), image, SIZES)
+
+    assert np.array_equal(np.asarray(cache.get_master(background_key(prompt))), np.asarray(image))
+    assert cache.get_master(background_key(background_prompt('photo_quote', 'Sunrise over the mountains'))) is None
+    assert cache.get_master(background_key(prompt, seed=2)) is None
+    assert cache.disk_cache.stats()['hits'] == 1
+
+
+def test_variants_are_pre_scaled(cache):
+    key = background_key('a prompt')
+    cache.put_master(key, noise(1), SIZES)
+
+    for size in SIZES:
+        assert cache.get_variant(key, size).size == size
+    assert cache.get_variant(key, (1080, 1080)) is None
+
+    # Other sizes are scaled once on request and then cached
+    assert cache.put_variant(key, cache.get_master(key), (16, 16)).size == (16, 16)
+    assert cache.get_variant(key, (16, 16)).size == (16, 16)
+
+
+def test_evicts_least_recently_used_prompts(tmp_path):
+    # Measure what one noisy background with its variants takes on disk
+    sizing = BackgroundCache(DiskLRUCache(tmp_path / 'sizing', max_bytes=0))
+    for seed in (1, 2):
+        sizing.put_master(background_key(f'prompt {seed}'), noise(seed), SIZES)
+    budget = sizing.disk_cache.size()
+
+    cache = BackgroundCache(DiskLRUCache(tmp_path / 'backgrounds', max_bytes=budget))
+    first, second, third = (background_key(f'prompt {seed}') for seed in (1, 2, 3))
+    cache.put_master(first, noise(1), SIZES)
+    cache.put_master(second, noise(2), SIZES)
+    assert cache.disk_cache.stats()['evictions'] == 0
+
+    # Using the first prompt again makes the second the least recently used
+    assert cache.get_master(first) is not None
+    assert all(cache.get_variant(first, size) is not None for size in SIZES)
+    cache.put_master(third, Image.new('RGB', (64, 64), (10, 20, 30)), SIZES)
+
+    assert cache.disk_cache.stats()['evictions'] > 0
+    assert cache.disk_cache.size() <= budget
+    assert cache.get_master(second) is None
+    assert cache.get_master(first) is not None
+    assert cache.get_master(third) is not None
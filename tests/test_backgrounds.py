@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+from ai_content_platform.utils.backgrounds import render_background, linear_gradient
+
+
+@pytest.mark.parametrize('style', ['linear', 'radial', 'noise'])
+def test_render_background_shape_and_seed(style):
+    first = render_background(1920, 1080, style=style, seed=7)
+    second = render_background(1920, 1080, style=style, seed=7)
+
+    assert first.shape == (1080, 1920, 3)
+    assert first.dtype == np.uint8
+    assert np.array_equal(first, second)
+
+
+def test_linear_gradient_hits_both_end_colors():
+    image = linear_gradient(4, 11, [(0, 0, 0), (255, 128, 0)], dtype=np.uint8)
+
+    assert tuple(image[0, 0]) == (0, 0, 0)
+    assert tuple(image[-1, -1]) == (255, 128, 0)
+    # Vertical gradient: every row is a single colour
+    assert (image == image[:, :1]).all()
+
+
+def test_multi_stop_gradient_passes_through_middle_stop():
+    stops = [(0.0, (255, 0, 0)), (0.5, (0, 255, 0)), (1.0, (0, 0, 255))]
+    image = render_background(3, 101, colors=stops, seed=1)
+
+    assert tuple(image[50, 1]) == (0, 255, 0)
+
+
+def test_grain_keeps_values_in_range():
+    image = render_background(64, 64, noise=1.0, seed=3)
+
+    assert image.dtype == np.uint8
+    assert image.std() > 0
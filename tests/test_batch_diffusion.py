@@ -0,0 +1,84 @@
+import pytest
+from PIL import Image
+from ai_content_platform.utils import image_utils
+from ai_content_platform.utils.model_registry import registry, _load_stable_diffusion
+
+
+class TinyPipeline:
+    """Stand-in for a diffusers pipeline: one solid image per prompt"""
+
+    nbytes = 1024
+    device = 'cpu'
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, prompts, **settings):
+        self.calls.append(list(prompts))
+        images = [Image.new('RGB', (64, 64), (len(prompt) % 256, 0, 0)) for prompt in prompts]
+        return type('Output', (), {'images': images})
+
+
+@pytest.fixture
+def app_config():
+    return {'DIFFUSION_BATCH_SIZE': 4}
+
+
+@pytest.fixture
+def pipeline():
+    pipeline = TinyPipeline()
+    registry.register('stable-diffusion', lambda: pipeline)
+    yield pipeline
+    registry.evict('stable-diffusion')
+    registry.register('stable-diffusion', _load_stable_diffusion)
+
+
+def test_prompts_are_batched(app, pipeline):
+    prompts = [f"prompt {i}" for i in range(10)]
+    images = image_utils.diffuse_backgrounds(prompts)
+
+    assert len(images) == 10
+    assert [len(call) for call in pipeline.calls] == [4, 4, 2]
+
+
+def test_cache_misses_are_diffused_together(app, monkeypatch):
+    calls = []
+
+    def fake_diffuse(prompts, seeds=None, batch_size=None):
+        calls.append(list(prompts))
+        return [Image.new('RGB', (64, 64), 'teal') for _ in prompts]
+
+    monkeypatch.setattr(image_utils, 'diffuse_backgrounds', fake_diffuse)
+
+    # Duplicate prompts are diffused once
+    images = image_utils.get_background_images(['a', 'b', 'a'], (1080, 1080))
+    assert calls == [['a', 'b']]
+    assert [image.size for image in images] == [(1080, 1080)] * 3
+
+    # Everything is cached now, including the other standard sizes
+    image_utils.get_background_images(['a', 'b'], (1920, 1080))
+    assert len(calls) == 1
+
+
+def test_renders_on_fallback_backgrounds_are_not_cached(app, tmp_path, monkeypatch):
+    app.config['RENDER_CACHE_DIR'] = str(tmp_path / 'renders')
+
+    def unavailable(prompts, seeds=None, batch_size=None):
+        raise RuntimeError('no GPU')
+
+    monkeypatch.setattr(image_utils, 'diffuse_backgrounds', unavailable)
+    image_utils.generate_photo_quote('Fallback', 1, width=64, height=64)
+    assert not (tmp_path / 'renders').exists() or not any((tmp_path / 'renders').rglob('*.jpg'))
+
+    # Once diffusion works, the quote is rendered on the diffused background and cached
+    calls = []
+
+    def fake_diffuse(prompts, seeds=None, batch_size=None):
+        calls.append(list(prompts))
+        return [Image.new('RGB', (64, 64), 'teal') for _ in prompts]
+
+    monkeypatch.setattr(image_utils, 'diffuse_backgrounds', fake_diffuse)
+    path = image_utils.generate_photo_quote('Fallback', 2, width=64, height=64)
+    assert len(calls) == 1
+    assert Image.open(path).getpixel((0, 0)) == pytest.approx((0, 128, 128), abs=8)
+    assert any((tmp_path / 'renders').rglob('*.jpg'))
@@ -0,0 +1,33 @@
+from ai_content_platform.benchmarks.bench_generation import compare, measure, StubWhisper
+
+
+def test_compare_flags_slowdowns_over_threshold():
+    baseline = {'a[1]': {'wall_s': 1.0}, 'b[1]': {'wall_s': 1.0}, 'c[1]': {'wall_s': 0.001},
+                'd[1]': {'error': 'boom'}}
+    results = {'a[1]': {'wall_s': 1.1}, 'b[1]': {'wall_s': 1.5}, 'c[1]': {'wall_s': 0.005},
+               'd[1]': {'wall_s': 9.0}, 'e[1]': {'wall_s': 9.0}}
+
+    # c tripled but by less than min_delta; d and e have nothing to compare with
+    assert compare(results, baseline, threshold=0.2, min_delta=0.01) == [('b[1]', 1.0, 1.5)]
+
+
+def test_compare_counts_errors_as_regressions():
+    baseline = {'a[1]': {'wall_s': 1.0}, 'b[1]': {'error': 'boom'}}
+    results = {'a[1]': {'error': 'RuntimeError: boom'}, 'b[1]': {'error': 'boom'},
+               'c[1]': {'error': 'boom'}}
+
+    assert compare(results, baseline, threshold=0.2, min_delta=0.01) == [
+        ('a[1]', 1.0, None), ('b[1]', None, None), ('c[1]', None, None)]
+
+
+def test_measure_reports_time_and_memory():
+    result = measure(lambda: bytearray(8 * 2 ** 20))
+    assert result['wall_s'] >= 0 and result['cpu_s'] >= 0
+    assert result['peak_rss_mb'] > 0
+
+
+def test_stub_whisper_is_deterministic():
+    inputs = {'raw': [0.0] * 32000, 'sampling_rate': 16000}
+    first, second = StubWhisper()(inputs), StubWhisper()(inputs)
+    assert first == second
+    assert len(first['chunks']) == 5
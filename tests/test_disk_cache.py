@@ -0,0 +1,57 @@
+import pytest
+from ai_content_platform.utils.disk_cache import DiskLRUCache, make_key
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return DiskLRUCache(tmp_path / 'cache', max_bytes=250)
+
+
+def test_make_key_is_canonical():
+    assert make_key('reel', 'text', fps=30, style={'a': 1, 'b': 2}) == \
+        make_key('reel', 'text', style={'b': 2, 'a': 1}, fps=30)
+    assert make_key('reel', 'text', fps=30) != make_key('reel', 'text', fps=24)
+
+
+def test_hit_links_artifact(cache, tmp_path):
+    assert cache.get('a' * 64, '.mp4') is None
+
+    cache.put_bytes('a' * 64, b'video bytes', '.mp4')
+    target = tmp_path / 'video_2.mp4'
+    assert cache.fetch('a' * 64, str(target), '.mp4')
+    assert target.read_bytes() == b'video bytes'
+
+    stats = cache.stats()
+    assert stats['hits'] == 1
+    assert stats['misses'] == 1
+    assert stats['entries'] == 1
+
+
+def test_evicts_least_recently_used(cache):
+    for key in ('a', 'b', 'c'):
+        cache.put_bytes(key * 64, b'x' * 100)
+
+    # Budget is 250 bytes, so the oldest entry had to go
+    assert cache.get('a' * 64) is None
+    assert cache.get('b' * 64) is not None
+    assert cache.get('c' * 64) is not None
+    assert cache.stats()['evictions'] == 1
+    assert cache.size() == 200
+
+
+def test_hits_leave_linked_outputs_alone(cache, tmp_path):
+    cache.put_bytes('a' * 64, b'x' * 100)
+    cache.put_bytes('b' * 64, b'x' * 100)
+    target = tmp_path / 'video_1.mp4'
+    assert cache.fetch('a' * 64, str(target))
+    mtime = target.stat().st_mtime_ns
+
+    # A later hit refreshes the entry's recency without touching the file linked out
+    assert cache.fetch('a' * 64, str(tmp_path / 'video_2.mp4'))
+    assert target.stat().st_mtime_ns == mtime
+
+    # The order survives a restart: 'b' is now the least recently used entry
+    restarted = DiskLRUCache(tmp_path / 'cache', max_bytes=250)
+    restarted.put_bytes('c' * 64, b'x' * 100)
+    assert restarted.get('b' * 64) is None
+    assert restarted.get('a' * 64) is not None
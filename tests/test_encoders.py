@@ -0,0 +1,47 @@
+import subprocess
+import numpy as np
+import pytest
+from ai_content_platform import create_app
+from ai_content_platform.utils.video_utils import encode_frames, resolve_encoder
+
+
+class Sweep:
+    """A bar moving across the frame, so no two frames are alike"""
+
+    def frame(self, n):
+        frame = np.zeros((48, 64, 3), dtype=np.uint8)
+        frame[:, n % 56:n % 56 + 8] = 255
+        return frame
+
+
+def decoded_frames(path):
+    """Number of frames and duration in seconds, as ffmpeg decodes them"""
+    output = subprocess.run(['ffmpeg', '-i', path, '-map', '0:v', '-f', 'null', '-'],
+                            capture_output=True, text=True, check=True).stderr
+    progress = [line for line in output.replace('\r', '\n').splitlines() if line.startswith('frame=')][-1]
+    frames = int(progress.split('frame=')[1].split()[0])
+    clock = progress.split('time=')[1].split()[0]
+    hours, minutes, seconds = clock.split(':')
+    return frames, int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+
+def test_video_encoder_setting(monkeypatch):
+    monkeypatch.setenv('VIDEO_ENCODER', 'frames')
+    with create_app().app_context():
+        assert resolve_encoder(None) == 'frames'
+        assert resolve_encoder('pipe') == 'pipe'
+        with pytest.raises(ValueError):
+            resolve_encoder('gif')
+
+
+def test_pipe_and_frames_writers_agree(app, tmp_path):
+    results = {}
+    for encoder in ('pipe', 'frames'):
+        output_path = str(tmp_path / f'{encoder}.mp4')
+        encode_frames(Sweep(), 45, output_path, 64, 48, 30, encoder=encoder,
+                      frames_dir=str(tmp_path / 'frames'), segments=1, holds=False)
+        results[encoder] = decoded_frames(output_path)
+
+    assert results['pipe'][0] == results['frames'][0] == 45
+    assert results['pipe'][1] == pytest.approx(1.5, abs=0.05)
+    assert results['frames'][1] == pytest.approx(results['pipe'][1], abs=0.01)
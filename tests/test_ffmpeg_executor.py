@@ -0,0 +1,141 @@
+import os
+import sys
+import threading
+import time
+import numpy as np
+import pytest
+from ai_content_platform.utils.ffmpeg_utils import (FFmpegExecutor, FFmpegError, FFmpegTimeout, FFmpegCancelled,
+                                                   FFmpegPipeWriter, PRIORITY_HIGH, decode_audio, get_executor)
+from ai_content_platform.utils.video_utils import encode_frames
+
+
+def sleeper(seconds):
+    """Stand-in for a long ffmpeg run; the executor accepts any command"""
+    return [sys.executable, '-c', f"import time; time.sleep({seconds})"]
+
+
+class Frames:
+    def frame(self, n):
+        return np.full((48, 64, 3), 8 * n, dtype=np.uint8)
+
+
+def test_limit_is_shared_through_the_lock_dir(tmp_path):
+    # Two executors stand in for two worker processes on one host
+    executors = [FFmpegExecutor(max_processes=2, lock_dir=str(tmp_path)) for _ in range(2)]
+    peak = []
+    threads = [threading.Thread(target=executors[k % 2].run, args=(sleeper(0.3),)) for k in range(5)]
+    for thread in threads:
+        thread.start()
+    while any(thread.is_alive() for thread in threads):
+        peak.append(sum(executor.running() for executor in executors))
+        time.sleep(0.01)
+    assert max(peak) == 2
+
+
+def test_higher_priority_runs_first(tmp_path):
+    executor = FFmpegExecutor(max_processes=1, lock_dir=str(tmp_path))
+    blocker = executor.popen(sleeper(0.3))
+    order = []
+
+    def run(name, priority):
+        executor.run(sleeper(0), priority=priority)
+        order.append(name)
+
+    threads = [threading.Thread(target=run, args=('batch', 10))]
+    threads[0].start()
+    time.sleep(0.05)
+    threads.append(threading.Thread(target=run, args=('thumbnail', PRIORITY_HIGH)))
+    threads[1].start()
+    time.sleep(0.05)
+    blocker.wait()
+    for thread in threads:
+        thread.join()
+    assert order == ['thumbnail', 'batch']
+
+
+def test_timeout_and_cancel_stop_the_process(tmp_path):
+    executor = FFmpegExecutor(max_processes=1, lock_dir=str(tmp_path))
+    start = time.monotonic()
+    with pytest.raises(FFmpegTimeout):
+        executor.run(sleeper(10), timeout=0.3)
+    assert time.monotonic() - start < 5
+
+    cancel = threading.Event()
+    threading.Timer(0.2, cancel.set).start()
+    with pytest.raises(FFmpegCancelled):
+        executor.run(sleeper(10), cancel_event=cancel)
+
+    # The slot was released both times
+    assert executor.running() == 0
+    executor.run(sleeper(0), queue_timeout=1)
+
+
+def test_queue_timeout(tmp_path):
+    executor = FFmpegExecutor(max_processes=1, lock_dir=str(tmp_path))
+    blocker = executor.popen(sleeper(1))
+    try:
+        with pytest.raises(FFmpegTimeout):
+            executor.run(sleeper(0), queue_timeout=0.2)
+    finally:
+        blocker.kill()
+
+
+def test_errors_carry_ffmpeg_output(app, tmp_path):
+    with pytest.raises(FFmpegError, match='missing.wav'):
+        decode_audio(str(tmp_path / 'missing.wav'))
+
+
+def test_frames_encoder_raises_on_failure(app, tmp_path):
+    output_path = str(tmp_path / 'frames.mp4')
+    frames_dir = str(tmp_path / 'frames')
+    encode_frames(Frames(), 10, output_path, 64, 48, 10, encoder='frames', frames_dir=frames_dir, segments=1)
+    assert os.path.getsize(output_path) > 0
+    assert not os.path.exists(frames_dir)
+
+    # ffmpeg cannot write into a missing directory; os.system used to ignore that
+    with pytest.raises(FFmpegError):
+        encode_frames(Frames(), 10, str(tmp_path / 'bad' / 'frames.mp4'), 64, 48, 10,
+                      encoder='frames', frames_dir=frames_dir, segments=1)
+
+
+def test_pipe_writer_drops_output_when_ffmpeg_stops(app, tmp_path):
+    app.config['FFMPEG_TIMEOUT'] = 1
+    output_path = str(tmp_path / 'stopped.mp4')
+    frame = Frames().frame(1)
+    started = False
+    with pytest.raises(FFmpegTimeout):
+        with FFmpegPipeWriter(output_path, 64, 48, 10) as writer:
+            for _ in range(500):
+                writer.write(frame)
+                started = started or os.path.exists(output_path)
+                time.sleep(0.01)
+
+    # The broken pipe surfaced the timeout and the half-written file is gone
+    assert started
+    assert not os.path.exists(output_path)
+
+
+def test_pipe_writer_drops_output_when_closing_fails(app, tmp_path):
+    output_path = str(tmp_path / 'unfinished.mp4')
+    frame = Frames().frame(1)
+    writer = FFmpegPipeWriter(output_path, 64, 48, 10).open()
+    for _ in range(500):
+        writer.write(frame)
+        if os.path.exists(output_path):
+            break
+        time.sleep(0.01)
+    assert os.path.exists(output_path)
+
+    # ffmpeg dies before it finalizes the file
+    writer._process.process.kill()
+    with pytest.raises(FFmpegError):
+        writer.close()
+    assert not os.path.exists(output_path)
+
+
+def test_run_reports_progress(app):
+    fractions = []
+    get_executor().run(['ffmpeg', '-loglevel', 'error', '-f', 'lavfi', '-i', 'testsrc=duration=2:size=64x48:rate=10',
+                        '-f', 'null', '-'], progress=fractions.append, duration=2)
+    assert fractions
+    assert fractions[-1] == pytest.approx(1.0, abs=0.1)
@@ -0,0 +1,105 @@
+import os
+import subprocess
+import numpy as np
+import pytest
+from ai_content_platform.utils.ffmpeg_utils import hold_filter
+from ai_content_platform.utils.video_utils import ReelFrames, encode_frames, encoder_settings, hold_frames
+
+
+class Slides:
+    """Solid-colour frames that change colour at ``changes``"""
+
+    def __init__(self, changes, width=64, height=48):
+        self.changes = changes
+        self.width, self.height = width, height
+        self.rendered = []
+
+    def frame_key(self, n):
+        return sum(n >= change for change in self.changes)
+
+    def frame(self, n):
+        self.rendered.append(n)
+        return np.full((self.height, self.width, 3), 60 * self.frame_key(n), dtype=np.uint8)
+
+
+@pytest.fixture
+def app_config():
+    return {'VIDEO_ENCODER_SETTINGS': {'default': {'preset': 'ultrafast'}, 'avatar_video': {'crf': 30}}}
+
+
+def test_hold_frames_keeps_changes_and_the_last_frame():
+    assert hold_frames(Slides([10, 25]), 0, 30) == [0, 10, 25, 29]
+    assert hold_frames(Slides([10, 25]), 12, 20) == [12, 19]
+    assert hold_frames(object(), 0, 3) == [0, 1, 2]
+
+
+def test_reel_words_are_held():
+    placements = ReelFrames.plan(['one', 'two'], 90, 640, 360)
+    source = ReelFrames(np.zeros((360, 640, 3), dtype=np.uint8), ['one', 'two'], placements)
+
+    # Each word fades in and out over a few frames and holds in between; the padding is one hold
+    frames = hold_frames(source, 0, 90)
+    assert len(frames) < 30
+    assert frames[-1] == 89
+
+
+def test_hold_filter_offsets_skipped_frames():
+    assert hold_filter([0, 10, 11, 29], 30) == "setpts='(N+if(lt(N,1),0,if(lt(N,3),9,26)))/(30*TB)'"
+
+
+def test_encoder_settings_layering(app):
+    assert encoder_settings('video_reel')['tune'] == 'stillimage'
+    assert encoder_settings('video_reel')['preset'] == 'ultrafast'
+    assert encoder_settings('avatar_video')['crf'] == 30
+    assert encoder_settings('avatar_video')['tune'] == 'animation'
+
+
+def test_held_video_matches_constant_rate_timeline(app, tmp_path):
+    source = Slides([10, 25])
+    output_path = str(tmp_path / 'held.mp4')
+    encode_frames(source, 30, output_path, 64, 48, 30, holds=True, segments=1)
+    assert source.rendered == [0, 10, 25, 29]
+
+    # Resampled at 30 fps the video shows every colour for exactly its run
+    raw = subprocess.run(['ffmpeg', '-loglevel', 'error', '-i', output_path, '-vf', 'fps=30',
+                          '-f', 'rawvideo', '-pix_fmt', 'gray', '-'], capture_output=True, check=True).stdout
+    levels = np.frombuffer(raw, dtype=np.uint8).reshape(-1, 48 * 64).mean(axis=1)
+    assert len(levels) == 30
+    assert np.flatnonzero(np.diff(levels) > 20).tolist() == [9, 24]
+
+
+def test_held_segments_concat_on_time(app, tmp_path):
+    output_path = str(tmp_path / 'segmented.mp4')
+    encode_frames(Slides([10, 45]), 60, output_path, 64, 48, 30, holds=True, segments=2)
+
+    raw = subprocess.run(['ffmpeg', '-loglevel', 'error', '-i', output_path, '-vf', 'fps=30',
+                          '-f', 'rawvideo', '-pix_fmt', 'gray', '-'], capture_output=True, check=True).stdout
+    levels = np.frombuffer(raw, dtype=np.uint8).reshape(-1, 48 * 64).mean(axis=1)
+    assert len(levels) == 60
+    assert np.flatnonzero(np.diff(levels) > 20).tolist() == [9, 44]
+
+
+class Flicker(Slides):
+    """A colour change every other frame: half of all frames start a hold"""
+
+    def frame_key(self, n):
+        return n // 2
+
+    def frame(self, n):
+        self.rendered.append(n)
+        return np.full((self.height, self.width, 3), 200 * (self.frame_key(n) % 2), dtype=np.uint8)
+
+
+def test_thousands_of_holds(app, tmp_path):
+    # Twenty minutes at 30 fps: the timeline used to go on the command line and overflow it
+    source = Flicker([], width=16, height=16)
+    output_path = str(tmp_path / 'long.mp4')
+    encode_frames(source, 36000, output_path, 16, 16, 30, holds=True, segments=1)
+    assert len(source.rendered) == 18001
+    assert not [name for name in os.listdir(tmp_path) if name.endswith('.filter')]
+
+    raw = subprocess.run(['ffmpeg', '-loglevel', 'error', '-i', output_path, '-vf', 'fps=30',
+                          '-f', 'rawvideo', '-pix_fmt', 'gray', '-'], capture_output=True, check=True).stdout
+    levels = np.frombuffer(raw, dtype=np.uint8).reshape(-1, 16 * 16).mean(axis=1)
+    assert len(levels) == 36000
+    assert (np.abs(np.diff(levels)) > 50).sum() == 17999
@@ -0,0 +1,39 @@
+import numpy as np
+from ai_content_platform.utils.avatar_renderer import MAX_MOUTH_OPEN
+from ai_content_platform.utils.lipsync import frame_envelope, mouth_levels
+
+SAMPLE_RATE = 8000
+
+
+def speech_like(seconds_on, seconds_off, repeats):
+    """Alternating bursts of tone and silence"""
+    t = np.arange(int(seconds_on * SAMPLE_RATE)) / SAMPLE_RATE
+    burst = (0.5 * np.sin(2 * np.pi * 180 * t)).astype(np.float32)
+    gap = np.zeros(int(seconds_off * SAMPLE_RATE), dtype=np.float32)
+    return np.concatenate([np.concatenate([burst, gap]) for _ in range(repeats)])
+
+
+def test_envelope_has_one_value_per_video_frame():
+    samples = speech_like(0.5, 0.5, 10)  # 10 seconds
+    envelope = frame_envelope(samples, SAMPLE_RATE, fps=30)
+    assert len(envelope) == 300
+
+    # 8000 / 30 is not a whole hop; bursts still line up with frames 0-14, 30-44, ...
+    assert envelope[5] > 0.3 and envelope[20] == 0
+    assert envelope[284] > 0.3 and envelope[285] == 0 and envelope[299] == 0
+
+
+def test_frames_past_the_audio_are_silent():
+    envelope = frame_envelope(speech_like(1, 0, 1), SAMPLE_RATE, fps=30, total_frames=45)
+    assert len(envelope) == 45
+    assert np.all(envelope[31:] == 0)
+
+
+def test_mouth_follows_speech():
+    envelope = frame_envelope(speech_like(0.5, 0.5, 4), SAMPLE_RATE, fps=30)
+    levels = mouth_levels(envelope)
+
+    assert levels.dtype == np.uint8
+    assert levels.max() == MAX_MOUTH_OPEN
+    assert levels[7] == MAX_MOUTH_OPEN
+    assert levels[22] == 0
@@ -0,0 +1,89 @@
+import os
+import pytest
+from ai_content_platform import db
+from ai_content_platform.models.user import User
+from ai_content_platform.models.content import Content
+from ai_content_platform.utils.media import file_etag
+
+
+@pytest.fixture
+def app_config(tmp_path):
+    return {'MEDIA_ACCEL_ROOT': str(tmp_path)}
+
+
+@pytest.fixture
+def content(database, tmp_path):
+    media_file = tmp_path / 'video_1.mp4'
+    media_file.write_bytes(bytes(range(256)) * 4)
+    for name in ('owner', 'other'):
+        user = User(username=name, email=f'{name}@example.com')
+        user.set_password('testpass')
+        db.session.add(user)
+    db.session.commit()
+    content = Content(title='Video', content_type='video_reel', output_path=str(media_file), user_id=1)
+    db.session.add(content)
+    db.session.commit()
+    return content
+
+
+@pytest.fixture
+def client(app, content):
+    client = app.test_client()
+    client.post('/login', data={'username': 'owner', 'password': 'testpass'})
+    return client
+
+
+def test_range_request(client):
+    response = client.get('/content/1/media/output', headers={'Range': 'bytes=10-19'})
+    assert response.status_code == 206
+    assert response.data == bytes(range(10, 20))
+    assert response.headers['Content-Range'] == 'bytes 10-19/1024'
+
+
+def test_etag_revalidation(client):
+    response = client.get('/content/1/media/output')
+    etag = response.headers['ETag']
+    assert not etag.startswith('W/')
+    assert 'no-cache' in response.headers['Cache-Control']
+
+    response = client.get('/content/1/media/output', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+
+    # A versioned URL is immutable
+    version = etag.strip('"')
+    response = client.get(f'/content/1/media/output?v={version}')
+    assert 'immutable' in response.headers['Cache-Control']
+
+
+def test_etag_follows_file_versions(tmp_path, monkeypatch):
+    path = tmp_path / 'video_2.mp4'
+    path.write_bytes(b'first render')
+    etag = file_etag(str(path))
+    assert file_etag(str(path)) == etag
+
+    # Built from the stat alone: the file is not read
+    monkeypatch.setattr('builtins.open', None)
+    assert file_etag(str(path)) == etag
+    monkeypatch.undo()
+
+    # A re-render replaces the file, so the ETag changes even for the same bytes
+    replacement = tmp_path / 'video_2.tmp'
+    replacement.write_bytes(b'first render')
+    os.utime(replacement, ns=(0, os.stat(path).st_mtime_ns + 1))
+    os.replace(replacement, path)
+    assert file_etag(str(path)) != etag
+
+
+def test_x_accel_redirect(app, client):
+    app.config['MEDIA_SENDFILE'] = 'x-accel'
+    response = client.get('/content/1/media/output')
+    assert response.headers['X-Accel-Redirect'] == '/protected-media/video_1.mp4'
+    assert response.data == b''
+
+
+def test_media_ownership(app, content):
+    client = app.test_client()
+    client.post('/login', data={'username': 'other', 'password': 'testpass'})
+    assert client.get('/content/1/media/output').status_code == 403
+    assert client.get('/content/1/media/thumbnail').status_code == 403
+    assert client.get('/content/1/media/secrets').status_code == 404
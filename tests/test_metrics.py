@@ -0,0 +1,59 @@
+import pytest
+from ai_content_platform.utils.metrics import (
+    MetricsRegistry, STAGE_SECONDS, CACHE_LOOKUPS, MODEL_LOAD_SECONDS, content_type_label, timed)
+from ai_content_platform.utils.tts import synthesize_script
+
+
+def test_histogram_exposition():
+    metrics = MetricsRegistry()
+    latency = metrics.histogram('latency_seconds', 'Latency.', ('stage',), buckets=(0.1, 1))
+    latency.observe(0.05, stage='encode')
+    latency.observe(0.5, stage='encode')
+    latency.observe(5, stage='encode')
+    metrics.counter('fallbacks_total', 'Fallbacks.', ('path',)).inc(path='beep "audio"')
+
+    text = metrics.render()
+    assert '# TYPE latency_seconds histogram' in text
+    assert 'latency_seconds_bucket{stage="encode",le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{stage="encode",le="1"} 2' in text
+    assert 'latency_seconds_bucket{stage="encode",le="+Inf"} 3' in text
+    assert 'latency_seconds_count{stage="encode"} 3' in text
+    assert 'fallbacks_total{path="beep \\"audio\\""} 1' in text
+
+
+def test_timed_uses_content_type_label():
+    before = STAGE_SECONDS.count(stage='test_stage', content_type='photo_quote')
+    with content_type_label('photo_quote'):
+        with pytest.raises(RuntimeError):
+            with timed('test_stage'):
+                raise RuntimeError('boom')
+    assert STAGE_SECONDS.count(stage='test_stage', content_type='photo_quote') == before + 1
+
+
+def test_tts_records_cache_lookups_and_model_load(app, tts, tmp_path):
+    misses = CACHE_LOOKUPS.value(cache='tts', result='miss')
+    hits = CACHE_LOOKUPS.value(cache='tts', result='hit')
+    loads = MODEL_LOAD_SECONDS.count(model='tts')
+
+    synthesize_script("One. Two.", str(tmp_path / 'a.wav'))
+    synthesize_script("One. Two.", str(tmp_path / 'b.wav'))
+
+    assert CACHE_LOOKUPS.value(cache='tts', result='miss') == misses + 2
+    assert CACHE_LOOKUPS.value(cache='tts', result='hit') == hits + 2
+    assert MODEL_LOAD_SECONDS.count(model='tts') == loads + 1
+
+
+def test_metrics_endpoint_token(app):
+    client = app.test_client()
+    assert client.get('/metrics').status_code == 404
+
+    app.config['METRICS_ENABLED'] = True
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+    assert b'# TYPE content_stage_seconds histogram' in response.data
+
+    app.config['METRICS_TOKEN'] = 'secret'
+    assert client.get('/metrics').status_code == 401
+    response = client.get('/metrics', headers={'Authorization': 'Bearer secret'})
+    assert response.status_code == 200
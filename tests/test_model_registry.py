@@ -0,0 +1,69 @@
+import pytest
+from ai_content_platform.utils.model_registry import ModelRegistry
+
+
+class TinyModel:
+    """Stand-in for a real model: reports a fixed size and echoes its input"""
+
+    def __init__(self, name, nbytes=1024):
+        self.name = name
+        self.nbytes = nbytes
+
+    def __call__(self, text):
+        return f"{self.name}:{text}"
+
+
+@pytest.fixture
+def registry():
+    registry = ModelRegistry()
+    registry.register('tiny', lambda: TinyModel('tiny'))
+    return registry
+
+
+def test_loads_once_and_counts_hits(registry):
+    first = registry.get('tiny')
+    second = registry.get('tiny')
+
+    assert first is second
+    assert first('hi') == 'tiny:hi'
+
+    stats = registry.stats()['models']['tiny']
+    assert stats['loads'] == 1
+    assert stats['hits'] == 1
+    assert stats['loaded'] is True
+
+
+def test_unknown_model_raises(registry):
+    with pytest.raises(KeyError):
+        registry.get('missing')
+
+
+def test_warmup_loads_before_first_use(registry):
+    registry.register('broken', lambda: 1 / 0)
+
+    failed = registry.warmup(['tiny', 'broken'])
+
+    assert failed == ['broken']
+    assert registry.is_loaded('tiny')
+    assert registry.stats()['models']['tiny']['hits'] == 0
+
+
+def test_evicts_least_recently_used_over_budget():
+    registry = ModelRegistry(memory_budget=2500)
+    for name in ('a', 'b', 'c'):
+        registry.register(name, lambda name=name: TinyModel(name, nbytes=1000))
+
+    registry.get('a')
+    registry.get('b')
+    registry.get('a')  # b is now the least recently used
+    registry.get('c')
+
+    assert registry.is_loaded('a')
+    assert not registry.is_loaded('b')
+    assert registry.is_loaded('c')
+    assert registry.memory_usage() == 2000
+    assert registry.stats()['models']['b']['evictions'] == 1
+
+    # Reloading an evicted model counts as a second load
+    registry.get('b')
+    assert registry.stats()['models']['b']['loads'] == 2
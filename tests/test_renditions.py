@@ -0,0 +1,135 @@
+import os
+import cv2
+import numpy as np
+import pytest
+from ai_content_platform import create_app, db
+from ai_content_platform.models.user import User
+from ai_content_platform.models.content import Content
+from ai_content_platform.models.job import Job
+from ai_content_platform.utils.agent import ContentAgent
+from ai_content_platform.utils.metrics import CACHE_LOOKUPS
+from ai_content_platform.utils.renditions import create_renditions, rendition_path, rendition_size
+from ai_content_platform.utils.video_utils import encode_frames
+
+
+class Ramp:
+    """Frames with a horizontal ramp, so the crop position can be checked"""
+
+    def frame(self, n):
+        ramp = np.linspace(0, 255, 320, dtype=np.uint8)
+        return np.repeat(np.repeat(ramp[None, :, None], 180, axis=0), 3, axis=2)
+
+
+def video_info(path):
+    capture = cv2.VideoCapture(path)
+    info = (int(capture.get(cv2.CAP_PROP_FRAME_WIDTH)), int(capture.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+    ok, frame = capture.read()
+    capture.release()
+    return info, frame
+
+
+@pytest.fixture
+def master(app, tmp_path):
+    path = str(tmp_path / 'video_1.mp4')
+    encode_frames(Ramp(), 30, path, 320, 180, 30, segments=1)
+    return path
+
+
+def test_rendition_sizes():
+    assert rendition_size(1920, 1080, '9:16') == (606, 1080, 606, 1080)
+    assert rendition_size(1920, 1080, '16:9') == (1920, 1080, 1920, 1080)
+    assert rendition_size(1080, 1920, '16:9') == (1080, 606, 1080, 606)
+    assert rendition_size(3840, 2160, '1:1') == (2160, 2160, 1080, 1080)
+
+
+ALL = ['9:16', '1:1', '16:9']
+
+
+def test_renditions_are_opt_in(monkeypatch, master):
+    monkeypatch.delenv('VIDEO_RENDITIONS', raising=False)
+    assert create_app().config['VIDEO_RENDITIONS'] == []
+    assert create_renditions(master, 'video_reel') == {}
+
+
+def test_renditions_are_centre_crops(master):
+    renditions = create_renditions(master, 'video_reel', ALL)
+    assert renditions == {aspect: rendition_path(master, aspect) for aspect in ('9:16', '1:1', '16:9')}
+
+    # Never upscaled: the crop of a 320x180 master is the output size
+    sizes = {aspect: video_info(path)[0] for aspect, path in renditions.items()}
+    assert sizes == {'9:16': (100, 180), '1:1': (180, 180), '16:9': (320, 180)}
+
+    # The master is already 16:9, so that rendition is the same file
+    assert os.path.samefile(renditions['16:9'], master)
+
+    # The square keeps the middle of the ramp
+    _, frame = video_info(renditions['1:1'])
+    assert abs(int(frame[90, 0, 0]) - 255 * 70 / 319) < 12
+
+
+def test_renditions_come_from_the_render_cache(master):
+    create_renditions(master, 'video_reel', ALL)
+    hits = CACHE_LOOKUPS.value(cache='render', result='hit')
+    os.remove(rendition_path(master, '1:1'))
+
+    renditions = create_renditions(master, 'video_reel', ALL)
+    assert CACHE_LOOKUPS.value(cache='render', result='hit') == hits + 2
+    assert os.path.exists(renditions['1:1'])
+
+
+@pytest.fixture
+def creator(database):
+    user = User(username='creator', email='creator@example.com')
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+def add_content(content_type, output_path):
+    content_item = Content(title='Clip', content_type=content_type, output_path=output_path, user_id=1)
+    db.session.add(content_item)
+    db.session.commit()
+    return content_item
+
+
+def test_optimize_content_cuts_the_rendition_in_a_job(master, creator):
+    content_item = add_content('video_reel', master)
+
+    # Jobs run inline in testing, so the rendition is ready when the call returns
+    tiktok = ContentAgent().optimize_content(content_item, 'TikTok')
+    assert tiktok['output_path'] == rendition_path(master, '9:16')
+    assert tiktok['rendition'] == '9:16'
+    assert tiktok['aspect_ratio'] == '9:16'
+    assert video_info(tiktok['output_path'])[0] == (100, 180)
+    job = Job.query.filter_by(content_id=content_item.id, job_type='rendition').one()
+    assert job.status == Job.DONE
+
+    # Only the requested aspect ratio is cut, and it is committed for next time
+    db.session.expire_all()
+    assert content_item.get_metadata()['renditions'] == {'9:16': rendition_path(master, '9:16')}
+    assert not os.path.exists(rendition_path(master, '1:1'))
+    ContentAgent().optimize_content(content_item, 'TikTok')
+    assert Job.query.filter_by(job_type='rendition').count() == 1
+    ContentAgent().optimize_content(content_item, 'instagram')
+    assert sorted(content_item.get_metadata()['renditions']) == ['1:1', '9:16']
+
+
+def test_optimize_content_returns_the_pending_job(master, creator):
+    content_item = add_content('video_reel', master)
+    queued = Job(job_type='rendition', content_id=content_item.id, user_id=1, status=Job.QUEUED)
+    db.session.add(queued)
+    db.session.commit()
+
+    # A rendition already being cut is not queued again; the original is served meanwhile
+    optimized = ContentAgent().optimize_content(content_item, 'TikTok')
+    assert optimized['output_path'] == master
+    assert optimized['rendition'] is None
+    assert optimized['job_id'] == queued.id
+
+
+def test_optimize_content_keeps_photo_quotes(master, creator):
+    content_item = add_content('photo_quote', master)
+    optimized = ContentAgent().optimize_content(content_item, 'instagram')
+    assert optimized['output_path'] == master
+    assert optimized['rendition'] is None
+    assert optimized['job_id'] is None
@@ -0,0 +1,43 @@
+import subprocess
+import numpy as np
+import pytest
+from ai_content_platform import create_app
+from ai_content_platform.utils.video_utils import generate_video_reel, resolve_segments, segment_bounds
+
+
+def decode(path):
+    """Every frame of a video as RGB, resampled onto the 30 fps timeline"""
+    raw = subprocess.run(['ffmpeg', '-loglevel', 'error', '-i', path, '-vf', 'fps=30',
+                          '-f', 'rawvideo', '-pix_fmt', 'rgb24', '-'], capture_output=True, check=True).stdout
+    return np.frombuffer(raw, dtype=np.uint8).reshape(-1, 1080, 1920, 3)
+
+
+@pytest.fixture
+def app_config():
+    return {
+        'RENDER_CACHE_ENABLED': False,
+        # Lossless, so a segmented encode can match a serial one exactly
+        'VIDEO_ENCODER_SETTINGS': {'default': {'preset': 'ultrafast', 'crf': 0}},
+    }
+
+
+def test_render_segments_setting(monkeypatch):
+    monkeypatch.setenv('RENDER_SEGMENTS', '4')
+    with create_app().app_context():
+        assert resolve_segments(None, 300, 30) == 4
+        # At least a second of frames per segment
+        assert resolve_segments(None, 60, 30) == 2
+
+
+def test_segment_bounds_cover_the_timeline():
+    assert segment_bounds(10, 3) == [(0, 3), (3, 6), (6, 10)]
+
+
+def test_segmented_reel_matches_serial_render(app):
+    text = "Segments render in parallel"
+    serial = generate_video_reel(text, 'serial', duration=2, seed=3, segments=1)
+    segmented = generate_video_reel(text, 'segmented', duration=2, seed=3, segments=2)
+
+    serial_frames, segmented_frames = decode(serial), decode(segmented)
+    assert len(serial_frames) == 60
+    assert np.array_equal(serial_frames, segmented_frames)
@@ -0,0 +1,22 @@
+from ai_content_platform import create_app, db
+from ai_content_platform.benchmarks.bench_startup import probe
+
+
+def test_startup_skips_media_and_ml_libraries():
+    assert probe()['heavy_modules'] == []
+
+
+def test_init_db_creates_tables(tmp_path):
+    app = create_app()
+    app.config.update({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'app.db'}"
+    })
+    with app.app_context():
+        assert not db.inspect(db.engine).get_table_names()
+
+    result = app.test_cli_runner().invoke(args=['init-db'])
+    assert result.exit_code == 0
+
+    with app.app_context():
+        assert {'user', 'content', 'job'} <= set(db.inspect(db.engine).get_table_names())
@@ -0,0 +1,108 @@
+import os
+import numpy as np
+import pytest
+from ai_content_platform import create_app, db
+from ai_content_platform.models.user import User
+from ai_content_platform.models.content import Content
+from ai_content_platform.utils.metrics import STAGE_SECONDS
+from ai_content_platform.utils.streaming import hls_variants, package_stream, stream_dir_for
+from ai_content_platform.utils.synthesis import write_wav
+from ai_content_platform.utils.video_utils import encode_frames
+
+
+class Moving:
+    """A bar sweeping across the frame, so every frame differs"""
+
+    def frame(self, n):
+        frame = np.zeros((360, 640, 3), dtype=np.uint8)
+        frame[:, (n * 7) % 600:(n * 7) % 600 + 40] = 255
+        return frame
+
+
+@pytest.fixture
+def app_config():
+    return {'VIDEO_HLS': True, 'VIDEO_HLS_VARIANTS': 2}
+
+
+@pytest.fixture
+def video(app, tmp_path):
+    audio_path = write_wav(str(tmp_path / 'tone.wav'), 0.2 * np.sin(np.arange(22050 * 5) / 10))
+    path = str(tmp_path / 'video_1.mp4')
+    encode_frames(Moving(), 150, path, 640, 360, 30, audio_path=audio_path, segments=1)
+    return path
+
+
+def test_hls_is_opt_in(monkeypatch):
+    monkeypatch.delenv('VIDEO_HLS', raising=False)
+    assert create_app().config['VIDEO_HLS'] is False
+
+
+def test_unchanged_video_is_not_repackaged(video):
+    playlist = package_stream(video, 'video_reel', audio=True)
+    packaged = STAGE_SECONDS.count(stage='hls_packaging', content_type='none')
+    mtime = os.path.getmtime(playlist)
+
+    # A render cache hit hands the same file back: the package is kept
+    assert package_stream(video, 'video_reel', audio=True) == playlist
+    assert STAGE_SECONDS.count(stage='hls_packaging', content_type='none') == packaged
+    assert os.path.getmtime(playlist) == mtime
+
+    # Different settings rebuild it
+    package_stream(video, 'video_reel', audio=False)
+    assert STAGE_SECONDS.count(stage='hls_packaging', content_type='none') == packaged + 1
+
+
+def test_ladder_skips_variants_taller_than_the_video(app):
+    assert hls_variants(1080) == [(1080, 5000), (720, 2800)]
+    assert hls_variants(360) == [(360, 700)]
+    assert hls_variants(240) == [(240, 700)]
+
+
+def test_videos_are_fast_start(video):
+    with open(video, 'rb') as f:
+        head = f.read()
+    assert head.index(b'moov') < head.index(b'mdat')
+
+
+def test_package_stream(video):
+    playlist = package_stream(video, 'video_reel', audio=True)
+    assert playlist == os.path.join(stream_dir_for(video), 'master.m3u8')
+
+    with open(playlist) as f:
+        master = f.read()
+    assert master.count('#EXT-X-STREAM-INF') == 1
+    assert 'RESOLUTION=640x360' in master
+
+    # Short segments, so playback starts after the first one arrives
+    with open(os.path.join(stream_dir_for(video), '0', 'index.m3u8')) as f:
+        durations = [float(line[8:].strip().rstrip(',')) for line in f if line.startswith('#EXTINF:')]
+    assert len(durations) >= 2
+    assert max(durations) <= 2.5
+    assert abs(sum(durations) - 5) < 0.2
+
+
+def test_stream_route(app, database, video):
+    package_stream(video, 'video_reel', audio=True)
+    user = User(username='viewer', email='viewer@example.com')
+    user.set_password('pass')
+    db.session.add(user)
+    db.session.add(Content(title='Clip', content_type='video_reel', output_path=video, user_id=1))
+    db.session.commit()
+
+    client = app.test_client()
+    client.post('/login', data={'username': 'viewer', 'password': 'pass'})
+
+    response = client.get('/content/1/stream/master.m3u8')
+    assert response.status_code == 200
+    assert response.mimetype == 'application/vnd.apple.mpegurl'
+    assert client.get('/content/1/stream/0/segment_000.ts').mimetype == 'video/mp2t'
+    assert client.get('/content/1/stream/../video_1.mp4').status_code == 404
+
+    # The content page plays the stream, loading no third-party script unless configured
+    page = client.get('/content/1').data
+    assert b'data-stream="/content/1/stream/master.m3u8"' in page
+    assert b'cdn.jsdelivr.net/npm/hls.js' not in page
+
+    app.config.update({'HLS_JS_URL': 'https://cdn.example.com/hls.min.js', 'HLS_JS_INTEGRITY': 'sha384-abc'})
+    page = client.get('/content/1').data
+    assert b'"integrity": "sha384-abc"' in page
@@ -0,0 +1,62 @@
+import wave
+import numpy as np
+import pytest
+from ai_content_platform import create_app
+from ai_content_platform.utils.synthesis import (
+    SAMPLE_RATE, beep_track, music_loop, get_music_loop, mix_music_bed, write_wav)
+
+
+def test_beep_track_matches_per_word_loop():
+    duration, words = 5, 12
+    signal = beep_track(words, duration)
+
+    # Reference: the original mask-per-word construction
+    t = np.arange(duration * SAMPLE_RATE) / SAMPLE_RATE
+    expected = np.zeros_like(t)
+    rate = min(words / duration, 4)
+    for i in range(min(words, int(rate * duration))):
+        pos = np.round(i / rate * SAMPLE_RATE) / SAMPLE_RATE
+        idx = (t >= pos) & (t < pos + 0.1 - 1e-9)
+        expected[idx] = 0.5 * np.sin(2 * np.pi * 440 * (t[idx] - pos))
+
+    assert np.allclose(signal, expected, atol=1e-3)
+
+
+def test_music_loop_is_seamless_and_normalized():
+    loop = music_loop('upbeat', tempo=120, bars=2)
+    assert len(loop) == SAMPLE_RATE * 4  # 2 bars of 4 beats at 120 bpm
+    assert np.abs(loop).max() == pytest.approx(0.9, abs=1e-3)
+    # The pad fades out at the end of every bar, so the wrap does not click
+    assert abs(loop[-1] - loop[0]) < 0.2
+
+
+def test_loops_are_cached(app):
+    first = get_music_loop('calm', 90)
+    second = get_music_loop('calm', 90)
+    assert np.array_equal(first, second)
+
+    from ai_content_platform.utils.synthesis import get_music_cache
+    stats = get_music_cache().stats()
+    assert stats['hits'] == 1 and stats['entries'] == 1
+
+
+def test_music_only_bed_is_streamed_to_length(app, tmp_path):
+    output = mix_music_bed(str(tmp_path / 'bed.wav'), duration=12.5, chunk_seconds=2)
+    with wave.open(output) as wav:
+        assert wav.getframerate() == SAMPLE_RATE
+        assert wav.getnframes() == int(12.5 * SAMPLE_RATE)
+        samples = np.frombuffer(wav.readframes(wav.getnframes()), dtype='<i2')
+    # Faded in and out
+    assert samples[0] == 0 and abs(int(samples[-1])) < 100
+
+
+def test_music_beds_are_opt_in(monkeypatch, tmp_path):
+    from ai_content_platform.utils.audio_utils import create_soundtrack
+
+    monkeypatch.delenv('MUSIC_BEDS', raising=False)
+    app = create_app()
+    app.config.update({'UPLOAD_FOLDER': str(tmp_path), 'MUSIC_CACHE_DIR': str(tmp_path / 'music')})
+    with app.app_context():
+        assert create_soundtrack(1, duration=1) is None
+        app.config['MUSIC_BEDS'] = True
+        assert create_soundtrack(1, duration=1) is not None
@@ -0,0 +1,46 @@
+import numpy as np
+from ai_content_platform.utils.backgrounds import render_background
+from ai_content_platform.utils.text_layers import FrameCompositor, TextSpriteCache
+
+
+def full_redraw(background, layers):
+    """What every frame used to be: the layers blended onto a fresh copy of the background"""
+    return FrameCompositor(background).compose(layers).copy()
+
+
+def test_dirty_rect_composite_matches_full_redraw():
+    background = render_background(320, 180, style='noise', seed=5)
+    cache = TextSpriteCache()
+    word, caption = cache.get('Hello', size=40), cache.get('a longer caption', size=24)
+
+    frames = [
+        [(word, 10, 10, 1.0)],
+        [(word, 14, 12, 1.0)],  # moved: the old rectangle must be restored
+        [(word, 14, 12, 1.0)],  # unchanged: the buffer is returned as is
+        [(word, 60, 40, 0.5), (caption, 40, 50, 1.0)],  # overlapping, half transparent
+        [(caption, 250, 160, 1.0)],  # clipped at the frame edge
+        [(caption, -30, -5, 0.8)],
+        [(word, 20, 20, 0.0)],  # invisible: only the background is left
+    ]
+    compositor = FrameCompositor(background)
+    for layers in frames:
+        assert np.array_equal(compositor.compose(layers), full_redraw(background, layers))
+    assert np.array_equal(compositor.frame, background)  # nothing left over from the earlier frames
+
+
+def test_sprite_cache_evicts_least_recently_used():
+    cache = TextSpriteCache(max_entries=2)
+    first = cache.get('one')
+    cache.get('two')
+    assert cache.get('one') is first  # hit: 'one' is now the most recent
+    cache.get('three')  # over capacity: 'two' goes
+
+    assert len(cache._sprites) == 2
+    assert cache.get('one') is first
+    assert (cache.hits, cache.misses) == (2, 3)
+    cache.get('two')
+    assert cache.misses == 4
+
+    # Colour and size are part of the key
+    assert cache.get('one', color=(255, 0, 0)) is not first
+    assert cache.get('one', size=30) is not first
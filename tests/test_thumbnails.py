@@ -0,0 +1,47 @@
+import os
+from PIL import Image
+from ai_content_platform import db
+from ai_content_platform.models.user import User
+from ai_content_platform.models.content import Content
+from ai_content_platform.utils.thumbnails import image_thumbnail, preview_path_for
+
+
+def test_image_thumbnail_is_small_webp(tmp_path):
+    source = tmp_path / 'quote.jpg'
+    Image.new('RGB', (1080, 1080), 'navy').save(source)
+
+    output = image_thumbnail(str(source), str(tmp_path / 'thumb.webp'), width=320)
+    with Image.open(output) as thumbnail:
+        assert thumbnail.format == 'WEBP'
+        assert thumbnail.size == (320, 320)
+
+
+def test_preview_path_for():
+    assert preview_path_for('/static/thumbnails/thumb_7.webp') == '/static/thumbnails/preview_7.webp'
+
+
+def test_backfill_thumbnails(app, database, tmp_path):
+    source = tmp_path / 'photo_quote_1.jpg'
+    Image.new('RGB', (1080, 1080), 'navy').save(source)
+
+    user = User(username='thumbs', email='thumbs@example.com')
+    user.set_password('testpass')
+    db.session.add(user)
+    db.session.commit()
+    db.session.add_all([
+        Content(title='Rendered', content_type='photo_quote', output_path=str(source), user_id=user.id),
+        Content(title='Pending', content_type='photo_quote', user_id=user.id),
+    ])
+    db.session.commit()
+
+    result = app.test_cli_runner().invoke(args=['backfill-thumbnails'])
+    assert 'Created 1 thumbnails (0 failed)' in result.output
+
+    rendered = Content.query.filter_by(title='Rendered').first()
+    assert rendered.thumbnail_path.endswith(f"thumb_{rendered.id}.webp")
+    assert os.path.exists(rendered.thumbnail_path)
+    assert Content.query.filter_by(title='Pending').first().thumbnail_path is None
+
+    # Already backfilled rows are skipped
+    result = app.test_cli_runner().invoke(args=['backfill-thumbnails'])
+    assert 'Created 0 thumbnails' in result.output
@@ -0,0 +1,109 @@
+import numpy as np
+import pytest
+from ai_content_platform.utils import transcription
+from ai_content_platform.utils.synthesis import write_wav
+from ai_content_platform.utils.transcription import (
+    SAMPLE_RATE, split_on_silence, transcribe, transcribe_samples)
+from ai_content_platform.utils.model_registry import registry, _load_whisper
+
+
+def tone(seconds, amplitude=0.5):
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    return (amplitude * np.sin(2 * np.pi * 220 * t)).astype(np.float32)
+
+
+def silence(seconds):
+    return np.zeros(int(seconds * SAMPLE_RATE), dtype=np.float32)
+
+
+class TinyWhisper:
+    """Stand-in for the Whisper pipeline: one word per chunk, spanning the chunk"""
+
+    nbytes = 1024
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, inputs, return_timestamps=None):
+        self.calls += 1
+        duration = len(inputs['raw']) / inputs['sampling_rate']
+        return {'text': f" word{self.calls}",
+                'chunks': [{'text': f" word{self.calls}", 'timestamp': (0.0, duration)}]}
+
+
+@pytest.fixture
+def whisper():
+    whisper = TinyWhisper()
+    registry.register('whisper', lambda: whisper)
+    yield whisper
+    registry.evict('whisper')
+    registry.register('whisper', _load_whisper)
+
+
+def test_splits_at_silences():
+    samples = np.concatenate([silence(1), tone(2), silence(1), tone(1.5), silence(0.1), tone(1), silence(1)])
+    chunks = split_on_silence(samples, max_chunk_seconds=4)
+
+    # The short pause is bridged; packing stops at the 4 s limit
+    assert len(chunks) == 2
+    assert chunks[0][0] == pytest.approx(1 * SAMPLE_RATE, abs=0.2 * SAMPLE_RATE)
+    assert chunks[1][1] - chunks[1][0] == pytest.approx(2.9 * SAMPLE_RATE, abs=0.2 * SAMPLE_RATE)
+
+
+def test_long_speech_is_cut_and_silence_dropped():
+    assert split_on_silence(silence(5)) == []
+    chunks = split_on_silence(tone(10), max_chunk_seconds=3)
+    assert len(chunks) == 4
+    assert all(end - start <= 3.4 * SAMPLE_RATE for start, end in chunks)
+
+
+def test_transcribe_samples_in_order_with_offsets(whisper):
+    samples = np.concatenate([tone(2), silence(1), tone(2), silence(1), tone(2)])
+    partials = []
+    transcript = transcribe_samples(
+        samples, on_partial=lambda text, fraction: partials.append((text, fraction)),
+        workers=3, max_chunk_seconds=2.5)
+
+    assert whisper.calls == 3
+    assert len(transcript['text'].split()) == 3
+    assert transcript['complete']
+    starts = [word['start'] for word in transcript['words']]
+    assert starts == sorted(starts)
+    assert starts[1] == pytest.approx(3.0, abs=0.2)
+    assert [fraction for _, fraction in partials] == pytest.approx([1 / 3, 2 / 3, 1.0])
+
+
+class BrokenWhisper(TinyWhisper):
+    def __call__(self, inputs, return_timestamps=None):
+        raise RuntimeError('out of memory')
+
+
+@pytest.fixture
+def broken_whisper():
+    registry.register('whisper', BrokenWhisper)
+    yield
+    registry.evict('whisper')
+    registry.register('whisper', _load_whisper)
+
+
+def test_fallback_transcripts_are_not_cached(app, broken_whisper, monkeypatch, tmp_path):
+    calls = []
+    monkeypatch.setattr(transcription, '_speech_recognition_chunk',
+                        lambda chunk, offset: calls.append(offset) or ('fallback', []))
+    audio_path = write_wav(str(tmp_path / 'speech.wav'), tone(2), SAMPLE_RATE)
+    transcript = transcribe(audio_path)
+    assert transcript['engine'] == 'speech_recognition'
+    assert transcript['text'] == 'fallback'
+
+    # Served again from the fallback rather than from the cache, so Whisper gets another go
+    transcribe(audio_path)
+    assert len(calls) == 2
+
+
+def test_raises_when_no_chunk_is_transcribed(broken_whisper, monkeypatch):
+    def unavailable(chunk, offset):
+        raise ConnectionError('offline')
+
+    monkeypatch.setattr(transcription, '_speech_recognition_chunk', unavailable)
+    with pytest.raises(RuntimeError, match='chunks'):
+        transcribe_samples(np.concatenate([tone(2), silence(1), tone(2)]), max_chunk_seconds=2.5)
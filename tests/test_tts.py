@@ -0,0 +1,42 @@
+import wave
+import numpy as np
+import pytest
+from ai_content_platform import create_app
+from ai_content_platform.utils.tts import split_sentences, crossfade_concat, synthesize_script
+
+
+@pytest.fixture
+def app_config():
+    return {'TTS_CROSSFADE_MS': 10}
+
+
+def test_crossfade_setting(monkeypatch):
+    assert create_app().config['TTS_CROSSFADE_MS'] == 30
+    monkeypatch.setenv('TTS_CROSSFADE_MS', '5')
+    assert create_app().config['TTS_CROSSFADE_MS'] == 5
+
+
+def test_split_sentences():
+    assert split_sentences("Hello there.  How are\nyou? Great!") == ['Hello there.', 'How are you?', 'Great!']
+
+
+def test_crossfade_concat_overlaps_junctions():
+    pieces = [np.ones(100, dtype=np.float32), np.ones(50, dtype=np.float32)]
+    joined = crossfade_concat(pieces, sample_rate=1000, crossfade_ms=10)
+    assert len(joined) == 140
+    # Equal-level clips crossfade to a constant level
+    assert np.allclose(joined, 1.0, atol=0.12)
+
+
+def test_only_new_sentences_are_synthesized(app, tts, tmp_path):
+    output = synthesize_script("One fish. Two fish. One fish.", str(tmp_path / 'a.wav'))
+    assert sorted(tts.spoken) == ['One fish.', 'Two fish.']
+
+    # A lightly edited script reuses the cached sentences
+    synthesize_script("One fish. Red fish.", str(tmp_path / 'b.wav'))
+    assert sorted(tts.spoken) == ['One fish.', 'Red fish.', 'Two fish.']
+
+    with wave.open(output) as wav:
+        assert wav.getframerate() == 16000
+        # Three clips of 1440-1440-1440 samples, two 160-sample crossfades
+        assert wav.getnframes() == 3 * 1440 - 2 * 160
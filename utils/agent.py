@@ -1,11 +1,32 @@
 import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from flask import current_app
 from ai_content_platform import db
 from ai_content_platform.models.content import Content
+from ai_content_platform.models.job import Job
 from ai_content_platform.utils.text_utils import generate_text_prompt, auto_complete
-from ai_content_platform.utils.image_utils import generate_photo_quote
-from ai_content_platform.utils.video_utils import generate_video_reel, generate_avatar_video
-from ai_content_platform.utils.audio_utils import text_to_speech
+from ai_content_platform.utils.disk_cache import link_or_copy
+from ai_content_platform.utils.metrics import content_type_label, timed
+from ai_content_platform.utils.jobs import job_queue
+from ai_content_platform.utils.renditions import (
+    VIDEO_CONTENT_TYPES, PLATFORM_RENDITIONS, create_renditions, rendition_path)
+
+# The media utils pull in cv2, PIL, pydub and speech_recognition, so they are
+# imported by the methods that render; web workers that never render skip them.
+
+# Targets that are rendered from a voice track
+AUDIO_CONTENT_TYPES = ('voice_video', 'avatar_video')
+
+
+def discard_file(path):
+    """Remove an intermediate file if there is one"""
+    if path and os.path.exists(path):
+        os.remove(path)
+
+
+def _scaled(progress, start, end):
+    """Map a 0-1 progress callback of a sub-step onto [start, end] of the whole job"""
+    return lambda fraction, stage=None: progress(start + (end - start) * fraction, stage)
 
 class ContentAgent:
     """Agent to orchestrate content creation and transformation tasks"""
@@ -14,41 +35,296 @@ class ContentAgent:
         """Initialize the content agent"""
         pass
     
-    def remix_content(self, content_item, target_format):
-        """Remix existing content into a new format"""
-        # Create a new content item
-        new_content = Content(
-            title=f"Remix of {content_item.title}",
-            content_type=target_format,
-            input_text=content_item.input_text,
-            user_id=content_item.user_id
-        )
-        
-        # Add to database to get an ID
-        db.session.add(new_content)
-        db.session.commit()
+    def generate_content(self, content_item, progress=None, audio_path=None, transcript=None):
+        """Render the output for a saved Content item based on its content_type
+        
+        ``progress`` is an optional ``progress(fraction, stage)`` callback.
+        ``audio_path`` is an uploaded voice recording for voice/avatar videos.
+        ``transcript`` is the known text of that recording, skipping transcription.
+        """
+        if progress is None:
+            progress = lambda fraction, stage=None: None
+        
+        output_path, text, metadata = self.render_content(
+            content_item.content_type, content_item.input_text, content_item.id,
+            progress=progress, audio_path=audio_path, transcript=transcript)
+        content_item.output_path = output_path
+        content_item.input_text = text
+        content_item.set_metadata(metadata)
+        
+        progress(1.0, 'Creating thumbnail')
+        with timed('thumbnail', content_item.content_type):
+            self.create_thumbnail(content_item)
+        
+        # Save changes
+        with timed('db_commit', content_item.content_type):
+            db.session.commit()
+        
+        return content_item
+    
+    def render_content(self, content_type, text, content_id, progress=None, audio_path=None,
+                       transcript=None):
+        """Render the output file for one content type
+        
+        Returns ``(output_path, input_text, metadata)``. There is no database
+        access here, so several renders can run on worker threads at once.
+        Stage timings recorded during the render are labelled with ``content_type``.
+        """
+        with content_type_label(content_type), timed('render'):
+            output_path, text, metadata = self._render_content(
+                content_type, text, content_id, progress=progress,
+                audio_path=audio_path, transcript=transcript)
+            if content_type in VIDEO_CONTENT_TYPES:
+                renditions = self.create_renditions(output_path, content_type)
+                if renditions:
+                    metadata['renditions'] = renditions
+        return output_path, text, metadata
+    
+    def _render_content(self, content_type, text, content_id, progress=None, audio_path=None,
+                        transcript=None):
+        from ai_content_platform.utils.image_utils import generate_photo_quote
+        from ai_content_platform.utils.video_utils import generate_video_reel, generate_avatar_video
+        from ai_content_platform.utils.audio_utils import (
+            text_to_speech, transcribe_audio, transcribe_audio_timed, create_soundtrack)
         
-        # Generate content based on target format
-        if target_format == 'photo_quote':
-            output_path = generate_photo_quote(content_item.input_text, new_content.id)
-            new_content.output_path = output_path
+        if progress is None:
+            progress = lambda fraction, stage=None: None
+        
+        if content_type == 'photo_quote':
+            progress(0.1, 'Rendering quote')
+            output_path = generate_photo_quote(text, content_id)
+            metadata = {
+                'font': 'default',
+                'style': 'modern',
+                'colors': 'auto'
+            }
             
-        elif target_format == 'video_reel':
-            output_path = generate_video_reel(content_item.input_text, new_content.id)
-            new_content.output_path = output_path
+        elif content_type == 'video_reel':
+            soundtrack = create_soundtrack(content_id, duration=15)
+            progress(0.1, 'Rendering video')
+            output_path = generate_video_reel(text, content_id, audio_path=soundtrack,
+                                              progress=_scaled(progress, 0.1, 1.0))
+            discard_file(soundtrack)
+            metadata = {
+                'duration': '15s',
+                'style': 'dynamic',
+                'music': 'auto' if soundtrack else 'none'
+            }
             
-        elif target_format == 'avatar_video':
-            # Generate speech from text
-            audio_path = text_to_speech(content_item.input_text, new_content.id)
+        elif content_type == 'voice_video':
+            if not audio_path:
+                raise ValueError("Voice videos need an audio recording")
             
-            # Generate avatar video
-            output_path = generate_avatar_video(content_item.input_text, new_content.id, audio_path=audio_path)
-            new_content.output_path = output_path
+            # Transcribe audio, keeping word timings for captions
+            words = None
+            if transcript is None:
+                progress(0.05, 'Transcribing audio')
+                transcription = transcribe_audio_timed(
+                    audio_path, on_partial=lambda text, fraction: progress(0.05 + 0.25 * fraction))
+                transcript, words = transcription['text'], transcription['words']
+            text = transcript
             
-        # Save changes
+            # Generate video with captions, the music bed mixed under the voice
+            soundtrack = create_soundtrack(content_id, voice_path=audio_path)
+            progress(0.3, 'Rendering video')
+            output_path = generate_video_reel(
+                text, content_id, audio_path=soundtrack or audio_path,
+                progress=_scaled(progress, 0.3, 1.0), content_type='voice_video')
+            discard_file(soundtrack)
+            metadata = {
+                'audio_path': audio_path,
+                'transcription': text,
+                'style': 'scenic'
+            }
+            if words:
+                metadata['words'] = words
+            
+        elif content_type == 'avatar_video':
+            if audio_path:
+                # Transcribe the uploaded audio
+                if transcript is None:
+                    progress(0.05, 'Transcribing audio')
+                    transcript = transcribe_audio(
+                        audio_path, on_partial=lambda text, fraction: progress(0.05 + 0.25 * fraction))
+                text = transcript
+            else:
+                # Generate speech from text
+                progress(0.05, 'Generating speech')
+                audio_path = text_to_speech(text, content_id)
+            
+            # Generate avatar video; lips follow the voice, the soundtrack adds music
+            soundtrack = create_soundtrack(content_id, voice_path=audio_path)
+            progress(0.3, 'Rendering video')
+            output_path = generate_avatar_video(
+                text, content_id, audio_path=audio_path, soundtrack_path=soundtrack,
+                progress=_scaled(progress, 0.3, 1.0))
+            discard_file(soundtrack)
+            metadata = {
+                'audio_path': audio_path,
+                'avatar_style': 'realistic',
+                'voice_style': 'natural',
+                'background': 'gradient'
+            }
+            
+        else:
+            raise ValueError(f"Unsupported content type: {content_type}")
+        
+        return output_path, text, metadata
+    
+    def prepare_batch(self, content_items):
+        """Shared work for a batch of renders: diffuse all their backgrounds together"""
+        from ai_content_platform.utils.image_utils import prefetch_backgrounds
+        
+        prefetch_backgrounds(content_items)
+    
+    def create_renditions(self, output_path, content_type, aspects=None):
+        """Platform aspect ratios of a rendered video; a failure here never fails the render"""
+        try:
+            return create_renditions(output_path, content_type, aspects)
+        except Exception as e:
+            print(f"Error creating renditions of {output_path}: {e}")
+            return {}
+    
+    def create_thumbnail(self, content_item):
+        """Create the dashboard poster/preview; a failure here never fails the render"""
+        from ai_content_platform.utils.thumbnails import create_thumbnails
+        
+        try:
+            return create_thumbnails(content_item)
+        except Exception as e:
+            print(f"Error creating thumbnail for content {content_item.id}: {e}")
+            return None
+    
+    def create_remix(self, content_item, target_format):
+        """Create (but don't render) the Content row for a remix"""
+        return self.create_remixes(content_item, [target_format])[0]
+    
+    def create_remixes(self, content_item, target_formats):
+        """Create (but don't render) one remix row per target format"""
+        new_contents = [
+            Content(
+                title=f"Remix of {content_item.title}",
+                content_type=target_format,
+                input_text=content_item.input_text,
+                user_id=content_item.user_id
+            )
+            for target_format in target_formats
+        ]
+        
+        # Add to database to get IDs
+        db.session.add_all(new_contents)
         db.session.commit()
         
-        return new_content
+        return new_contents
+    
+    def link_existing(self, new_content, content_item):
+        """Point a remix at the source's artifact when the format is unchanged
+        
+        Returns True when nothing needs to be rendered.
+        """
+        if new_content.content_type != content_item.content_type:
+            return False
+        if not content_item.output_path or not os.path.exists(content_item.output_path):
+            return False
+        
+        # Content-addressed: same inputs, same format, same output
+        folder, filename = os.path.split(content_item.output_path)
+        prefix = filename.split('_', 1)[0]
+        output_path = os.path.join(folder, f"{prefix}_{new_content.id}{os.path.splitext(filename)[1]}")
+        link_or_copy(content_item.output_path, output_path)
+        
+        # Renditions are linked under the new name too, so deleting either item keeps the other's
+        metadata = content_item.get_metadata()
+        renditions = {}
+        for aspect, path in metadata.get('renditions', {}).items():
+            if os.path.exists(path):
+                renditions[aspect] = rendition_path(output_path, aspect)
+                link_or_copy(path, renditions[aspect])
+        if renditions:
+            metadata['renditions'] = renditions
+        else:
+            metadata.pop('renditions', None)
+        
+        new_content.output_path = output_path
+        new_content.set_metadata(metadata)
+        self.create_thumbnail(new_content)
+        db.session.commit()
+        return True
+    
+    def remix_content(self, content_item, target_format, progress=None):
+        """Remix existing content into a new format"""
+        return self.remix_to_formats(content_item, [target_format], progress=progress)[0]
+    
+    def remix_to_formats(self, content_item, target_formats, progress=None):
+        """Remix existing content into several formats, sharing the work between them"""
+        new_contents = self.create_remixes(content_item, target_formats)
+        pending = [new_content for new_content in new_contents
+                   if not self.link_existing(new_content, content_item)]
+        if pending:
+            self.render_remixes(pending, progress=progress, source_id=content_item.id)
+        return new_contents
+    
+    def prepare_remix(self, source, content_items, progress):
+        """Build the intermediates shared by every target of a remix
+        
+        The source's audio is reused (or synthesized once), its text doubles
+        as the transcript, and all backgrounds are diffused in one batch.
+        """
+        from ai_content_platform.utils.image_utils import prefetch_backgrounds
+        from ai_content_platform.utils.audio_utils import text_to_speech
+        
+        text = source.input_text
+        audio_path = source.get_metadata().get('audio_path')
+        if audio_path and not os.path.exists(audio_path):
+            audio_path = None
+        
+        if not audio_path and any(item.content_type in AUDIO_CONTENT_TYPES for item in content_items):
+            progress(0.05, 'Generating speech')
+            audio_path = text_to_speech(text, source.id)
+        
+        progress(0.1, 'Generating backgrounds')
+        prefetch_backgrounds(content_items)
+        
+        return {'text': text, 'audio_path': audio_path}
+    
+    def render_remixes(self, content_items, progress=None, source_id=None):
+        """Render several remixes of one source concurrently and save them together"""
+        if progress is None:
+            progress = lambda fraction, stage=None: None
+        source = db.session.get(Content, source_id)
+        shared = self.prepare_remix(source, content_items, progress)
+        
+        app = current_app._get_current_object()
+        
+        def render(content_id, content_type):
+            # Worker threads need their own app context; they never touch the session
+            with app.app_context():
+                needs_audio = content_type in AUDIO_CONTENT_TYPES
+                return self.render_content(
+                    content_type, shared['text'], content_id,
+                    audio_path=shared['audio_path'] if needs_audio else None,
+                    transcript=shared['text'] if needs_audio else None)
+        
+        progress(0.3, f"Rendering {len(content_items)} formats")
+        targets = [(item.id, item.content_type) for item in content_items]
+        workers = min(len(targets), current_app.config.get('REMIX_WORKERS', 4))
+        results = {}
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='remix') as executor:
+            futures = {executor.submit(render, *target): target[0] for target in targets}
+            for done, future in enumerate(as_completed(futures), start=1):
+                results[futures[future]] = future.result()
+                progress(0.3 + 0.65 * done / len(targets))
+        
+        # Save every target in one transaction
+        progress(0.95, 'Creating thumbnails')
+        for item in content_items:
+            item.output_path, item.input_text, metadata = results[item.id]
+            item.set_metadata(metadata)
+            self.create_thumbnail(item)
+        with timed('db_commit', 'remix'):
+            db.session.commit()
+        
+        return content_items
     
     def generate_content_calendar(self, user_id, days=7):
         """Generate a content calendar with suggested topics"""
@@ -93,11 +369,47 @@ class ContentAgent:
         
         return calendar
     
+    def rendition_for(self, content_item, aspect, create=True):
+        """Path of a video's rendition in ``aspect``, or None
+        
+        With ``create`` a missing rendition is cut now (an ffmpeg encode) and
+        recorded in the metadata; the caller commits.
+        """
+        metadata = content_item.get_metadata()
+        renditions = metadata.get('renditions', {})
+        if renditions.get(aspect) and os.path.exists(renditions[aspect]):
+            return renditions[aspect]
+        if not create or not self.can_cut_rendition(content_item):
+            return None
+        
+        created = self.create_renditions(content_item.output_path, content_item.content_type, [aspect])
+        if aspect not in created:
+            return None
+        metadata['renditions'] = dict(renditions, **created)
+        content_item.set_metadata(metadata)
+        return created[aspect]
+    
+    def can_cut_rendition(self, content_item):
+        return (content_item.content_type in VIDEO_CONTENT_TYPES and bool(content_item.output_path)
+                and os.path.exists(content_item.output_path))
+    
+    def render_rendition(self, content_item, progress=None, aspect=None):
+        """Job task: cut a video's rendition in ``aspect`` and record it"""
+        if progress is not None:
+            progress(0.1, f'Cutting the {aspect} version')
+        self.rendition_for(content_item, aspect)
+        db.session.commit()
+        return content_item
+    
     def optimize_content(self, content_item, platform):
-        """Optimize content for a specific platform"""
-        # This would implement platform-specific optimizations
-        # For demonstration purposes, we'll return some basic recommendations
+        """Recommendations for a platform, with the file to post there
         
+        ``output_path`` is the rendition in the platform's aspect ratio and
+        ``rendition`` names it. A video's rendition that was not made at
+        render time (see VIDEO_RENDITIONS) is cut by a background job, whose
+        id is returned as ``job_id``; until it is done, and for photo quotes,
+        ``output_path`` is the original output and ``rendition`` is None.
+        """
         recommendations = {
             'instagram': {
                 'aspect_ratio': '1:1 for feed, 9:16 for stories',
@@ -117,10 +429,29 @@ class ContentAgent:
         }
         
         if platform.lower() in recommendations:
-            return recommendations[platform.lower()]
+            optimized = dict(recommendations[platform.lower()])
         else:
-            return {
+            optimized = {
                 'aspect_ratio': '16:9',
                 'optimal_length': '1-2 minutes',
                 'hashtags': '#content #digital #ai'
             }
+        
+        # Pick the matching rendition; a missing one is cut in the background
+        aspect = PLATFORM_RENDITIONS.get(platform.lower(), '16:9')
+        path = self.rendition_for(content_item, aspect, create=False)
+        job = None
+        if path is None and self.can_cut_rendition(content_item):
+            job = Job.query.filter(
+                Job.content_id == content_item.id, Job.job_type == 'rendition',
+                Job.status.in_([Job.QUEUED, Job.RUNNING])).first()
+            if job is None:
+                job = job_queue.enqueue('rendition', content_item, self.render_rendition, aspect=aspect)
+            # Already done when jobs run inline
+            path = self.rendition_for(content_item, aspect, create=False)
+        if path:
+            optimized.update(output_path=path, rendition=aspect)
+        else:
+            optimized.update(output_path=content_item.output_path, rendition=None)
+        optimized['job_id'] = job.id if job is not None and not path else None
+        return optimized
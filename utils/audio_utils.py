@@ -1,23 +1,31 @@
 import os
 import tempfile
-import numpy as np
 from flask import current_app
 import speech_recognition as sr
 from pydub import AudioSegment
 
-def transcribe_audio(audio_path):
+from ai_content_platform.utils.transcription import transcribe
+from ai_content_platform.utils.synthesis import beep_track, write_wav, mix_music_bed
+from ai_content_platform.utils.tts import synthesize_script
+from ai_content_platform.utils.metrics import timed, count_fallback
+
+def transcribe_audio(audio_path, on_partial=None):
     """Transcribe audio file to text using Whisper or DeepSpeech alternative"""
+    return transcribe_audio_timed(audio_path, on_partial)['text']
+
+def transcribe_audio_timed(audio_path, on_partial=None):
+    """Transcript with word timestamps: ``{'text', 'words': [{'word', 'start', 'end'}], 'duration'}``
+    
+    Audio is split at silences and the chunks are transcribed in parallel;
+    results are memoized by the audio's content hash.
+    """
     try:
-        # Try to use transformers for Whisper
-        from transformers import pipeline
-        
-        transcriber = pipeline("automatic-speech-recognition", model="openai/whisper-small")
-        result = transcriber(audio_path)
-        return result["text"]
+        return transcribe(audio_path, on_partial)
     except Exception as e:
-        print(f"Error using Whisper: {e}")
-        # Fallback to SpeechRecognition
-        return fallback_transcribe_audio(audio_path)
+        print(f"Error transcribing audio in chunks: {e}")
+        # Fallback to SpeechRecognition on the whole file
+        count_fallback('speech_recognition_file')
+        return {'text': fallback_transcribe_audio(audio_path), 'words': [], 'duration': None}
 
 def fallback_transcribe_audio(audio_path):
     """Fallback transcription using SpeechRecognition library"""
@@ -44,49 +52,43 @@ def text_to_speech(text, content_id):
     output_path = os.path.join(upload_folder, f"speech_{content_id}.wav")
     
     try:
-        # Try to use transformers for TTS
-        from transformers import pipeline
-        
-        synthesizer = pipeline("text-to-speech")
-        speech = synthesizer(text)
-        
-        with open(output_path, "wb") as f:
-            f.write(speech["bytes"])
-        
-        return output_path
+        # Sentences spoken before come from the TTS cache; new ones are synthesized in parallel
+        with timed('tts'):
+            return synthesize_script(text, output_path)
     except Exception as e:
         print(f"Error using transformer TTS: {e}")
         # Fallback to a simple beep pattern
+        count_fallback('beep_audio')
         return generate_fallback_audio(text, output_path)
 
+def create_soundtrack(content_id, voice_path=None, duration=None):
+    """Mix the configured music bed under a voice track (or alone for ``duration`` seconds)
+    
+    Returns the soundtrack path, or None when music beds are off (the
+    default, see MUSIC_BEDS) or fail.
+    """
+    if not current_app.config.get('MUSIC_BEDS', False):
+        return None
+    
+    upload_folder = current_app.config['UPLOAD_FOLDER']
+    output_path = os.path.join(upload_folder, f"soundtrack_{content_id}.wav")
+    try:
+        with timed('soundtrack'):
+            return mix_music_bed(output_path, voice_path=voice_path, duration=duration,
+                                 style=current_app.config.get('MUSIC_STYLE', 'calm'),
+                                 tempo=current_app.config.get('MUSIC_TEMPO', 90))
+    except Exception as e:
+        print(f"Error creating soundtrack: {e}")
+        return None
+
 def generate_fallback_audio(text, output_path, duration=5):
     """Generate a simple audio file with beeps as a fallback"""
     try:
-        from scipy.io import wavfile
-        import scipy.signal
-        
-        # Generate a simple audio signal
-        sample_rate = 22050
-        t = np.linspace(0, duration, sample_rate * duration)
-        
-        # Create a beep for each word
-        words = text.split()
-        signal = np.zeros_like(t)
-        
-        beeps_per_second = min(len(words) / duration, 4)  # Max 4 beeps per second
-        
-        for i in range(min(len(words), int(beeps_per_second * duration))):
-            # Position in the audio
-            pos = i / beeps_per_second
-            # Generate a short beep
-            idx = (t >= pos) & (t < pos + 0.1)
-            signal[idx] = 0.5 * np.sin(2 * np.pi * 440 * (t[idx] - pos))
-        
-        # Normalize and convert to int16
-        signal = np.int16(signal * 32767)
+        # One beep per word, at most 4 per second
+        signal = beep_track(len(text.split()), duration)
         
         # Save to WAV file
-        wavfile.write(output_path, sample_rate, signal)
+        write_wav(output_path, signal)
         
         return output_path
     except Exception as e:
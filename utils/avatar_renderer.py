@@ -0,0 +1,145 @@
+from functools import lru_cache
+import numpy as np
+import cv2
+
+# Colours are BGR, as used by OpenCV
+AVATAR_STYLES = {
+    'default': {'background': (50, 50, 100), 'head': (200, 200, 200), 'features': (0, 0, 0)},
+    'warm': {'background': (60, 90, 140), 'head': (170, 205, 235), 'features': (40, 40, 90)},
+    'dark': {'background': (30, 30, 30), 'head': (120, 120, 120), 'features': (240, 240, 240)},
+}
+
+# Mouth openness is an ellipse half-height in pixels, 0 (closed) to MAX_MOUTH_OPEN
+MAX_MOUTH_OPEN = 20
+
+CAPTION_FONT = cv2.FONT_HERSHEY_SIMPLEX
+CAPTION_SCALE = 0.7
+CAPTION_THICKNESS = 2
+CAPTION_LINE_HEIGHT = 30
+CAPTION_LINE_LENGTH = 50
+
+
+class AvatarTemplate:
+    """Static layers and feature atlas for one avatar type at one resolution.
+
+    The background and head are composed once; the eyes (open/blink) and every
+    mouth-open level are pre-rendered as small patches cut from that base.
+    """
+
+    def __init__(self, width, height, avatar_type='default'):
+        style = AVATAR_STYLES.get(avatar_type, AVATAR_STYLES['default'])
+        self.width = width
+        self.height = height
+        features = style['features']
+
+        # Static layers: background and head
+        base = np.empty((height, width, 3), dtype=np.uint8)
+        base[:] = style['background']
+        head_center = (width // 2, height // 3)
+        cv2.circle(base, head_center, 100, style['head'], -1)
+        self.base = base
+
+        # Eyes: one patch covering both eyes, open and blinking
+        eye_y = height // 3 - 20
+        left_eye_x = width // 2 - 30
+        right_eye_x = width // 2 + 30
+        self.eye_rect = (left_eye_x - 12, eye_y - 7, right_eye_x + 12, eye_y + 8)
+        x0, y0 = self.eye_rect[:2]
+
+        open_eyes = self._crop(self.eye_rect)
+        cv2.circle(open_eyes, (left_eye_x - x0, eye_y - y0), 5, features, -1)
+        cv2.circle(open_eyes, (right_eye_x - x0, eye_y - y0), 5, features, -1)
+
+        closed_eyes = self._crop(self.eye_rect)
+        cv2.line(closed_eyes, (left_eye_x - 10 - x0, eye_y - y0), (left_eye_x + 10 - x0, eye_y - y0), features, 2)
+        cv2.line(closed_eyes, (right_eye_x - 10 - x0, eye_y - y0), (right_eye_x + 10 - x0, eye_y - y0), features, 2)
+        self.eyes = {False: open_eyes, True: closed_eyes}
+
+        # Mouth: lower half-ellipse at every openness level
+        mouth_x = width // 2
+        mouth_y = height // 3 + 30
+        self.mouth_rect = (mouth_x - 32, mouth_y - 2, mouth_x + 33, mouth_y + MAX_MOUTH_OPEN + 3)
+        x0, y0 = self.mouth_rect[:2]
+
+        self.mouths = []
+        for level in range(MAX_MOUTH_OPEN + 1):
+            patch = self._crop(self.mouth_rect)
+            cv2.ellipse(patch, (mouth_x - x0, mouth_y - y0), (30, level), 0, 0, 180, features, -1)
+            self.mouths.append(patch)
+
+    def _crop(self, rect):
+        x0, y0, x1, y1 = rect
+        return self.base[y0:y1, x0:x1].copy()
+
+
+@lru_cache(maxsize=16)
+def get_avatar_template(width, height, avatar_type='default'):
+    """Shared, build-once template per (size, avatar type)"""
+    return AvatarTemplate(width, height, avatar_type)
+
+
+def wrap_caption(text, max_line_length=CAPTION_LINE_LENGTH):
+    """Split caption text into fixed-width lines"""
+    return [text[j:j + max_line_length] for j in range(0, len(text), max_line_length)]
+
+
+class AvatarRenderer:
+    """Render avatar frames into a single reused buffer.
+
+    Only the regions whose state changed since the previous frame (eyes,
+    mouth, caption lines) are blitted; everything else is left untouched.
+    """
+
+    def __init__(self, width, height, avatar_type='default'):
+        self.template = get_avatar_template(width, height, avatar_type)
+        self.frame = self.template.base.copy()
+        self.width, self.height = width, height
+
+        self._blink = None
+        self._mouth = None
+        self._lines = []
+
+    def render(self, mouth_open, blink, caption):
+        """Update the frame for this state and return it (BGR, uint8)"""
+        template = self.template
+
+        if blink != self._blink:
+            self._blit(template.eye_rect, template.eyes[blink])
+            self._blink = blink
+
+        mouth_open = int(min(max(mouth_open, 0), MAX_MOUTH_OPEN))
+        if mouth_open != self._mouth:
+            self._blit(template.mouth_rect, template.mouths[mouth_open])
+            self._mouth = mouth_open
+
+        lines = wrap_caption(caption)
+        if lines != self._lines:
+            self._draw_caption(lines)
+            self._lines = lines
+
+        return self.frame
+
+    def _blit(self, rect, patch):
+        x0, y0, x1, y1 = rect
+        self.frame[y0:y1, x0:x1] = patch
+
+    def _line_band(self, idx):
+        y_position = self.height - 100 + (idx * CAPTION_LINE_HEIGHT)
+        return y_position, max(0, y_position - 20), min(self.height, y_position + 10)
+
+    def _draw_caption(self, lines):
+        base = self.template.base
+        for idx in range(max(len(lines), len(self._lines))):
+            new_line = lines[idx] if idx < len(lines) else None
+            old_line = self._lines[idx] if idx < len(self._lines) else None
+            if new_line == old_line:
+                continue
+
+            # Restore this line's band from the static base, then redraw it
+            y_position, y0, y1 = self._line_band(idx)
+            if y0 >= y1:
+                continue
+            self.frame[y0:y1] = base[y0:y1]
+            if new_line:
+                cv2.putText(self.frame, new_line, (50, y_position), CAPTION_FONT,
+                            CAPTION_SCALE, (255, 255, 255), CAPTION_THICKNESS)
@@ -0,0 +1,87 @@
+import os
+from io import BytesIO
+from flask import current_app
+from PIL import Image
+
+from ai_content_platform.utils.disk_cache import get_cache, make_key
+
+# Model settings that change what a prompt renders to; part of every key
+DIFFUSION_SETTINGS = {
+    'model': 'runwayml/stable-diffusion-v1-5',
+    'steps': 50,
+    'guidance_scale': 7.5,
+}
+
+# Diffusion prompts by content type, so batches can prefetch what renders will ask for
+BACKGROUND_PROMPTS = {
+    'photo_quote': "Abstract background for quote: {}",
+    'video_reel': "Cinematic scene for video about: {}",
+    'voice_video': "Cinematic scene for video about: {}",
+}
+
+# Sizes used by the generators: quotes, landscape video and vertical video
+VARIANT_SIZES = [(1080, 1080), (1920, 1080), (1080, 1920)]
+
+
+def background_key(prompt, seed=None):
+    return make_key('background', prompt, seed=seed, **DIFFUSION_SETTINGS)
+
+
+def background_prompt(content_type, text):
+    return BACKGROUND_PROMPTS[content_type].format(text[:50])
+
+
+class BackgroundCache:
+    """Diffused backgrounds keyed by prompt and model settings.
+
+    The master image is stored once as PNG next to pre-scaled JPEG variants,
+    all inside a byte-capped DiskLRUCache, so a hit is a single image decode
+    with no diffusion and no resize.
+    """
+
+    def __init__(self, disk_cache):
+        self.disk_cache = disk_cache
+
+    def get_variant(self, key, size):
+        path = self.disk_cache.get(key, f"_{size[0]}x{size[1]}.jpg")
+        return self._open(path)
+
+    def get_master(self, key):
+        path = self.disk_cache.get(key, "_master.png")
+        return self._open(path)
+
+    def put_master(self, key, image, sizes=VARIANT_SIZES):
+        """Store the master image and pre-scale the standard variants"""
+        self._put_image(key, image, "_master.png", format="PNG")
+        for size in sizes:
+            self.put_variant(key, image, size)
+
+    def put_variant(self, key, master, size):
+        """Resize ``master`` to ``size``, store it and return the resized image"""
+        image = master if master.size == tuple(size) else master.resize(size, Image.LANCZOS)
+        self._put_image(key, image, f"_{size[0]}x{size[1]}.jpg", format="JPEG", quality=95)
+        return image
+
+    def _put_image(self, key, image, suffix, **save_args):
+        buffer = BytesIO()
+        image.save(buffer, **save_args)
+        self.disk_cache.put_bytes(key, buffer.getvalue(), suffix)
+
+    @staticmethod
+    def _open(path):
+        if path is None:
+            return None
+        try:
+            with Image.open(path) as image:
+                return image.convert('RGB')
+        except (OSError, ValueError) as e:
+            print(f"Error reading cached background {path}: {e}")
+            return None
+
+
+def get_background_cache():
+    """The shared background cache for the current app"""
+    directory = current_app.config.get('BACKGROUND_CACHE_DIR') or \
+        os.path.join(current_app.config['UPLOAD_FOLDER'], 'background_cache')
+    max_bytes = current_app.config.get('BACKGROUND_CACHE_MAX_MB', 1024) * 1024 * 1024
+    return BackgroundCache(get_cache(directory, max_bytes))
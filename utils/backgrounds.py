@@ -0,0 +1,170 @@
+import numpy as np
+
+# Resolution of the colour lookup table used to map gradient positions to colours
+LUT_SIZE = 1024
+
+STYLES = ('linear', 'radial', 'noise')
+
+
+def random_colors(rng, count=2):
+    """Pick ``count`` random RGB colours from a numpy Generator"""
+    return [tuple(int(c) for c in rng.integers(0, 256, size=3)) for _ in range(count)]
+
+
+def _normalize_stops(stops):
+    """Accept a list of colours or (position, colour) pairs and return sorted arrays"""
+    if not stops:
+        raise ValueError("At least one colour stop is required")
+
+    if isinstance(stops[0][0], (int, np.integer)) and len(stops[0]) == 3:
+        # Plain colours, spread evenly between 0 and 1
+        positions = np.linspace(0.0, 1.0, len(stops)) if len(stops) > 1 else np.zeros(1)
+        colors = np.array(stops, dtype=np.float32)
+    else:
+        stops = sorted(stops, key=lambda stop: stop[0])
+        positions = np.array([stop[0] for stop in stops], dtype=np.float32)
+        colors = np.array([stop[1] for stop in stops], dtype=np.float32)
+
+    return positions, colors
+
+
+def color_lut(stops, size=LUT_SIZE, dtype=np.float32):
+    """Build a (size, 3) table that interpolates the colour stops"""
+    positions, colors = _normalize_stops(stops)
+    t = np.linspace(0.0, 1.0, size, dtype=np.float32)
+    lut = np.stack([np.interp(t, positions, colors[:, c]) for c in range(3)], axis=-1)
+    if np.issubdtype(dtype, np.integer):
+        lut = np.rint(lut)
+    return lut.astype(dtype)
+
+
+def _apply_lut(t, lut):
+    """Map an array of positions in [0, 1] to colours through the lookup table"""
+    index = np.clip(t, 0.0, 1.0)
+    index = (index * (len(lut) - 1) + 0.5).astype(np.intp)
+    return lut[index]
+
+
+def linear_gradient(width, height, stops, angle=90.0, dtype=np.float32):
+    """Linear multi-stop gradient as a (height, width, 3) array.
+
+    ``angle`` is in degrees: 0 runs left to right, 90 top to bottom.
+    Axis-aligned gradients come back as a read-only broadcast view.
+    """
+    lut = color_lut(stops, dtype=dtype)
+    theta = np.deg2rad(angle)
+    dx, dy = np.cos(theta), np.sin(theta)
+
+    # Vertical and horizontal gradients only vary along one axis, so compute
+    # a single row/column and let broadcasting fill the rest
+    if abs(dx) < 1e-9:
+        t = np.arange(height, dtype=np.float32) / max(1, height - 1)
+        if dy < 0:
+            t = 1.0 - t
+        return np.broadcast_to(_apply_lut(t, lut)[:, None, :], (height, width, 3))
+    if abs(dy) < 1e-9:
+        t = np.arange(width, dtype=np.float32) / max(1, width - 1)
+        if dx < 0:
+            t = 1.0 - t
+        return np.broadcast_to(_apply_lut(t, lut)[None, :, :], (height, width, 3))
+
+    xs = np.arange(width, dtype=np.float32)[None, :] * dx
+    ys = np.arange(height, dtype=np.float32)[:, None] * dy
+    projection = xs + ys
+    low, high = projection.min(), projection.max()
+    t = (projection - low) / max(high - low, 1e-9)
+    return _apply_lut(t, lut)
+
+
+def radial_gradient(width, height, stops, center=(0.5, 0.5), radius=None, dtype=np.float32):
+    """Radial multi-stop gradient as a (height, width, 3) array.
+
+    ``center`` is relative to the image size; ``radius`` is in pixels and
+    defaults to the distance to the farthest corner.
+    """
+    lut = color_lut(stops, dtype=dtype)
+    cx, cy = center[0] * (width - 1), center[1] * (height - 1)
+    if radius is None:
+        radius = max(np.hypot(x - cx, y - cy) for x in (0, width - 1) for y in (0, height - 1))
+
+    dx = (np.arange(width, dtype=np.float32) - cx)[None, :]
+    dy = (np.arange(height, dtype=np.float32) - cy)[:, None]
+    t = np.sqrt(dx * dx + dy * dy) / max(radius, 1e-9)
+    return _apply_lut(t, lut)
+
+
+def _upsample_bilinear(grid, width, height):
+    """Bilinearly resize a small 2D grid to (height, width) with broadcasting"""
+    grid_h, grid_w = grid.shape
+    ys = np.linspace(0, grid_h - 1, height, dtype=np.float32)
+    xs = np.linspace(0, grid_w - 1, width, dtype=np.float32)
+
+    y0 = np.minimum(ys.astype(np.intp), grid_h - 2)
+    x0 = np.minimum(xs.astype(np.intp), grid_w - 2)
+    wy = (ys - y0)[:, None]
+    wx = (xs - x0)[None, :]
+
+    # Separable: interpolate the few grid rows along x, then expand along y
+    rows = grid[:, x0] + (grid[:, x0 + 1] - grid[:, x0]) * wx
+    top = rows[y0]
+    return top + (rows[y0 + 1] - top) * wy
+
+
+def noise_texture(width, height, seed=None, scale=128, octaves=4, persistence=0.5):
+    """Smooth fractal value noise in [0, 1] as a float32 (height, width) array.
+
+    ``scale`` is the feature size of the first octave in pixels; each further
+    octave halves it and is weighted by ``persistence``.
+    """
+    rng = np.random.default_rng(seed)
+    noise = np.zeros((height, width), dtype=np.float32)
+    amplitude, total = 1.0, 0.0
+
+    for _ in range(octaves):
+        cells_x = max(2, int(np.ceil(width / scale)) + 1)
+        cells_y = max(2, int(np.ceil(height / scale)) + 1)
+        grid = rng.random((cells_y, cells_x), dtype=np.float32)
+        noise += amplitude * _upsample_bilinear(grid, width, height)
+
+        total += amplitude
+        amplitude *= persistence
+        scale = max(2, scale // 2)
+
+    return noise / total
+
+
+def render_background(width=1080, height=1080, style='linear', colors=None, seed=None,
+                      angle=90.0, noise=0.0):
+    """Render a procedural background as a uint8 (height, width, 3) RGB array.
+
+    ``colors`` are gradient stops (colours or (position, colour) pairs); random
+    ones are drawn from ``seed`` when omitted. ``noise`` blends in a grain/cloud
+    texture with the given strength (0 to 1). The same seed and arguments always
+    produce the same image.
+    """
+    if style not in STYLES:
+        raise ValueError(f"Unknown background style: {style}")
+
+    rng = np.random.default_rng(seed)
+    if colors is None:
+        colors = random_colors(rng, 3 if style == 'noise' else 2)
+
+    # Without a grain pass the colours can be looked up as uint8 straight away
+    dtype = np.float32 if noise > 0 else np.uint8
+
+    if style == 'linear':
+        image = linear_gradient(width, height, colors, angle=angle, dtype=dtype)
+    elif style == 'radial':
+        image = radial_gradient(width, height, colors, dtype=dtype)
+    else:
+        # Colour the noise field itself through the gradient stops
+        texture = noise_texture(width, height, seed=rng.integers(2**32))
+        image = _apply_lut(texture, color_lut(colors, dtype=dtype))
+
+    if noise <= 0:
+        return np.ascontiguousarray(image)
+
+    texture = noise_texture(width, height, seed=rng.integers(2**32), scale=32, octaves=3)
+    shade = (1.0 - noise) + (2.0 * noise) * texture
+    image = image * shade[:, :, None]
+    return np.clip(image, 0, 255).astype(np.uint8)
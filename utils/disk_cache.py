@@ -0,0 +1,214 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+
+# Sidecar whose mtime records when a cache entry was last used
+USED_SUFFIX = '.used'
+
+
+def make_key(*parts, **fields):
+    """Canonical SHA-256 key for a set of JSON-serializable values"""
+    payload = json.dumps([parts, fields], sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def file_digest(path, chunk_size=1024 * 1024):
+    """SHA-256 of a file's contents, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def link_or_copy(source_path, target_path):
+    """Hard-link ``source_path`` to ``target_path``, copying across filesystems"""
+    if os.path.exists(target_path):
+        os.remove(target_path)
+    try:
+        os.link(source_path, target_path)
+    except OSError:
+        shutil.copyfile(source_path, target_path)
+
+
+class DiskLRUCache:
+    """Files on disk addressed by key, with a byte budget and LRU eviction.
+
+    Entries are stored as ``<directory>/<key[:2]>/<key><suffix>``. Recency is
+    tracked through the mtime of an empty ``<entry>.used`` sidecar, so the
+    order survives restarts and is shared (approximately) by every process
+    using the same directory. Entries are hard-linked into place, and touching
+    them directly would change the mtime of every output linked to them.
+    """
+
+    def __init__(self, directory, max_bytes):
+        self.directory = str(directory)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._index = None  # path -> size, least recently used first
+
+    def path_for(self, key, suffix=''):
+        return os.path.join(self.directory, key[:2], f"{key}{suffix}")
+
+    def get(self, key, suffix=''):
+        """Return the cached file path for ``key`` or None, counting the hit/miss"""
+        path = self.path_for(key, suffix)
+        with self._lock:
+            index = self._load_index()
+            try:
+                size = os.path.getsize(path)
+            except OSError:
+                index.pop(path, None)
+                self.misses += 1
+                return None
+
+            # Added by another process if it is not indexed yet
+            index[path] = size
+            index.move_to_end(path)
+            self._touch(path)
+            self.hits += 1
+            return path
+
+    def put(self, key, source_path, suffix='', move=False):
+        """Store a copy of ``source_path`` under ``key`` and return the cached path"""
+        path = self.path_for(key, suffix)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # Write to a temp file next to the target, then rename atomically
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        os.close(fd)
+        try:
+            if move:
+                shutil.move(source_path, tmp_path)
+            else:
+                link_or_copy(source_path, tmp_path)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        self._record(path)
+        return path
+
+    def put_bytes(self, key, data, suffix=''):
+        """Store raw bytes under ``key`` and return the cached path"""
+        path = self.path_for(key, suffix)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+        self._record(path)
+        return path
+
+    def fetch(self, key, target_path, suffix=''):
+        """Link the cached file for ``key`` to ``target_path``; True on a hit"""
+        cached_path = self.get(key, suffix)
+        if cached_path is None:
+            return False
+        try:
+            link_or_copy(cached_path, target_path)
+        except OSError as e:
+            print(f"Error linking cached file {cached_path}: {e}")
+            return False
+        return True
+
+    def size(self):
+        with self._lock:
+            return sum(self._load_index().values())
+
+    def stats(self):
+        with self._lock:
+            index = self._load_index()
+            requests = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / requests if requests else 0.0,
+                'evictions': self.evictions,
+                'entries': len(index),
+                'bytes': sum(index.values()),
+                'max_bytes': self.max_bytes,
+            }
+
+    def clear(self):
+        with self._lock:
+            shutil.rmtree(self.directory, ignore_errors=True)
+            self._index = OrderedDict()
+
+    def _record(self, path):
+        with self._lock:
+            index = self._load_index()
+            index[path] = os.path.getsize(path)
+            index.move_to_end(path)
+            self._touch(path)
+            self._evict(keep=path)
+
+    def _touch(self, path):
+        """Mark ``path`` as just used by updating its sidecar's mtime"""
+        try:
+            with open(path + USED_SUFFIX, 'a'):
+                pass
+            os.utime(path + USED_SUFFIX)
+        except OSError:
+            pass
+
+    def _load_index(self):
+        if self._index is None:
+            entries = []
+            for root, _, files in os.walk(self.directory):
+                for name in files:
+                    if name.endswith(('.tmp', USED_SUFFIX)):
+                        continue
+                    path = os.path.join(root, name)
+                    stat = os.stat(path)
+                    try:
+                        used = os.path.getmtime(path + USED_SUFFIX)
+                    except OSError:
+                        used = stat.st_mtime
+                    entries.append((used, path, stat.st_size))
+            entries.sort()
+            self._index = OrderedDict((path, size) for _, path, size in entries)
+        return self._index
+
+    def _evict(self, keep=None):
+        if not self.max_bytes:
+            return
+        total = sum(self._index.values())
+        for path in list(self._index):
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            total -= self._index.pop(path)
+            self.evictions += 1
+            for stale_path in (path, path + USED_SUFFIX):
+                try:
+                    os.remove(stale_path)
+                except OSError:
+                    pass
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_cache(directory, max_bytes):
+    """Process-wide DiskLRUCache for ``directory`` (one instance per directory)"""
+    directory = os.path.abspath(str(directory))
+    with _caches_lock:
+        cache = _caches.get(directory)
+        if cache is None:
+            cache = _caches[directory] = DiskLRUCache(directory, max_bytes)
+        cache.max_bytes = max_bytes
+        return cache
@@ -0,0 +1,598 @@
+import contextvars
+import heapq
+import itertools
+import os
+import subprocess
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+import numpy as np
+from PIL import Image
+from flask import current_app, has_app_context
+
+from ai_content_platform.utils.metrics import metrics, observe_stage
+
+try:
+    import fcntl
+except ImportError:  # Windows: the limit is per process only
+    fcntl = None
+
+# Queue priorities; lower runs first
+PRIORITY_HIGH = 0  # short, user-facing work such as thumbnails
+PRIORITY_NORMAL = 10
+
+# Cancel event of the job running in this thread (see cancel_on)
+_cancel_event = contextvars.ContextVar('ffmpeg_cancel_event', default=None)
+
+
+class FFmpegError(RuntimeError):
+    """ffmpeg exited with an error"""
+
+
+class FFmpegTimeout(FFmpegError):
+    """ffmpeg ran (or waited for a slot) longer than allowed and was stopped"""
+
+
+class FFmpegCancelled(FFmpegError):
+    """ffmpeg was stopped because its cancel event was set"""
+
+
+@contextmanager
+def cancel_on(event):
+    """Stop every ffmpeg started inside the block (in this thread) once ``event`` is set"""
+    token = _cancel_event.set(event)
+    try:
+        yield
+    finally:
+        _cancel_event.reset(token)
+
+
+def current_cancel_event():
+    return _cancel_event.get()
+
+
+def default_max_processes():
+    """One encoder per two cores: x264 is multi-threaded itself"""
+    return max(1, (os.cpu_count() or 2) // 2)
+
+
+class FFmpegProcess:
+    """A running ffmpeg holding one executor slot until it is waited for or killed.
+
+    A watchdog thread kills the process when its timeout passes or its cancel
+    event is set; wait() then raises FFmpegTimeout or FFmpegCancelled.
+    """
+
+    def __init__(self, executor, process, slot, cmd, timeout=None, cancel_event=None, stderr=None):
+        self.executor = executor
+        self.process = process
+        self.cmd = cmd
+        self.stderr = stderr  # file that collects ffmpeg's stderr
+        self._slot = slot
+        self._stopped = None  # 'timeout' or 'cancelled' once the watchdog kills it
+        self._done = threading.Event()
+        if timeout or cancel_event is not None:
+            deadline = time.monotonic() + timeout if timeout else None
+            threading.Thread(target=self._watch, args=(deadline, cancel_event), daemon=True).start()
+
+    @property
+    def stdin(self):
+        return self.process.stdin
+
+    @property
+    def stdout(self):
+        return self.process.stdout
+
+    def _watch(self, deadline, cancel_event):
+        while not self._done.wait(0.1):
+            if cancel_event is not None and cancel_event.is_set():
+                self._stopped = 'cancelled'
+            elif deadline is not None and time.monotonic() > deadline:
+                self._stopped = 'timeout'
+            else:
+                continue
+            self.process.kill()
+            return
+
+    def error_output(self):
+        if self.stderr is None:
+            return ''
+        self.stderr.seek(0)
+        return self.stderr.read().decode(errors="replace").strip()
+
+    def wait(self):
+        """Wait for ffmpeg to exit and free the slot; raises FFmpegError on failure"""
+        try:
+            returncode = self.process.wait()
+            error_output = self.error_output() if returncode != 0 else ''
+        finally:
+            self._release()
+
+        if self._stopped == 'timeout':
+            raise FFmpegTimeout(f"ffmpeg timed out: {' '.join(self.cmd[:8])} ...")
+        if self._stopped == 'cancelled':
+            raise FFmpegCancelled("ffmpeg was cancelled")
+        if returncode != 0:
+            raise FFmpegError(f"ffmpeg exited with code {returncode}: {error_output[-2000:]}")
+        return returncode
+
+    def kill(self):
+        """Stop ffmpeg right away and free the slot"""
+        if self.process.poll() is None:
+            self.process.kill()
+        self.process.wait()
+        self._release()
+
+    def _release(self):
+        if self._done.is_set():
+            return
+        self._done.set()
+        if self.stderr is not None:
+            self.stderr.close()
+        self.executor._release(self._slot, self)
+
+
+class FFmpegExecutor:
+    """Runs every ffmpeg process under one host-wide concurrency limit.
+
+    Slots are lock files (flock) in ``lock_dir``, so gunicorn workers and the
+    render pool's processes share the same ``max_processes`` limit. Within a
+    process, waiters are served by priority, then first come first served.
+    """
+
+    def __init__(self, max_processes=None, lock_dir=None, timeout=None, queue_timeout=None):
+        self._cond = threading.Condition()
+        self._waiting = []  # heap of (priority, sequence)
+        self._sequence = itertools.count()
+        self._running = set()
+        self._local_slots = set()
+        self.applied = None  # app config last applied by get_executor()
+        self.configure(max_processes, lock_dir, timeout, queue_timeout)
+
+    def configure(self, max_processes=None, lock_dir=None, timeout=None, queue_timeout=None):
+        """``timeout`` and ``queue_timeout`` are defaults in seconds (None = no limit)"""
+        with self._cond:
+            self.max_processes = max_processes or default_max_processes()
+            self.lock_dir = lock_dir or os.path.join(tempfile.gettempdir(), 'ai_content_platform_ffmpeg')
+            self.timeout = timeout
+            self.queue_timeout = queue_timeout
+
+    def settings(self):
+        """Arguments that recreate this configuration (e.g. in a spawned worker)"""
+        return {'max_processes': self.max_processes, 'lock_dir': self.lock_dir,
+                'timeout': self.timeout, 'queue_timeout': self.queue_timeout}
+
+    def running(self):
+        with self._cond:
+            return len(self._running)
+
+    def _try_slot(self):
+        """Claim a free slot; returns (index, lock file or None) or None when all are taken"""
+        for index in range(self.max_processes):
+            if index in self._local_slots:
+                continue
+            if fcntl is None:
+                return index, None
+            os.makedirs(self.lock_dir, exist_ok=True)
+            handle = open(os.path.join(self.lock_dir, f"slot_{index}.lock"), 'a+')
+            try:
+                fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                handle.close()
+                continue
+            return index, handle
+        return None
+
+    def _acquire(self, priority, queue_timeout):
+        deadline = time.monotonic() + queue_timeout if queue_timeout else None
+        start = time.perf_counter()
+        with self._cond:
+            ticket = (priority, next(self._sequence))
+            heapq.heappush(self._waiting, ticket)
+            try:
+                while True:
+                    if self._waiting[0] == ticket:
+                        slot = self._try_slot()
+                        if slot is not None:
+                            self._local_slots.add(slot[0])
+                            break
+                    if deadline is not None and time.monotonic() > deadline:
+                        raise FFmpegTimeout(f"No ffmpeg slot free after {queue_timeout}s")
+                    # Slots held by other processes free up without a notify, so poll
+                    self._cond.wait(0.05)
+            finally:
+                self._waiting.remove(ticket)
+                heapq.heapify(self._waiting)
+                self._cond.notify_all()
+        observe_stage('ffmpeg_queue', time.perf_counter() - start)
+        return slot
+
+    def _release(self, slot, process):
+        index, handle = slot
+        if handle is not None:
+            handle.close()  # drops the flock
+        with self._cond:
+            self._local_slots.discard(index)
+            self._running.discard(process)
+            self._cond.notify_all()
+
+    def popen(self, cmd, stdin=None, stdout=None, priority=PRIORITY_NORMAL, timeout=None,
+              queue_timeout=None, cancel_event=None):
+        """Start ffmpeg once a slot is free; stderr is collected for error messages.
+
+        Returns an FFmpegProcess; call its wait() (or kill()) to free the slot.
+        ``cancel_event`` defaults to the one set by cancel_on().
+        """
+        timeout = self.timeout if timeout is None else timeout
+        if cancel_event is None:
+            cancel_event = _cancel_event.get()
+        slot = self._acquire(priority, self.queue_timeout if queue_timeout is None else queue_timeout)
+        # stderr goes to a temp file so a chatty ffmpeg can never block on a full pipe
+        stderr = tempfile.TemporaryFile()
+        try:
+            process = subprocess.Popen(cmd, stdin=stdin, stdout=stdout, stderr=stderr)
+        except Exception:
+            stderr.close()
+            self._release(slot, None)
+            raise
+        handle = FFmpegProcess(self, process, slot, cmd, timeout=timeout, cancel_event=cancel_event,
+                               stderr=stderr)
+        with self._cond:
+            self._running.add(handle)
+        return handle
+
+    def run(self, cmd, capture_output=False, progress=None, duration=None, **options):
+        """Run ffmpeg to completion; returns its stdout when ``capture_output`` is set.
+
+        With ``progress`` and ``duration`` (seconds of output expected), ffmpeg
+        reports its position on stdout and ``progress(fraction)`` is called as
+        it advances. Other options are as for popen().
+        """
+        if progress is not None and duration:
+            cmd = cmd[:1] + ["-progress", "pipe:1", "-nostats"] + cmd[1:]
+        process = self.popen(cmd, stdin=subprocess.DEVNULL,
+                             stdout=subprocess.PIPE if capture_output or progress else subprocess.DEVNULL,
+                             **options)
+        try:
+            if capture_output:
+                output = process.stdout.read()
+            elif progress is not None and duration:
+                output = None
+                for line in process.stdout:
+                    if line.startswith(b"out_time_us="):
+                        try:
+                            progress(min(1.0, int(line.split(b"=", 1)[1]) / 1e6 / duration))
+                        except ValueError:
+                            pass  # N/A before the first frame
+            else:
+                output = None
+        except BaseException:
+            process.kill()
+            raise
+        process.wait()
+        return output
+
+    def kill_all(self):
+        """Stop every ffmpeg this process started (e.g. on shutdown)"""
+        with self._cond:
+            running = list(self._running)
+        for process in running:
+            process.kill()
+
+
+ffmpeg_executor = FFmpegExecutor()
+
+metrics.gauge('ffmpeg_processes_running', 'ffmpeg processes started by this worker that are still running.',
+              callback=lambda: {(): ffmpeg_executor.running()})
+
+
+def configure_ffmpeg(settings):
+    """Apply executor settings (as from settings()); the initializer of spawned render workers"""
+    ffmpeg_executor.configure(**settings)
+
+
+def get_executor():
+    """The shared executor, updated from the app config when called inside an app context"""
+    if has_app_context():
+        settings = {
+            'max_processes': current_app.config.get('FFMPEG_MAX_PROCESSES', 0) or None,
+            'lock_dir': current_app.config.get('FFMPEG_LOCK_DIR'),
+            'timeout': current_app.config.get('FFMPEG_TIMEOUT') or None,
+            'queue_timeout': current_app.config.get('FFMPEG_QUEUE_TIMEOUT') or None,
+        }
+        if settings != ffmpeg_executor.applied:
+            ffmpeg_executor.configure(**settings)
+            ffmpeg_executor.applied = settings
+    return ffmpeg_executor
+
+
+def run_ffmpeg(cmd, **options):
+    """Run an ffmpeg command to completion through the shared executor, raising FFmpegError on failure"""
+    get_executor().run(cmd, **options)
+
+
+def decode_audio(audio_path, sample_rate=16000):
+    """Decode any audio file to mono float32 samples in [-1, 1] through an ffmpeg pipe"""
+    cmd = ["ffmpeg", "-nostdin", "-loglevel", "error", "-i", audio_path,
+           "-f", "f32le", "-ac", "1", "-ar", str(sample_rate), "-"]
+    return np.frombuffer(get_executor().run(cmd, capture_output=True), dtype=np.float32)
+
+
+def concat_segments(segment_paths, output_path, audio_path=None, durations=None):
+    """Join encoded segments with the concat demuxer, without re-encoding the video
+
+    ``durations`` (seconds per segment) pins where each segment starts; without
+    them the demuxer trusts the container, which can be short by a frame for
+    variable-frame-rate segments.
+    """
+    list_path = os.path.join(os.path.dirname(segment_paths[0]), "segments.txt")
+    with open(list_path, "w") as f:
+        for i, path in enumerate(segment_paths):
+            escaped = os.path.abspath(path).replace("'", "'\\''")
+            f.write(f"file '{escaped}'\n")
+            if durations is not None:
+                f.write(f"duration {durations[i]:.6f}\n")
+
+    cmd = ["ffmpeg", "-y", "-loglevel", "error", "-nostats",
+           "-f", "concat", "-safe", "0", "-i", list_path]
+    if audio_path:
+        cmd += ["-i", audio_path, "-map", "0:v", "-map", "1:a",
+                "-c:v", "copy", "-c:a", "aac", "-shortest"]
+    else:
+        cmd += ["-c", "copy"]
+    cmd += FASTSTART_ARGS
+    cmd.append(output_path)
+
+    run_ffmpeg(cmd)
+    return output_path
+
+
+# Put the MP4 index before the media data, so playback starts before the download ends
+FASTSTART_ARGS = ["-movflags", "+faststart"]
+
+# libx264 settings used unless a content type or the config overrides them
+DEFAULT_ENCODER_SETTINGS = {'preset': 'medium', 'crf': 23, 'tune': None, 'threads': 0}
+
+
+def x264_args(settings=None):
+    """ffmpeg options for libx264 from a settings dict (preset, crf, tune, threads)"""
+    settings = dict(DEFAULT_ENCODER_SETTINGS, **(settings or {}))
+    args = ["-c:v", "libx264", "-preset", str(settings['preset']), "-crf", str(settings['crf'])]
+    if settings.get('tune'):
+        args += ["-tune", str(settings['tune'])]
+    if settings.get('threads'):
+        args += ["-threads", str(settings['threads'])]
+    return args
+
+
+def hold_filter(frame_starts, fps):
+    """setpts filter that places the n-th written frame at ``frame_starts[n]``.
+
+    Only frames that differ from their predecessor are written; each one is
+    shown until the next one's timestamp, so a run of identical frames costs
+    a single render, pipe write and encode. The timestamp is the frame index
+    plus the frames skipped before it, looked up in a balanced tree of
+    ``if(lt(N,j),...)`` so each frame costs O(log holds) to evaluate. Long
+    videos have thousands of holds: pass the filter in a script file
+    (see write_hold_script), not on the command line.
+    """
+    starts, offsets = [0], [0]
+    for j in range(1, len(frame_starts)):
+        skip = frame_starts[j] - frame_starts[j - 1] - 1
+        if skip:
+            starts.append(j)
+            offsets.append(offsets[-1] + skip)
+    return f"setpts='(N+{_offset_tree(starts, offsets, 0, len(starts))})/({fps}*TB)'"
+
+
+def _offset_tree(starts, offsets, lo, hi):
+    """Expression for the offset of frame N, given the intervals starts[lo:hi]"""
+    if hi - lo == 1:
+        return str(offsets[lo])
+    mid = (lo + hi) // 2
+    return (f"if(lt(N,{starts[mid]}),{_offset_tree(starts, offsets, lo, mid)},"
+            f"{_offset_tree(starts, offsets, mid, hi)})")
+
+
+def write_hold_script(frame_starts, fps, output_path):
+    """Write hold_filter to a filter script next to ``output_path`` and return its path"""
+    fd, path = tempfile.mkstemp(suffix='.filter', dir=os.path.dirname(output_path) or None)
+    with os.fdopen(fd, 'w') as f:
+        f.write(hold_filter(frame_starts, fps))
+    return path
+
+
+def build_encode_command(output_path, fps, input_args, audio_path=None, settings=None, hold_script=None):
+    """Build the ffmpeg argument list for an H.264 encode of the given video input
+
+    With ``hold_script`` (see write_hold_script) the input holds only the
+    distinct frames and the output is variable frame rate.
+    """
+    cmd = ["ffmpeg", "-y", "-loglevel", "error", "-nostats"]
+    cmd += input_args
+
+    if audio_path:
+        cmd += ["-i", audio_path]
+
+    cmd += x264_args(settings) + ["-pix_fmt", "yuv420p"]
+    if hold_script is not None:
+        cmd += ["-filter_script:v", hold_script, "-fps_mode", "vfr"]
+    else:
+        cmd += ["-r", str(fps)]
+
+    if audio_path:
+        cmd += ["-c:a", "aac", "-shortest"]
+
+    cmd += FASTSTART_ARGS
+    cmd.append(output_path)
+    return cmd
+
+
+
+def crop_scale_filter(crop_width, crop_height, width, height):
+    """Centre crop to crop_width x crop_height, then scale to width x height"""
+    return f"crop={crop_width}:{crop_height},scale={width}:{height}"
+
+
+def build_split_command(input_path, outputs, settings=None):
+    """ffmpeg arguments that decode ``input_path`` once and encode one H.264 file per output.
+
+    ``outputs`` is a list of ``(output_path, video_filter)``; the decoded
+    frames are split between the filters. Audio is copied and timestamps are
+    passed through, so variable-frame-rate holds stay holds.
+    """
+    labels = [f"v{k}" for k in range(len(outputs))]
+    graph = f"[0:v]split={len(outputs)}" + "".join(f"[s{k}]" for k in range(len(outputs)))
+    for k, (_, video_filter) in enumerate(outputs):
+        graph += f";[s{k}]{video_filter}[{labels[k]}]"
+
+    cmd = ["ffmpeg", "-y", "-loglevel", "error", "-nostats", "-i", input_path, "-filter_complex", graph]
+    for label, (output_path, _) in zip(labels, outputs):
+        cmd += ["-map", f"[{label}]", "-map", "0:a?"]
+        cmd += x264_args(settings) + ["-pix_fmt", "yuv420p", "-fps_mode", "passthrough", "-c:a", "copy"]
+        cmd += FASTSTART_ARGS
+        cmd.append(output_path)
+    return cmd
+
+
+def build_hls_command(input_path, output_dir, variants, settings=None, audio=False, segment_seconds=2):
+    """ffmpeg arguments that package ``input_path`` as adaptive HLS in one decode.
+
+    ``variants`` is a list of ``(height, max kbit/s)``; each is encoded as
+    capped CRF with a keyframe every ``segment_seconds`` so segments start on
+    one and players can switch between variants at any boundary. Writes
+    ``output_dir/master.m3u8`` and a playlist and segments per variant in
+    ``output_dir/<index>/``.
+    """
+    graph = f"[0:v]split={len(variants)}" + "".join(f"[s{k}]" for k in range(len(variants)))
+    for k, (height, _) in enumerate(variants):
+        graph += f";[s{k}]scale=w=-2:h={height}[v{k}]"
+
+    cmd = ["ffmpeg", "-y", "-loglevel", "error", "-nostats", "-i", input_path, "-filter_complex", graph]
+    for k in range(len(variants)):
+        cmd += ["-map", f"[v{k}]"] + (["-map", "0:a"] if audio else [])
+    cmd += x264_args(settings) + ["-pix_fmt", "yuv420p", "-fps_mode", "passthrough",
+                                  "-force_key_frames", f"expr:gte(t,n_forced*{segment_seconds})"]
+    for k, (_, kbps) in enumerate(variants):
+        cmd += [f"-maxrate:v:{k}", f"{kbps}k", f"-bufsize:v:{k}", f"{2 * kbps}k"]
+    if audio:
+        cmd += ["-c:a", "copy"]
+
+    stream_map = " ".join(f"v:{k},a:{k}" if audio else f"v:{k}" for k in range(len(variants)))
+    cmd += ["-f", "hls", "-hls_time", str(segment_seconds), "-hls_playlist_type", "vod",
+            "-hls_flags", "independent_segments",
+            "-hls_segment_filename", os.path.join(output_dir, "%v", "segment_%03d.ts"),
+            "-master_pl_name", "master.m3u8", "-var_stream_map", stream_map,
+            os.path.join(output_dir, "%v", "index.m3u8")]
+    return cmd
+
+class FFmpegPipeWriter:
+    """Stream raw frames into a long-lived ffmpeg process through its stdin.
+
+    Frames are written as uncompressed buffers, so there is no temp directory
+    and no intermediate JPEG encode. Use as a context manager; the encode is
+    finalized when the block exits.
+    """
+
+    def __init__(self, output_path, width, height, fps, audio_path=None, pix_fmt="rgb24",
+                 settings=None, frame_starts=None):
+        self.output_path = output_path
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.audio_path = audio_path
+        self.pix_fmt = pix_fmt
+        self.settings = settings
+        self.frame_starts = frame_starts  # timeline position of each written frame, None for every frame
+        self.frame_count = 0
+        self._process = None
+        self._hold_script = None
+
+    def open(self):
+        input_args = [
+            "-f", "rawvideo",
+            "-pix_fmt", self.pix_fmt,
+            "-s", f"{self.width}x{self.height}",
+            "-r", str(self.fps),
+            "-i", "-",
+        ]
+        if self.frame_starts is not None:
+            self._hold_script = write_hold_script(self.frame_starts, self.fps, self.output_path)
+        cmd = build_encode_command(self.output_path, self.fps, input_args, self.audio_path,
+                                   settings=self.settings, hold_script=self._hold_script)
+        try:
+            self._process = get_executor().popen(cmd, stdin=subprocess.PIPE)
+        except Exception:
+            self._remove_hold_script()
+            raise
+        return self
+
+    def write(self, frame):
+        """Write one frame (PIL image, numpy array or raw bytes) to the encoder"""
+        if isinstance(frame, Image.Image):
+            data = frame.tobytes()
+        elif isinstance(frame, np.ndarray):
+            data = np.ascontiguousarray(frame).data
+        else:
+            data = frame
+
+        try:
+            self._process.stdin.write(data)
+        except BrokenPipeError:
+            # ffmpeg exited early (or was stopped); raise its error instead.
+            # abort() has no process left to kill, so drop the output here.
+            process, self._process = self._process, None
+            try:
+                process.wait()
+            finally:
+                self._remove_hold_script()
+                self._remove_output()
+            raise
+        self.frame_count += 1
+
+    def close(self):
+        """Flush the pipe and wait for ffmpeg to finish the file"""
+        if self._process is None:
+            return
+        try:
+            self._process.stdin.close()
+        except BrokenPipeError:
+            pass
+        process, self._process = self._process, None
+        try:
+            process.wait()
+        except BaseException:
+            # Failed, timed out or cancelled while finishing: the file is incomplete
+            self._remove_output()
+            raise
+        finally:
+            self._remove_hold_script()
+
+    def abort(self):
+        """Kill the encoder and drop the partial output"""
+        if self._process is None:
+            return
+        self._process.kill()
+        self._process = None
+        self._remove_hold_script()
+        self._remove_output()
+
+    def _remove_output(self):
+        if os.path.exists(self.output_path):
+            os.remove(self.output_path)
+
+    def _remove_hold_script(self):
+        if self._hold_script and os.path.exists(self._hold_script):
+            os.remove(self._hold_script)
+        self._hold_script = None
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
@@ -1,24 +1,58 @@
 import os
-import random
 from PIL import Image, ImageDraw, ImageFont
-import numpy as np
 from flask import current_app
 
+from ai_content_platform.utils.model_registry import get_model
+from ai_content_platform.utils.backgrounds import render_background
+from ai_content_platform.utils.background_cache import (
+    get_background_cache, background_key, background_prompt, BACKGROUND_PROMPTS, DIFFUSION_SETTINGS, VARIANT_SIZES)
+from ai_content_platform.utils.render_cache import render_key, seed_from_key, fetch_render, store_render
+from ai_content_platform.utils.metrics import timed, count_fallback, count_cache_lookup
+
 # Mock function for Stable Diffusion
 # In a production environment, this would use the actual Stable Diffusion model
-def generate_background(prompt, output_path):
-    """Generate a background image based on a text prompt using Stable Diffusion"""
+def diffuse_background(prompt, seed=None):
+    """Run Stable Diffusion for a prompt and return the PIL image (raises if unavailable)"""
+    return diffuse_backgrounds([prompt], [seed], batch_size=1)[0]
+
+def diffuse_backgrounds(prompts, seeds=None, batch_size=None):
+    """Run Stable Diffusion for several prompts, ``batch_size`` prompts per pipeline call
+    
+    Each prompt gets its own seeded generator, so a batched image matches the
+    one a single call with the same seed would produce.
+    """
+    # Get the shared pipeline (loaded once per process)
+    pipe = get_model('stable-diffusion')
+    if batch_size is None:
+        batch_size = current_app.config.get('DIFFUSION_BATCH_SIZE', 4)
+    seeds = list(seeds) if seeds is not None else [None] * len(prompts)
+    settings = {
+        'num_inference_steps': DIFFUSION_SETTINGS['steps'],
+        'guidance_scale': DIFFUSION_SETTINGS['guidance_scale'],
+    }
+    
+    images = []
+    for start in range(0, len(prompts), batch_size):
+        batch_prompts = list(prompts[start:start + batch_size])
+        batch_seeds = seeds[start:start + batch_size]
+        if all(seed is not None for seed in batch_seeds):
+            import torch
+            settings['generator'] = [
+                torch.Generator(device=pipe.device).manual_seed(seed) for seed in batch_seeds]
+        else:
+            settings.pop('generator', None)
+        images.extend(pipe(batch_prompts, **settings).images)
+    return images
+
+def generate_background(prompt, output_path, size=(1080, 1080), seed=None):
+    """Generate a background image based on a text prompt using Stable Diffusion
+    
+    ``size`` only applies to the procedural fallback; ``seed`` makes either
+    path reproducible.
+    """
     try:
-        # Try to import and use diffusers for Stable Diffusion
-        from diffusers import StableDiffusionPipeline
-        import torch
-        
-        # Initialize the pipeline
-        pipe = StableDiffusionPipeline.from_pretrained("runwayml/stable-diffusion-v1-5")
-        pipe = pipe.to("cuda" if torch.cuda.is_available() else "cpu")
-        
         # Generate the image
-        image = pipe(prompt).images[0]
+        image = diffuse_background(prompt, seed)
         
         # Save the image
         image.save(output_path)
@@ -26,56 +60,115 @@ def generate_background(prompt, output_path):
     except Exception as e:
         print(f"Error using Stable Diffusion: {e}")
         # Fallback to creating a gradient background
-        create_gradient_background(output_path)
+        count_fallback('procedural_background')
+        create_gradient_background(output_path, width=size[0], height=size[1], seed=seed)
         return False
 
-def create_gradient_background(output_path, width=1080, height=1080):
+def get_background_image(prompt, size, seed=None):
+    """Background for a prompt at ``size``, served from the background cache
+    
+    On a miss the prompt is diffused once and the master plus the standard
+    sizes are cached. When diffusion is unavailable a procedural gradient is
+    rendered at ``size`` directly and not cached, since it is cheap. Returns
+    ``(image, diffused)``; renders on a procedural background should not be
+    cached either, or they would outlive the outage.
+    """
+    images, diffused = _background_images([prompt], size, [seed])
+    return images[0], diffused[0]
+
+def get_background_images(prompts, size, seeds=None):
+    """Backgrounds for several prompts at ``size``; cache misses are diffused in batches"""
+    return _background_images(prompts, size, seeds)[0]
+
+def _background_images(prompts, size, seeds=None):
+    """``(images, diffused)`` for get_background_images, flagging the procedural fallbacks"""
+    cache = get_background_cache()
+    seeds = list(seeds) if seeds is not None else [None] * len(prompts)
+    keys = [background_key(prompt, seed) for prompt, seed in zip(prompts, seeds)]
+    
+    # Without an explicit seed the prompt alone decides the image
+    seeds = [seed_from_key(key) if seed is None else seed for key, seed in zip(keys, seeds)]
+    
+    images = [cache.get_variant(key, size) for key in keys]
+    from_diffusion = [True] * len(keys)
+    for image in images:
+        count_cache_lookup('background', image is not None)
+    masters = {}
+    missing = {}  # key -> (prompt, seed), each distinct prompt diffused once
+    for key, prompt, seed, image in zip(keys, prompts, seeds, images):
+        if image is not None or key in masters or key in missing:
+            continue
+        master = cache.get_master(key)
+        if master is not None:
+            masters[key] = master
+        else:
+            missing[key] = (prompt, seed)
+    
+    if missing:
+        try:
+            with timed('background_diffusion'):
+                diffused = diffuse_backgrounds(
+                    [prompt for prompt, _ in missing.values()], [seed for _, seed in missing.values()])
+        except Exception as e:
+            print(f"Error using Stable Diffusion: {e}")
+            diffused = None
+        if diffused is not None:
+            for key, master in zip(missing, diffused):
+                masters[key] = master.convert('RGB')
+                cache.put_master(key, masters[key])
+    
+    for i, (key, seed) in enumerate(zip(keys, seeds)):
+        if images[i] is not None:
+            continue
+        if key not in masters:
+            count_fallback('procedural_background')
+            images[i] = Image.fromarray(render_background(size[0], size[1], style='linear', seed=seed))
+            from_diffusion[i] = False
+            continue
+        images[i] = cache.get_variant(key, size) or cache.put_variant(key, masters[key], size)
+    return images, from_diffusion
+
+def prefetch_backgrounds(content_items):
+    """Diffuse the backgrounds a batch of renders will need in as few pipeline calls as possible"""
+    prompts = [background_prompt(item.content_type, item.input_text) for item in content_items
+               if item.content_type in BACKGROUND_PROMPTS and item.input_text]
+    if prompts:
+        get_background_images(prompts, VARIANT_SIZES[0])
+
+def create_gradient_background(output_path, width=1080, height=1080, seed=None):
     """Create a gradient background as a fallback"""
-    # Create a gradient array
-    gradient = np.zeros((height, width, 3), np.uint8)
-    
-    # Choose random colors for top and bottom of gradient
-    color1 = (random.randint(0, 255), random.randint(0, 255), random.randint(0, 255))
-    color2 = (random.randint(0, 255), random.randint(0, 255), random.randint(0, 255))
-    
-    # Create gradient
-    for y in range(height):
-        for x in range(width):
-            gradient[y, x] = [
-                int(color1[0] + (color2[0] - color1[0]) * y / height),
-                int(color1[1] + (color2[1] - color1[1]) * y / height),
-                int(color1[2] + (color2[2] - color1[2]) * y / height)
-            ]
+    # Vertical two-colour gradient rendered with numpy broadcasting
+    gradient = render_background(width, height, style='linear', seed=seed)
     
     # Convert to PIL Image and save
     img = Image.fromarray(gradient)
     img.save(output_path)
 
-def generate_photo_quote(text, content_id, width=1080, height=1080):
-    """Generate a photo quote with text overlay on a background"""
+def generate_photo_quote(text, content_id, width=1080, height=1080, seed=None):
+    """Generate a photo quote with text overlay on a background
+    
+    Identical requests are served from the render cache. Quotes on the
+    procedural fallback background are not cached, so they are rendered
+    again once diffusion is available.
+    """
     # Create the output directory if it doesn't exist
     upload_folder = current_app.config['UPLOAD_FOLDER']
     os.makedirs(upload_folder, exist_ok=True)
     
     # Define output paths
-    background_path = os.path.join(upload_folder, f"background_{content_id}.jpg")
     output_path = os.path.join(upload_folder, f"quote_{content_id}.jpg")
     
-    # Generate or create background
-    prompt = f"Abstract background for quote: {text[:50]}"
-    generate_background(prompt, background_path)
-    
-    # Open the background image
-    try:
-        img = Image.open(background_path)
-    except Exception as e:
-        print(f"Error opening background image: {e}")
-        create_gradient_background(background_path)
-        img = Image.open(background_path)
+    # Reuse an identical earlier render if there is one
+    key = render_key('photo_quote', text, width=width, height=height, seed=seed,
+                     style={'font': 'default', 'style': 'modern', 'colors': 'auto'},
+                     background=DIFFUSION_SETTINGS)
+    if fetch_render(key, output_path):
+        return output_path
     
-    # Resize if needed
-    if img.width != width or img.height != height:
-        img = img.resize((width, height), Image.LANCZOS)
+    # Background at the final size, from the cache when possible
+    prompt = background_prompt('photo_quote', text)
+    with timed('background'):
+        img, diffused = get_background_image(prompt, (width, height), seed=seed)
     
     # Create draw object
     draw = ImageDraw.Draw(img)
@@ -89,7 +182,8 @@ def generate_photo_quote(text, content_id, width=1080, height=1080):
         font = ImageFont.load_default()
     
     # Calculate text position (centered)
-    text_width, text_height = draw.textsize(text, font)
+    left, top, right, bottom = draw.textbbox((0, 0), text, font=font)
+    text_width, text_height = right - left, bottom - top
     position = ((width - text_width) / 2, (height - text_height) / 2)
     
     # Add some padding/background for text readability
@@ -114,6 +208,8 @@ def generate_photo_quote(text, content_id, width=1080, height=1080):
     
     # Save the final image
     img.save(output_path)
+    if diffused:
+        store_render(key, output_path)
     
     # Return the path to the generated image
     return output_path
@@ -0,0 +1,347 @@
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from flask import current_app
+
+from ai_content_platform import db
+from ai_content_platform.models.job import Job
+from ai_content_platform.utils.metrics import JOBS
+
+
+CANCELLED_ERROR = 'The job was cancelled.'
+
+
+class JobQueueFull(Exception):
+    """Raised when the queue already holds its maximum number of jobs"""
+
+
+class JobCancelled(Exception):
+    """Raised inside a task whose job was cancelled (see JobQueue.cancel)"""
+
+
+class ProgressReporter:
+    """Callback handed to tasks; persists progress without a commit per frame
+
+    Each report is also where a task notices it was cancelled: through
+    ``cancel_event`` when the cancel came to this process, or by finding the
+    job failed in the database (checked every ``check_interval`` seconds)
+    when it came to another worker. Either way it raises JobCancelled.
+    """
+
+    def __init__(self, job, min_step=0.05, cancel_event=None, check_interval=1.0):
+        self.job = job
+        self.jobs = [job]
+        self.min_step = min_step
+        self.cancel_event = cancel_event
+        self.check_interval = check_interval
+        self._last = 0.0
+        self._checked = time.monotonic()
+
+    def check_cancelled(self):
+        if self.cancel_event is None:
+            return
+        if not self.cancel_event.is_set() and time.monotonic() - self._checked >= self.check_interval:
+            self._checked = time.monotonic()
+            failed = db.session.query(Job.id).filter(
+                Job.id.in_([job.id for job in self.jobs]), Job.status == Job.FAILED).first()
+            if failed is not None:
+                self.cancel_event.set()
+        if self.cancel_event.is_set():
+            raise JobCancelled(CANCELLED_ERROR)
+
+    def __call__(self, progress, stage=None):
+        self.check_cancelled()
+        progress = min(max(progress, 0.0), 1.0)
+        stage_changed = stage is not None and stage != self.job.stage
+        if not stage_changed and progress - self._last < self.min_step:
+            return
+        self.job.progress = progress
+        if stage is not None:
+            self.job.stage = stage
+        self._last = progress
+        db.session.commit()
+
+
+class GroupProgressReporter(ProgressReporter):
+    """Progress callback for one task that renders several jobs at once"""
+
+    def __init__(self, jobs, min_step=0.05, cancel_event=None, check_interval=1.0):
+        super().__init__(jobs[0], min_step, cancel_event, check_interval)
+        self.jobs = jobs
+
+    def __call__(self, progress, stage=None):
+        self.check_cancelled()
+        progress = min(max(progress, 0.0), 1.0)
+        stage_changed = stage is not None and stage != self.job.stage
+        if not stage_changed and progress - self._last < self.min_step:
+            return
+        for job in self.jobs:
+            job.progress = progress
+            if stage is not None:
+                job.stage = stage
+        self._last = progress
+        db.session.commit()
+
+
+class JobQueue:
+    """In-process background job runner backed by a bounded thread pool.
+
+    Tasks are called as ``task(content, progress, **params)`` inside an app
+    context. With JOBS_INLINE set (or in testing) they run synchronously.
+    Jobs live only in the process that queued them, so those left unfinished
+    by a worker restart are failed after JOB_TIMEOUT (see fail_stale_jobs).
+    Every ffmpeg a task starts is stopped when its job is cancelled (see cancel).
+    """
+
+    def __init__(self):
+        self._executor = None
+        self._slots = None
+        self._lock = threading.Lock()
+        self._active = set()  # ids of the jobs this process has queued and not yet finished
+        self._cancel_events = {}  # job id -> threading.Event, for the active jobs
+
+    def _ensure_executor(self, app):
+        with self._lock:
+            if self._executor is None:
+                workers = app.config.get('JOB_WORKERS', 2)
+                max_pending = app.config.get('JOB_QUEUE_SIZE', 32)
+                self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='content-job')
+                self._slots = threading.BoundedSemaphore(workers + max_pending)
+            return self._executor
+
+    def enqueue(self, job_type, content, task, **params):
+        """Create a Job for ``content`` and schedule ``task``; returns the Job"""
+        return self._schedule(job_type, [content],
+                              lambda app, job_ids: self._run(app, job_ids[0], task, params))[0]
+
+    def enqueue_batch(self, job_type, contents, task, prepare=None, **params):
+        """Create a Job per content item and run them together on one worker.
+
+        ``prepare(contents)`` runs once before the tasks, for work the whole
+        batch shares (such as batched model inference). Returns the Jobs.
+        """
+        return self._schedule(job_type, contents,
+                              lambda app, job_ids: self._run_batch(app, job_ids, task, prepare, params))
+
+    def enqueue_group(self, job_type, contents, task, **params):
+        """Create a Job per content item, all completed by a single task call.
+
+        The task is called as ``task(contents, progress, **params)`` and the
+        jobs share its progress and outcome. Returns the Jobs.
+        """
+        return self._schedule(job_type, contents,
+                              lambda app, job_ids: self._run_group(app, job_ids, task, params), group=True)
+
+    def _schedule(self, job_type, contents, runner, group=False):
+        """Create the Jobs and hand ``runner(app, job_ids)`` to a worker (one queue slot)
+
+        The jobs of a ``group`` share one task and so one cancel event.
+        """
+        jobs = [Job(job_type=job_type, content_id=content.id, user_id=content.user_id)
+                for content in contents]
+        db.session.add_all(jobs)
+        db.session.commit()
+        job_ids = [job.id for job in jobs]
+        shared = threading.Event()
+        with self._lock:
+            self._active.update(job_ids)
+            for job_id in job_ids:
+                self._cancel_events[job_id] = shared if group else threading.Event()
+
+        app = current_app._get_current_object()
+        if app.config.get('JOBS_INLINE') or app.testing:
+            runner(app, job_ids)
+            for job in jobs:
+                db.session.refresh(job)
+            return jobs
+
+        executor = self._ensure_executor(app)
+        if not self._slots.acquire(blocking=False):
+            for job in jobs:
+                job.status = Job.FAILED
+                job.error = 'Job queue is full, please try again later.'
+                job.finished_at = datetime.utcnow()
+            db.session.commit()
+            self._finish(job_ids)
+            raise JobQueueFull(jobs[0].error)
+
+        future = executor.submit(runner, app, job_ids)
+        future.add_done_callback(lambda _: self._slots.release())
+        return jobs
+
+    def _finish(self, job_ids):
+        with self._lock:
+            self._active.difference_update(job_ids)
+            for job_id in job_ids:
+                self._cancel_events.pop(job_id, None)
+
+    def _cancel_event(self, job_id):
+        with self._lock:
+            return self._cancel_events.get(job_id) or threading.Event()
+
+    def cancel(self, job):
+        """Cancel an unfinished job; returns False if it had already finished.
+
+        The job is failed right away. A task running in this process stops as
+        its cancel event is set, which also kills its ffmpeg; one running in
+        another worker stops at its next progress report. Jobs completed by
+        one group task (see enqueue_group) are cancelled together.
+        """
+        if job.is_finished:
+            return False
+        job.status = Job.FAILED
+        job.error = CANCELLED_ERROR
+        job.finished_at = datetime.utcnow()
+        db.session.commit()
+        with self._lock:
+            event = self._cancel_events.get(job.id)
+        if event is not None:
+            event.set()
+        return True
+
+    def fail_stale_jobs(self, user_id=None):
+        """Fail unfinished jobs older than JOB_TIMEOUT that no live worker is running.
+
+        A job queued or started longer ago than the timeout, and not running
+        in this process, was lost with a worker that restarted; without this
+        its status would be polled forever. Returns the number of jobs failed.
+        """
+        timeout = current_app.config.get('JOB_TIMEOUT', 3600)
+        if not timeout:
+            return 0
+        cutoff = datetime.utcnow() - timedelta(seconds=timeout)
+        query = Job.query.filter(
+            Job.status.in_([Job.QUEUED, Job.RUNNING]),
+            db.func.coalesce(Job.started_at, Job.created_at) < cutoff)
+        if user_id is not None:
+            query = query.filter(Job.user_id == user_id)
+        with self._lock:
+            active = set(self._active)
+
+        stale = [job for job in query.all() if job.id not in active]
+        for job in stale:
+            JOBS.inc(job_type=job.job_type, status=Job.FAILED)
+            job.status = Job.FAILED
+            job.error = 'The job was interrupted (the worker restarted or timed out). Please try again.'
+            job.finished_at = datetime.utcnow()
+        if stale:
+            db.session.commit()
+        return len(stale)
+
+    def _run(self, app, job_id, task, params):
+        try:
+            with app.app_context():
+                self._execute(job_id, task, params)
+        finally:
+            self._finish([job_id])
+
+    def _run_batch(self, app, job_ids, task, prepare, params):
+        try:
+            self._run_batch_jobs(app, job_ids, task, prepare, params)
+        finally:
+            self._finish(job_ids)
+
+    def _run_batch_jobs(self, app, job_ids, task, prepare, params):
+        with app.app_context():
+            if prepare is not None:
+                jobs = [db.session.get(Job, job_id) for job_id in job_ids]
+                for job in jobs:
+                    job.status = Job.RUNNING
+                    job.started_at = datetime.utcnow()
+                    job.stage = 'Preparing batch'
+                db.session.commit()
+                try:
+                    prepare([job.content for job in jobs])
+                except Exception as e:
+                    # Each task can still do the work on its own
+                    print(f"Error preparing job batch: {e}")
+                    traceback.print_exc()
+                    db.session.rollback()
+
+            for job_id in job_ids:
+                self._execute(job_id, task, params)
+
+    def _run_group(self, app, job_ids, task, params):
+        try:
+            self._run_group_jobs(app, job_ids, task, params)
+        finally:
+            self._finish(job_ids)
+
+    def _run_group_jobs(self, app, job_ids, task, params):
+        from ai_content_platform.utils.ffmpeg_utils import cancel_on
+
+        with app.app_context():
+            jobs = [db.session.get(Job, job_id) for job_id in job_ids]
+            cancel_event = self._cancel_event(job_ids[0])
+            if any(job.is_finished for job in jobs):
+                # One of them was cancelled while queued, and they share the task
+                cancel_event.set()
+            for job in jobs:
+                job.status = Job.RUNNING
+                job.started_at = datetime.utcnow()
+            db.session.commit()
+
+            progress = GroupProgressReporter(jobs, cancel_event=cancel_event)
+            try:
+                progress.check_cancelled()
+                with cancel_on(cancel_event):
+                    task([job.content for job in jobs], progress, **params)
+                status, error = Job.DONE, None
+            except Exception as e:
+                print(f"Error running job group {job_ids}: {e}")
+                traceback.print_exc()
+                db.session.rollback()
+                status = Job.FAILED
+                error = CANCELLED_ERROR if cancel_event.is_set() else str(e) or e.__class__.__name__
+
+            for job_id in job_ids:
+                job = db.session.get(Job, job_id)
+                JOBS.inc(job_type=job.job_type, status=status)
+                job.status = status
+                job.error = error
+                job.finished_at = datetime.utcnow()
+                if status == Job.DONE:
+                    job.progress = 1.0
+                    job.stage = None
+            db.session.commit()
+
+    def _execute(self, job_id, task, params):
+        from ai_content_platform.utils.ffmpeg_utils import cancel_on
+
+        job = db.session.get(Job, job_id)
+        if job.is_finished:
+            # Cancelled while it waited in the queue
+            JOBS.inc(job_type=job.job_type, status=job.status)
+            return
+        job.status = Job.RUNNING
+        job.started_at = job.started_at or datetime.utcnow()
+        db.session.commit()
+
+        cancel_event = self._cancel_event(job_id)
+        try:
+            with cancel_on(cancel_event):
+                task(job.content, ProgressReporter(job, cancel_event=cancel_event), **params)
+            job.status = Job.DONE
+            job.progress = 1.0
+            job.stage = None
+        except Exception as e:
+            print(f"Error running job {job_id}: {e}")
+            traceback.print_exc()
+            db.session.rollback()
+            job = db.session.get(Job, job_id)
+            job.status = Job.FAILED
+            job.error = CANCELLED_ERROR if cancel_event.is_set() else str(e) or e.__class__.__name__
+        JOBS.inc(job_type=job.job_type, status=job.status)
+        job.finished_at = datetime.utcnow()
+        db.session.commit()
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=wait)
+                self._executor = None
+
+
+job_queue = JobQueue()
@@ -0,0 +1,57 @@
+import numpy as np
+
+from ai_content_platform.utils.avatar_renderer import MAX_MOUTH_OPEN
+from ai_content_platform.utils.ffmpeg_utils import decode_audio
+
+# Speech only needs the envelope, so a low decode rate keeps the arrays small
+ANALYSIS_SAMPLE_RATE = 8000
+
+
+def frame_envelope(samples, sample_rate, fps, total_frames=None):
+    """RMS level of the audio under each video frame.
+
+    Frame boundaries are rounded sample positions, so hop sizes that are not a
+    whole number of samples (8000 / 30) do not drift. Every frame's energy is
+    a difference of one cumulative sum, so there is no per-frame loop.
+    """
+    if total_frames is None:
+        total_frames = int(len(samples) * fps / sample_rate)
+    if total_frames <= 0:
+        return np.zeros(0, dtype=np.float32)
+
+    bounds = np.round(np.arange(total_frames + 1) * sample_rate / fps).astype(np.int64)
+    bounds = np.minimum(bounds, len(samples))
+
+    # Sum of squares per frame from one running total; frames past the audio are silent
+    running = np.concatenate([[0.0], np.cumsum(np.square(samples, dtype=np.float64))])
+    counts = bounds[1:] - bounds[:-1]
+    energy = (running[bounds[1:]] - running[bounds[:-1]]) / np.maximum(counts, 1)
+    return np.sqrt(np.maximum(energy, 0.0)).astype(np.float32)
+
+
+def mouth_levels(envelope, max_open=MAX_MOUTH_OPEN, range_db=30, smoothing=3):
+    """Map an RMS envelope to integer mouth openness, 0 (closed) to ``max_open``.
+
+    Levels are in dB relative to the loud end of the track (95th percentile),
+    so quiet and loud recordings animate alike; anything ``range_db`` below it
+    keeps the mouth closed. A short moving average stops frame-to-frame jitter.
+    """
+    if len(envelope) == 0:
+        return np.zeros(0, dtype=np.uint8)
+
+    if smoothing > 1:
+        kernel = np.ones(smoothing, dtype=np.float32) / smoothing
+        envelope = np.convolve(envelope, kernel, mode='same')
+
+    levels_db = 20 * np.log10(np.maximum(envelope, 1e-6))
+    reference = np.percentile(levels_db, 95)
+    openness = np.clip((levels_db - (reference - range_db)) / range_db, 0.0, 1.0)
+    return np.round(openness * max_open).astype(np.uint8)
+
+
+def analyze_speech(audio_path, fps):
+    """Decode a speech track once; returns ``(duration_seconds, mouth_levels_per_frame)``"""
+    samples = decode_audio(audio_path, ANALYSIS_SAMPLE_RATE)
+    duration = len(samples) / ANALYSIS_SAMPLE_RATE
+    envelope = frame_envelope(samples, ANALYSIS_SAMPLE_RATE, fps, int(duration * fps))
+    return duration, mouth_levels(envelope)
@@ -0,0 +1,76 @@
+import mimetypes
+import os
+from datetime import datetime, timezone
+from flask import current_app, request
+from werkzeug.utils import send_file
+
+from ai_content_platform.utils.disk_cache import make_key
+
+# Versioned URLs never change content, so browsers may keep them for a year
+IMMUTABLE_CACHE_CONTROL = 'private, max-age=31536000, immutable'
+REVALIDATE_CACHE_CONTROL = 'private, no-cache'
+
+
+def file_etag(path):
+    """ETag from the file's path, size and mtime: one stat, the contents are never read.
+
+    Generated files are written or relinked when they change, never edited in
+    place without a new mtime, so this changes whenever the bytes do. The
+    caches that link files out track recency in sidecars, so serving a cached
+    render leaves its mtime (and ETag) alone.
+    """
+    stat = os.stat(path)
+    return make_key('etag', os.path.abspath(path), size=stat.st_size,
+                    mtime_ns=stat.st_mtime_ns, inode=stat.st_ino)[:32]
+
+
+def _accel_path(path):
+    """Internal nginx location for ``path``, or None if it is outside MEDIA_ACCEL_ROOT"""
+    root = os.path.abspath(str(current_app.config.get('MEDIA_ACCEL_ROOT') or
+                               os.path.join(current_app.root_path, 'static')))
+    path = os.path.abspath(path)
+    if os.path.commonpath([root, path]) != root:
+        return None
+    prefix = current_app.config.get('MEDIA_ACCEL_PREFIX', '/protected-media/').rstrip('/')
+    return f"{prefix}/{os.path.relpath(path, root).replace(os.sep, '/')}"
+
+
+# Types the platform's mimetypes database may not know (or maps elsewhere: .ts)
+MEDIA_TYPES = {
+    '.m3u8': 'application/vnd.apple.mpegurl',
+    '.ts': 'video/mp2t',
+}
+
+
+def media_type(path):
+    extension = os.path.splitext(path)[1].lower()
+    return MEDIA_TYPES.get(extension) or mimetypes.guess_type(path)[0] or 'application/octet-stream'
+
+
+def send_media(path, version=None):
+    """Serve a generated file with validators, Range support and optional proxy offload.
+
+    ``version`` is the ETag the client embedded in the URL; when it matches
+    the file the response is marked immutable, otherwise clients revalidate.
+    """
+    etag = file_etag(path)
+    mode = current_app.config.get('MEDIA_SENDFILE', '')
+    accel_path = _accel_path(path) if mode == 'x-accel' else None
+
+    if accel_path:
+        # The proxy streams the bytes (and handles Range); we only answer validators
+        response = current_app.response_class()
+        response.headers['X-Accel-Redirect'] = accel_path
+        response.mimetype = media_type(path)
+        response.set_etag(etag)
+        response.last_modified = datetime.fromtimestamp(os.path.getmtime(path), timezone.utc)
+        response.make_conditional(request)
+    else:
+        response = send_file(
+            path, request.environ, mimetype=media_type(path), conditional=True, etag=etag,
+            use_x_sendfile=mode == 'x-sendfile',
+            response_class=current_app.response_class)
+
+    response.headers['Cache-Control'] = \
+        IMMUTABLE_CACHE_CONTROL if version == etag else REVALIDATE_CACHE_CONTROL
+    return response
@@ -0,0 +1,210 @@
+import abc
+import bisect
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+# Latency buckets in seconds, from cache hits up to long video renders
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+# Content type of the render running in this thread, used as a metric label
+_content_type = contextvars.ContextVar('content_type', default='none')
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+class Metric(abc.ABC):
+    """Base for labelled metrics; one value (or histogram) per label combination"""
+
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    @abc.abstractmethod
+    def samples(self):
+        """``(name, labels, value)`` tuples for the exposition, labels already formatted"""
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(f"{name}{labels} {value:g}" for name, labels, value in self.samples())
+        return '\n'.join(lines)
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return [(self.name, _format_labels(self.labelnames, key), value) for key, value in items]
+
+
+class Gauge(Metric):
+    """A value read at scrape time from ``callback()``, which returns {label tuple: value}"""
+
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, labelnames=(), callback=None):
+        super().__init__(name, documentation, labelnames)
+        self.callback = callback
+
+    def samples(self):
+        try:
+            values = self.callback() if self.callback else {}
+        except Exception as e:
+            print(f"Error collecting metric {self.name}: {e}")
+            values = {}
+        return [(self.name, _format_labels(self.labelnames, key), value)
+                for key, value in sorted(values.items())]
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = {'counts': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            index = bisect.bisect_left(self.buckets, value)
+            if index < len(self.buckets):
+                state['counts'][index] += 1
+            state['sum'] += value
+            state['count'] += 1
+
+    def count(self, **labels):
+        state = self._values.get(self._key(labels))
+        return state['count'] if state else 0
+
+    def samples(self):
+        with self._lock:
+            items = sorted((key, dict(state, counts=list(state['counts'])))
+                           for key, state in self._values.items())
+        samples = []
+        for key, state in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, state['counts']):
+                cumulative += count
+                samples.append((f"{self.name}_bucket",
+                                _format_labels(self.labelnames, key, [('le', f"{bound:g}")]), cumulative))
+            samples.append((f"{self.name}_bucket",
+                            _format_labels(self.labelnames, key, [('le', '+Inf')]), state['count']))
+            samples.append((f"{self.name}_sum", _format_labels(self.labelnames, key), state['sum']))
+            samples.append((f"{self.name}_count", _format_labels(self.labelnames, key), state['count']))
+        return samples
+
+
+class MetricsRegistry:
+    """Process-local collection of metrics rendered in the Prometheus text format.
+
+    Each gunicorn worker keeps its own values; scrape every worker (or run
+    one worker per port) when aggregating.
+    """
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def gauge(self, name, documentation, labelnames=(), callback=None):
+        return self.register(Gauge(name, documentation, labelnames, callback))
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return '\n'.join(metric.render() for metric in metrics) + '\n'
+
+
+metrics = MetricsRegistry()
+
+STAGE_SECONDS = metrics.histogram(
+    'content_stage_seconds', 'Time spent in each generation stage.', ('stage', 'content_type'))
+FALLBACKS = metrics.counter(
+    'content_fallbacks_total', 'Generations that fell back to a degraded path.', ('path', 'content_type'))
+CACHE_LOOKUPS = metrics.counter(
+    'content_cache_lookups_total', 'Lookups in the render, transcript and TTS caches.',
+    ('cache', 'result'))
+MODEL_LOAD_SECONDS = metrics.histogram(
+    'model_load_seconds', 'Time spent loading models into the registry.', ('model',))
+JOBS = metrics.counter(
+    'content_jobs_total', 'Finished background jobs by type and outcome.', ('job_type', 'status'))
+
+
+def current_content_type():
+    return _content_type.get()
+
+
+@contextmanager
+def content_type_label(content_type):
+    """Label metrics recorded inside the block (in this thread) with ``content_type``"""
+    token = _content_type.set(content_type)
+    try:
+        yield
+    finally:
+        _content_type.reset(token)
+
+
+@contextmanager
+def timed(stage, content_type=None):
+    """Record the block's wall time in content_stage_seconds, even when it raises"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - start, stage=stage,
+                              content_type=content_type or current_content_type())
+
+
+def observe_stage(stage, seconds, content_type=None):
+    STAGE_SECONDS.observe(seconds, stage=stage, content_type=content_type or current_content_type())
+
+
+def count_fallback(path, content_type=None):
+    FALLBACKS.inc(path=path, content_type=content_type or current_content_type())
+
+
+def count_cache_lookup(cache, hit):
+    CACHE_LOOKUPS.inc(cache=cache, result='hit' if hit else 'miss')
@@ -0,0 +1,216 @@
+import threading
+import time
+from collections import OrderedDict
+
+from ai_content_platform.utils.metrics import metrics, MODEL_LOAD_SECONDS
+
+
+def estimate_model_size(model):
+    """Best-effort estimate of the memory held by a model, in bytes"""
+    # Explicit size (used by lightweight stand-in models)
+    nbytes = getattr(model, 'nbytes', None)
+    if isinstance(nbytes, int):
+        return nbytes
+
+    # torch modules
+    parameters = getattr(model, 'parameters', None)
+    if callable(parameters):
+        try:
+            return sum(p.numel() * p.element_size() for p in parameters())
+        except Exception:
+            return 0
+
+    # diffusers pipelines keep their modules in a components dict
+    components = getattr(model, 'components', None)
+    if isinstance(components, dict):
+        return sum(estimate_model_size(c) for c in components.values() if c is not None)
+
+    # transformers pipelines wrap the model
+    inner = getattr(model, 'model', None)
+    if inner is not None and inner is not model:
+        return estimate_model_size(inner)
+
+    return 0
+
+
+class ModelRegistry:
+    """Process-wide cache of loaded models.
+
+    Each model is loaded once by its registered loader and shared by every
+    caller in the process. When a memory budget is set, the least recently
+    used models are evicted to stay under it.
+    """
+
+    def __init__(self, memory_budget=None):
+        self.memory_budget = memory_budget  # bytes, None for unlimited
+        self._loaders = {}
+        self._models = OrderedDict()  # name -> (model, size), oldest first
+        self._stats = {}
+        self._lock = threading.RLock()
+        self._load_locks = {}
+
+    def configure(self, memory_budget=None):
+        """Set the memory budget and evict anything above it"""
+        with self._lock:
+            self.memory_budget = memory_budget
+            self._enforce_budget()
+
+    def register(self, name, loader, size=None):
+        """Register a zero-argument loader for ``name``.
+
+        ``size`` overrides the estimated memory footprint in bytes.
+        """
+        with self._lock:
+            self._loaders[name] = (loader, size)
+            self._load_locks.setdefault(name, threading.Lock())
+            self._stats.setdefault(name, {
+                'loads': 0,
+                'hits': 0,
+                'evictions': 0,
+                'load_seconds': 0.0,
+            })
+
+    def is_registered(self, name):
+        return name in self._loaders
+
+    def is_loaded(self, name):
+        return name in self._models
+
+    def get(self, name):
+        """Return the model for ``name``, loading it on first use"""
+        with self._lock:
+            if name not in self._loaders:
+                raise KeyError(f"No model registered under '{name}'")
+            if name in self._models:
+                self._models.move_to_end(name)
+                self._stats[name]['hits'] += 1
+                return self._models[name][0]
+            load_lock = self._load_locks[name]
+
+        # Load outside the registry lock so other models stay available,
+        # but never load the same model twice concurrently
+        with load_lock:
+            with self._lock:
+                if name in self._models:
+                    self._models.move_to_end(name)
+                    self._stats[name]['hits'] += 1
+                    return self._models[name][0]
+                loader, size = self._loaders[name]
+
+            start = time.perf_counter()
+            model = loader()
+            elapsed = time.perf_counter() - start
+            MODEL_LOAD_SECONDS.observe(elapsed, model=name)
+
+            if size is None:
+                size = estimate_model_size(model)
+
+            with self._lock:
+                self._models[name] = (model, size)
+                self._stats[name]['loads'] += 1
+                self._stats[name]['load_seconds'] += elapsed
+                self._enforce_budget(keep=name)
+
+            return model
+
+    def warmup(self, names=None):
+        """Load models ahead of time, e.g. before gunicorn forks its workers.
+
+        Returns the names that failed to load.
+        """
+        failed = []
+        for name in names or list(self._loaders):
+            try:
+                self.get(name)
+            except Exception as e:
+                print(f"Error warming up model {name}: {e}")
+                failed.append(name)
+        return failed
+
+    def evict(self, name):
+        """Drop a loaded model so it can be garbage collected"""
+        with self._lock:
+            if self._models.pop(name, None) is not None:
+                self._stats[name]['evictions'] += 1
+                return True
+            return False
+
+    def clear(self):
+        with self._lock:
+            for name in list(self._models):
+                self.evict(name)
+
+    def memory_usage(self):
+        with self._lock:
+            return sum(size for _, size in self._models.values())
+
+    def stats(self):
+        """Load/hit counters per model plus current memory usage"""
+        with self._lock:
+            return {
+                'models': {
+                    name: dict(counters, loaded=name in self._models,
+                               size=self._models[name][1] if name in self._models else 0)
+                    for name, counters in self._stats.items()
+                },
+                'memory_usage': self.memory_usage(),
+                'memory_budget': self.memory_budget,
+            }
+
+    def _enforce_budget(self, keep=None):
+        if not self.memory_budget:
+            return
+        for name in list(self._models):
+            if self.memory_usage() <= self.memory_budget:
+                break
+            if name != keep:
+                self.evict(name)
+
+
+# Loaders for the models used by the media utils. The heavy libraries are only
+# imported when a model is actually loaded.
+
+def _load_stable_diffusion():
+    from diffusers import StableDiffusionPipeline
+    import torch
+
+    pipe = StableDiffusionPipeline.from_pretrained("runwayml/stable-diffusion-v1-5")
+    return pipe.to("cuda" if torch.cuda.is_available() else "cpu")
+
+
+def _load_whisper():
+    from transformers import pipeline
+    return pipeline("automatic-speech-recognition", model="openai/whisper-small")
+
+
+def _load_tts():
+    from transformers import pipeline
+    return pipeline("text-to-speech")
+
+
+def _load_text_generation():
+    from transformers import pipeline
+    return pipeline('text-generation')
+
+
+def _load_image_to_text():
+    from transformers import pipeline
+    return pipeline("image-to-text")
+
+
+registry = ModelRegistry()
+registry.register('stable-diffusion', _load_stable_diffusion)
+registry.register('whisper', _load_whisper)
+registry.register('tts', _load_tts)
+registry.register('text-generation', _load_text_generation)
+registry.register('image-to-text', _load_image_to_text)
+
+
+metrics.gauge('model_memory_bytes', 'Estimated memory held by each loaded model.', ('model',),
+              callback=lambda: {(name,): info['size']
+                                for name, info in registry.stats()['models'].items() if info['loaded']})
+
+
+def get_model(name):
+    """Shortcut for ``registry.get(name)``"""
+    return registry.get(name)
@@ -0,0 +1,56 @@
+import os
+from flask import current_app
+
+from ai_content_platform.utils.disk_cache import get_cache, make_key, file_digest
+from ai_content_platform.utils.metrics import count_cache_lookup
+
+# Bump when rendering changes so stale artifacts are not served
+RENDER_VERSION = 2  # 2: fast-start MP4s
+
+
+def get_render_cache():
+    """The shared cache of finished renders for the current app"""
+    directory = current_app.config.get('RENDER_CACHE_DIR') or \
+        os.path.join(current_app.config['UPLOAD_FOLDER'], 'render_cache')
+    max_bytes = current_app.config.get('RENDER_CACHE_MAX_MB', 2048) * 1024 * 1024
+    return get_cache(directory, max_bytes)
+
+
+def render_key(content_type, text, audio_path=None, **params):
+    """Canonical hash of everything that determines a render's output.
+
+    ``params`` holds dimensions, fps, duration, style settings and seed.
+    Audio inputs are identified by their content, not their path.
+    """
+    audio = file_digest(audio_path) if audio_path else None
+    return make_key(RENDER_VERSION, content_type, text, audio=audio, **params)
+
+
+def seed_from_key(key):
+    """Deterministic seed for a render that did not ask for one"""
+    return int(key[:8], 16)
+
+
+def render_cache_enabled():
+    return current_app.config.get('RENDER_CACHE_ENABLED', True)
+
+
+def fetch_render(key, output_path):
+    """Link a cached render to ``output_path``; True on a hit"""
+    if not render_cache_enabled():
+        return False
+    suffix = os.path.splitext(output_path)[1]
+    hit = get_render_cache().fetch(key, output_path, suffix)
+    count_cache_lookup('render', hit)
+    return hit
+
+
+def store_render(key, output_path):
+    """Add a finished render to the cache"""
+    if not render_cache_enabled() or not os.path.exists(output_path):
+        return
+    suffix = os.path.splitext(output_path)[1]
+    try:
+        get_render_cache().put(key, output_path, suffix)
+    except OSError as e:
+        print(f"Error caching render {output_path}: {e}")
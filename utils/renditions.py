@@ -0,0 +1,115 @@
+import os
+from flask import current_app
+
+from ai_content_platform.utils.disk_cache import make_key, file_digest, link_or_copy
+from ai_content_platform.utils.render_cache import fetch_render, store_render
+from ai_content_platform.utils.metrics import timed
+
+# ffmpeg_utils (numpy) and video_utils (cv2) are imported where they are used:
+# the routes import this module for the rendition names only.
+
+# Aspect ratio -> (width, height, largest output width)
+RENDITIONS = {
+    '9:16': (9, 16, 1080),  # TikTok, Reels, Stories
+    '1:1': (1, 1, 1080),  # Instagram feed
+    '16:9': (16, 9, 1920),  # Twitter, YouTube
+}
+
+# Which rendition each platform gets from optimize_content
+PLATFORM_RENDITIONS = {
+    'instagram': '1:1',
+    'twitter': '16:9',
+    'tiktok': '9:16',
+}
+
+VIDEO_CONTENT_TYPES = ('video_reel', 'voice_video', 'avatar_video')
+
+
+def rendition_slug(aspect):
+    """Filename- and URL-safe form of an aspect ratio ('9:16' -> '9x16')"""
+    return aspect.replace(':', 'x')
+
+
+def rendition_path(master_path, aspect):
+    """Rendition file stored next to its master (video_3.mp4 -> video_3_9x16.mp4)"""
+    stem, extension = os.path.splitext(master_path)
+    return f"{stem}_{rendition_slug(aspect)}{extension}"
+
+
+def rendition_size(width, height, aspect):
+    """``(crop_width, crop_height, width, height)`` of a rendition of a width x height master.
+
+    The crop is the largest centred region of the aspect ratio; it is scaled
+    down to the rendition's largest width but never up. Sizes are even, as
+    yuv420p needs.
+    """
+    aspect_width, aspect_height, max_width = RENDITIONS[aspect]
+    crop_width = min(width, height * aspect_width // aspect_height) // 2 * 2
+    crop_height = min(height, width * aspect_height // aspect_width) // 2 * 2
+    if crop_width <= max_width:
+        return crop_width, crop_height, crop_width, crop_height
+    return crop_width, crop_height, max_width, round(crop_height * max_width / crop_width / 2) * 2
+
+
+def video_size(path):
+    """``(width, height)`` of a video, read from its header"""
+    import cv2
+
+    capture = cv2.VideoCapture(path)
+    try:
+        return int(capture.get(cv2.CAP_PROP_FRAME_WIDTH)), int(capture.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    finally:
+        capture.release()
+
+
+def enabled_renditions():
+    """Aspect ratios to produce at render time, from VIDEO_RENDITIONS (none by default)"""
+    return [aspect for aspect in current_app.config.get('VIDEO_RENDITIONS', [])
+            if aspect in RENDITIONS]
+
+
+def create_renditions(master_path, content_type, aspects=None):
+    """Crop and scale a rendered master into one file per aspect ratio.
+
+    The master is decoded once and split between the outputs, so adding a
+    rendition costs an encode, not a render. A rendition the master already
+    matches is a link to it, and renditions in the render cache are not
+    encoded again. Returns ``{aspect: path}``.
+    """
+    from ai_content_platform.utils.ffmpeg_utils import build_split_command, crop_scale_filter, run_ffmpeg
+    from ai_content_platform.utils.video_utils import encoder_settings
+
+    aspects = enabled_renditions() if aspects is None else aspects
+    if not aspects:
+        return {}
+
+    settings = encoder_settings(content_type)
+    master = file_digest(master_path)
+    width, height = video_size(master_path)
+    renditions, outputs, keys = {}, [], {}
+    for aspect in aspects:
+        path = rendition_path(master_path, aspect)
+        renditions[aspect] = path
+        size = rendition_size(width, height, aspect)
+        if size == (width, height, width, height):
+            # The master already is this rendition
+            link_or_copy(master_path, path)
+            continue
+        keys[path] = make_key('rendition', master, size=size, encoding=settings)
+        if not fetch_render(keys[path], path):
+            outputs.append((path, crop_scale_filter(*size)))
+
+    if outputs:
+        with timed('renditions'):
+            run_ffmpeg(build_split_command(master_path, outputs, settings))
+        for path, _ in outputs:
+            store_render(keys[path], path)
+
+    return renditions
+
+
+def remove_renditions(content_item):
+    """Delete the rendition files of a content item"""
+    for path in content_item.get_metadata().get('renditions', {}).values():
+        if os.path.exists(path):
+            os.remove(path)
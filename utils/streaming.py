@@ -0,0 +1,99 @@
+import os
+import shutil
+from flask import current_app
+
+from ai_content_platform.utils.disk_cache import make_key, file_digest
+from ai_content_platform.utils.metrics import timed
+
+# ffmpeg_utils (numpy) and video_utils (cv2) are imported where they are used:
+# the routes import this module for paths only.
+
+# HLS bitrate ladder: (height, max kbit/s), best first. Variants taller than
+# the video are skipped.
+HLS_VARIANTS = [(1080, 5000), (720, 2800), (480, 1200), (360, 700)]
+
+MASTER_PLAYLIST = 'master.m3u8'
+PACKAGE_KEY = 'package.key'  # what the package was built from, to skip rebuilding it
+
+
+def stream_dir_for(video_path):
+    """HLS package stored next to its video (video_3.mp4 -> video_3_hls/)"""
+    return f"{os.path.splitext(video_path)[0]}_hls"
+
+
+def stream_playlist_for(video_path):
+    """Master playlist of a video's HLS package, or None if it was not packaged"""
+    if not video_path:
+        return None
+    path = os.path.join(stream_dir_for(video_path), MASTER_PLAYLIST)
+    return path if os.path.exists(path) else None
+
+
+def hls_variants(height):
+    """Up to VIDEO_HLS_VARIANTS rungs of the ladder that are no taller than the video"""
+    count = current_app.config.get('VIDEO_HLS_VARIANTS', 3)
+    variants = [(h, kbps) for h, kbps in HLS_VARIANTS if h <= height][:count]
+    return variants or [(height - height % 2, HLS_VARIANTS[-1][1])]
+
+
+def package_stream(video_path, content_type, audio=False, duration=None, progress=None):
+    """Package a finished video as HLS (short segments at several bitrates).
+
+    Does nothing unless VIDEO_HLS is set. A package already built from the
+    same video with the same settings (e.g. after a render cache hit) is
+    kept; otherwise it is rebuilt. Returns the master playlist path or None.
+    A failure here never fails the render: the fast-start MP4 still plays,
+    but a cancelled job stops. With ``progress`` and ``duration`` (seconds)
+    ``progress(fraction)`` follows the encode.
+    """
+    from ai_content_platform.utils.ffmpeg_utils import build_hls_command, run_ffmpeg, FFmpegCancelled
+    from ai_content_platform.utils.video_utils import encoder_settings
+    from ai_content_platform.utils.renditions import video_size
+
+    if not current_app.config.get('VIDEO_HLS', False):
+        return None
+
+    output_dir = stream_dir_for(video_path)
+    playlist = os.path.join(output_dir, MASTER_PLAYLIST)
+    try:
+        _, height = video_size(video_path)
+        variants = hls_variants(height)
+        settings = encoder_settings(content_type)
+        segment_seconds = current_app.config.get('VIDEO_HLS_SEGMENT_SECONDS', 2)
+        key = make_key('hls', file_digest(video_path), variants=variants, settings=settings,
+                       segment_seconds=segment_seconds, audio=audio)
+        if package_key(video_path) == key and os.path.exists(playlist):
+            return playlist
+
+        remove_stream(video_path)
+        for k in range(len(variants)):
+            os.makedirs(os.path.join(output_dir, str(k)), exist_ok=True)
+        cmd = build_hls_command(video_path, output_dir, variants, settings=settings,
+                                audio=audio, segment_seconds=segment_seconds)
+        with timed('hls_packaging'):
+            run_ffmpeg(cmd, progress=progress, duration=duration)
+        with open(os.path.join(output_dir, PACKAGE_KEY), 'w') as f:
+            f.write(key)
+        return playlist
+    except FFmpegCancelled:
+        remove_stream(video_path)
+        raise
+    except Exception as e:
+        print(f"Error packaging {video_path} for streaming: {e}")
+        remove_stream(video_path)
+        return None
+
+
+def package_key(video_path):
+    """Key of the inputs an existing package was built from, or None"""
+    try:
+        with open(os.path.join(stream_dir_for(video_path), PACKAGE_KEY)) as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def remove_stream(video_path):
+    """Delete a video's HLS package"""
+    if video_path and os.path.isdir(stream_dir_for(video_path)):
+        shutil.rmtree(stream_dir_for(video_path))
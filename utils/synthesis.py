@@ -0,0 +1,191 @@
+import os
+import subprocess
+import wave
+from io import BytesIO
+import numpy as np
+from flask import current_app
+
+from ai_content_platform.utils.disk_cache import get_cache, make_key
+from ai_content_platform.utils.ffmpeg_utils import get_executor
+
+SAMPLE_RATE = 22050
+
+# Bump when the generators change so stale loops are not served
+SYNTH_VERSION = 1
+
+# Chord progressions (MIDI notes, one chord per bar) and rhythm per music style
+MUSIC_STYLES = {
+    'calm': {'chords': [[57, 60, 64], [53, 57, 60], [48, 52, 55], [55, 59, 62]], 'pulse': False},
+    'upbeat': {'chords': [[60, 64, 67], [55, 59, 62], [57, 60, 64], [53, 57, 60]], 'pulse': True},
+    'dramatic': {'chords': [[57, 60, 64], [53, 57, 60], [50, 53, 57], [52, 56, 59]], 'pulse': True},
+}
+BEATS_PER_BAR = 4
+
+
+def midi_to_hz(notes):
+    return 440.0 * 2.0 ** ((np.asarray(notes, dtype=np.float32) - 69) / 12)
+
+
+def tone(frequency, duration, sample_rate=SAMPLE_RATE, amplitude=0.5):
+    """Sine tone as float32 samples"""
+    t = np.arange(int(duration * sample_rate), dtype=np.float32) / sample_rate
+    return (amplitude * np.sin(2 * np.pi * frequency * t)).astype(np.float32)
+
+
+def beep_track(count, duration, sample_rate=SAMPLE_RATE, frequency=440, beep_seconds=0.1, max_rate=4):
+    """``count`` short beeps spread evenly over ``duration`` seconds (at most ``max_rate`` per second).
+
+    The beep is synthesized once and scattered with a single fancy-indexing
+    assignment, so the cost is O(beeps x beep length) rather than a mask over
+    the whole track for every beep.
+    """
+    signal = np.zeros(int(duration * sample_rate), dtype=np.float32)
+    rate = min(count / duration, max_rate)
+    count = min(count, int(rate * duration))
+    if count == 0:
+        return signal
+
+    beep = tone(frequency, beep_seconds, sample_rate)
+    starts = np.round(np.arange(count) / rate * sample_rate).astype(np.int64)
+    index = starts[:, None] + np.arange(len(beep))[None, :]
+    valid = index < len(signal)
+    signal[index[valid]] = np.broadcast_to(beep, index.shape)[valid]
+    return signal
+
+
+def music_loop(style='calm', tempo=90, bars=4, sample_rate=SAMPLE_RATE, seed=0):
+    """A seamless procedural loop: pad chords and bass, plus kick and hats for rhythmic styles.
+
+    Every voice is computed for all samples at once from per-sample bar and
+    beat positions; there are no per-note loops.
+    """
+    settings = MUSIC_STYLES[style]
+    chords = midi_to_hz(settings['chords'])  # (chords, notes)
+    beat_len = sample_rate * 60.0 / tempo
+    bar_len = beat_len * BEATS_PER_BAR
+    total = int(round(bar_len * bars))
+
+    n = np.arange(total)
+    t = (n / sample_rate).astype(np.float32)
+    bar = (n // bar_len).astype(np.int64)
+    bar_pos = ((n % bar_len) / bar_len).astype(np.float32)
+    frequencies = chords[bar % len(chords)]  # (samples, notes)
+
+    # Pad: chord tones with a soft attack and release inside each bar
+    envelope = np.minimum(bar_pos / 0.05, 1) * np.minimum((1 - bar_pos) / 0.1, 1)
+    pad = np.sin(2 * np.pi * frequencies * t[:, None]).sum(axis=1) * envelope / chords.shape[1]
+    bass = np.sin(np.pi * frequencies[:, 0] * t) * envelope  # root, an octave down
+    signal = 0.5 * pad + 0.35 * bass
+
+    if settings['pulse']:
+        rng = np.random.default_rng(seed)
+        beat_time = ((n % beat_len) / sample_rate).astype(np.float32)
+        offbeat_time = (((n + beat_len / 2) % beat_len) / sample_rate).astype(np.float32)
+        kick = np.sin(2 * np.pi * 55 * beat_time) * np.exp(-beat_time * 18)
+        hats = rng.uniform(-1, 1, total).astype(np.float32) * np.exp(-offbeat_time * 80)
+        signal = signal + 0.6 * kick + 0.08 * hats
+
+    return (0.9 * signal / max(np.abs(signal).max(), 1e-6)).astype(np.float32)
+
+
+def get_music_cache():
+    directory = current_app.config.get('MUSIC_CACHE_DIR') or \
+        os.path.join(current_app.config['UPLOAD_FOLDER'], 'music_cache')
+    max_bytes = current_app.config.get('MUSIC_CACHE_MAX_MB', 128) * 1024 * 1024
+    return get_cache(directory, max_bytes)
+
+
+def get_music_loop(style='calm', tempo=90, bars=4):
+    """music_loop() from the disk cache, keyed by (style, tempo, duration)"""
+    duration = round(bars * BEATS_PER_BAR * 60.0 / tempo, 3)
+    key = make_key('music-loop', SYNTH_VERSION, style, tempo, duration, sample_rate=SAMPLE_RATE)
+    cache = get_music_cache()
+
+    path = cache.get(key, '.npy')
+    if path is not None:
+        try:
+            return np.load(path)
+        except (OSError, ValueError) as e:
+            print(f"Error reading cached music loop {path}: {e}")
+
+    loop = music_loop(style, tempo, bars)
+    buffer = BytesIO()
+    np.save(buffer, loop)
+    cache.put_bytes(key, buffer.getvalue(), '.npy')
+    return loop
+
+
+def to_pcm16(samples):
+    return (np.clip(samples, -1, 1) * 32767).astype('<i2').tobytes()
+
+
+def write_wav(output_path, samples, sample_rate=SAMPLE_RATE):
+    """Write mono float samples as 16-bit PCM WAV"""
+    with wave.open(output_path, 'wb') as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(to_pcm16(samples))
+    return output_path
+
+
+def _voice_chunks(voice_path, chunk_samples, sample_rate=SAMPLE_RATE):
+    """Stream a voice file as float32 chunks, decoded by ffmpeg without loading it whole"""
+    cmd = ["ffmpeg", "-nostdin", "-loglevel", "error", "-i", voice_path,
+           "-f", "s16le", "-ac", "1", "-ar", str(sample_rate), "-"]
+    process = get_executor().popen(cmd, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE)
+    try:
+        while True:
+            data = process.stdout.read(chunk_samples * 2)
+            if not data:
+                break
+            yield np.frombuffer(data[:len(data) // 2 * 2], dtype='<i2').astype(np.float32) / 32768
+    except BaseException:
+        # Also reached when the consumer stops early (GeneratorExit)
+        process.kill()
+        raise
+    process.stdout.close()
+    process.wait()
+
+
+def mix_music_bed(output_path, voice_path=None, duration=None, style='calm', tempo=90,
+                  bed_gain_db=-18, chunk_seconds=5, fade_seconds=1.0):
+    """Write a music bed, optionally under a voice track, to a WAV file chunk by chunk.
+
+    Only one chunk of voice, bed and mix is in memory at a time; the bed is
+    read out of the cached loop with wrapped indices. Without a voice the
+    track is ``duration`` seconds long and fades out at the end.
+    """
+    loop = get_music_loop(style, tempo)
+    bed_gain = 10 ** (bed_gain_db / 20) if voice_path else 10 ** (-6 / 20)
+    chunk_samples = int(chunk_seconds * SAMPLE_RATE)
+    fade = int(fade_seconds * SAMPLE_RATE)
+
+    if voice_path:
+        chunks = _voice_chunks(voice_path, chunk_samples)
+        total = None
+    else:
+        total = int(duration * SAMPLE_RATE)
+        chunks = (None for _ in range(0, total, chunk_samples))
+
+    with wave.open(output_path, 'wb') as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(SAMPLE_RATE)
+
+        position = 0
+        for voice in chunks:
+            length = len(voice) if voice is not None else min(chunk_samples, total - position)
+            index = np.arange(position, position + length)
+            bed = loop[index % len(loop)] * bed_gain
+
+            # Fade the bed in, and out at a known end
+            bed *= np.minimum(index / fade, 1)
+            if total is not None:
+                bed *= np.minimum((total - index) / fade, 1)
+
+            mix = bed if voice is None else voice + bed
+            wav.writeframes(to_pcm16(mix))
+            position += length
+
+    return output_path
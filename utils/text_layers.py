@@ -0,0 +1,142 @@
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+
+@lru_cache(maxsize=32)
+def load_font(size=60, font_path="arial.ttf"):
+    """Load a TrueType font once per (path, size), falling back to PIL's default"""
+    try:
+        return ImageFont.truetype(font_path, size)
+    except IOError:
+        return ImageFont.load_default()
+
+
+class TextSprite:
+    """A piece of text rasterized once into colour and alpha planes.
+
+    ``offset`` is where the sprite's top-left corner sits relative to the
+    position that would be passed to ``ImageDraw.text``.
+    """
+
+    def __init__(self, text, rgb, alpha, offset):
+        self.text = text
+        self.rgb = rgb  # (h, w, 3) float32
+        self.alpha = alpha  # (h, w, 1) float32 in [0, 1]
+        self.offset = offset
+
+    @property
+    def width(self):
+        return self.rgb.shape[1]
+
+    @property
+    def height(self):
+        return self.rgb.shape[0]
+
+    @classmethod
+    def render(cls, text, font, color=(255, 255, 255)):
+        left, top, right, bottom = font.getbbox(text)
+        width, height = max(1, right - left), max(1, bottom - top)
+
+        image = Image.new("RGBA", (width, height), color + (0,))
+        ImageDraw.Draw(image).text((-left, -top), text, fill=color + (255,), font=font)
+
+        pixels = np.asarray(image, dtype=np.float32)
+        return cls(text, pixels[:, :, :3].copy(), pixels[:, :, 3:] / 255.0, (left, top))
+
+
+class TextSpriteCache:
+    """LRU cache of text sprites keyed by (text, font, size, colour)"""
+
+    def __init__(self, max_entries=512):
+        self.max_entries = max_entries
+        self._sprites = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, text, size=60, font_path="arial.ttf", color=(255, 255, 255)):
+        key = (text, font_path, size, color)
+        with self._lock:
+            sprite = self._sprites.get(key)
+            if sprite is not None:
+                self._sprites.move_to_end(key)
+                self.hits += 1
+                return sprite
+
+        sprite = TextSprite.render(text, load_font(size, font_path), color)
+
+        with self._lock:
+            self.misses += 1
+            self._sprites[key] = sprite
+            while len(self._sprites) > self.max_entries:
+                self._sprites.popitem(last=False)
+        return sprite
+
+    def clear(self):
+        with self._lock:
+            self._sprites.clear()
+
+
+class FrameCompositor:
+    """Composite text sprites onto a reused frame buffer.
+
+    Each call to ``compose`` restores only the rectangles dirtied by the
+    previous frame from the background, then alpha-blends the new layers.
+    When the layers are identical to the previous frame nothing is touched.
+    """
+
+    def __init__(self, background):
+        self.background = np.ascontiguousarray(background, dtype=np.uint8)
+        self.frame = self.background.copy()
+        self.height, self.width = self.frame.shape[:2]
+        self._dirty = []
+        self._last_layers = None
+
+    def compose(self, layers):
+        """Render ``layers`` (a list of (sprite, x, y, opacity)) and return the frame"""
+        layers = [layer for layer in layers if layer[3] > 0]
+        if layers == self._last_layers:
+            return self.frame
+
+        # Put the background back wherever the last frame drew
+        for x0, y0, x1, y1 in self._dirty:
+            self.frame[y0:y1, x0:x1] = self.background[y0:y1, x0:x1]
+        self._dirty = []
+
+        for sprite, x, y, opacity in layers:
+            rect = self._blend(sprite, x, y, opacity)
+            if rect:
+                self._dirty.append(rect)
+
+        self._last_layers = layers
+        return self.frame
+
+    def _blend(self, sprite, x, y, opacity):
+        x0 = int(x) + sprite.offset[0]
+        y0 = int(y) + sprite.offset[1]
+        x1, y1 = x0 + sprite.width, y0 + sprite.height
+
+        # Clip to the frame
+        cx0, cy0 = max(0, x0), max(0, y0)
+        cx1, cy1 = min(self.width, x1), min(self.height, y1)
+        if cx0 >= cx1 or cy0 >= cy1:
+            return None
+
+        sx0, sy0 = cx0 - x0, cy0 - y0
+        sx1, sy1 = sx0 + (cx1 - cx0), sy0 + (cy1 - cy0)
+        alpha = sprite.alpha[sy0:sy1, sx0:sx1]
+        if opacity < 1:
+            alpha = alpha * opacity
+
+        region = self.frame[cy0:cy1, cx0:cx1]
+        blended = region + (sprite.rgb[sy0:sy1, sx0:sx1] - region) * alpha
+        region[...] = blended + 0.5
+
+        return (cx0, cy0, cx1, cy1)
+
+
+# Shared across requests so repeated words and captions are rasterized once
+sprite_cache = TextSpriteCache()
@@ -1,6 +1,7 @@
 import random
 import os
-from transformers import pipeline
+
+from ai_content_platform.utils.model_registry import get_model
 
 # Mock function for generating text prompts
 # In a production environment, this would use a proper NLP model
@@ -44,8 +45,8 @@ def generate_text_prompt(theme, count=3):
 def generate_caption(image_path):
     """Generate a caption for an image"""
     try:
-        # Try to import and use the transformers library
-        image_to_text = pipeline("image-to-text")
+        # Use the shared image-to-text model
+        image_to_text = get_model('image-to-text')
         result = image_to_text(image_path)
         return result[0]['generated_text']
     except Exception as e:
@@ -56,8 +57,8 @@ def generate_caption(image_path):
 def auto_complete(text, max_length=50):
     """Generate text completion based on input"""
     try:
-        # Try to use the transformers library for text generation
-        generator = pipeline('text-generation')
+        # Use the shared text generation model
+        generator = get_model('text-generation')
         result = generator(text, max_length=max_length, num_return_sequences=1)
         return result[0]['generated_text']
     except Exception as e:
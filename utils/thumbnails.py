@@ -0,0 +1,116 @@
+import os
+from flask import current_app
+
+# PIL and ffmpeg_utils (numpy) are imported where they are used: the models and
+# the dashboard import this module for paths only.
+
+THUMBNAIL_WIDTH = 480
+PREVIEW_WIDTH = 240
+PREVIEW_FPS = 8
+PREVIEW_SECONDS = 3
+
+VIDEO_EXTENSIONS = ('.mp4', '.mov', '.webm', '.mkv')
+
+
+def is_video(path):
+    return os.path.splitext(path)[1].lower() in VIDEO_EXTENSIONS
+
+
+def thumbnail_dir():
+    directory = str(current_app.config.get('THUMBNAILS_DIR') or
+                    os.path.join(current_app.root_path, 'static', 'thumbnails'))
+    os.makedirs(directory, exist_ok=True)
+    return directory
+
+
+def preview_path_for(thumbnail_path):
+    """Animated preview stored next to a thumbnail (thumb_<id>.webp -> preview_<id>.webp)"""
+    folder, filename = os.path.split(thumbnail_path)
+    return os.path.join(folder, filename.replace('thumb_', 'preview_', 1))
+
+
+def image_thumbnail(source_path, output_path, width=THUMBNAIL_WIDTH):
+    """Downscale an image to a WebP poster"""
+    from PIL import Image
+
+    with Image.open(source_path) as image:
+        # JPEG draft mode decodes straight at a reduced scale
+        image.draft('RGB', (width, width))
+        image = image.convert('RGB')
+        image.thumbnail((width, width * 4), Image.LANCZOS)
+        image.save(output_path, 'WEBP', quality=80, method=4)
+    return output_path
+
+
+def video_thumbnail(source_path, output_path, width=THUMBNAIL_WIDTH, seek=1.0):
+    """Grab a single frame as a WebP poster.
+
+    ``-ss`` before ``-i`` seeks the demuxer to the nearest keyframe, so only
+    a handful of frames are decoded regardless of the video's length.
+    """
+    from ai_content_platform.utils.ffmpeg_utils import run_ffmpeg, PRIORITY_HIGH
+
+    for position in (seek, 0):
+        if os.path.exists(output_path):
+            os.remove(output_path)
+        cmd = ["ffmpeg", "-y", "-loglevel", "error", "-nostats",
+               "-ss", str(position), "-i", source_path,
+               "-frames:v", "1", "-vf", f"scale={width}:-2",
+               "-c:v", "libwebp", "-quality", "80", output_path]
+        try:
+            run_ffmpeg(cmd, priority=PRIORITY_HIGH)
+        except RuntimeError:
+            if position == 0:
+                raise
+        # Seeking past the end of a short clip writes nothing; retry at the start
+        if os.path.exists(output_path) and os.path.getsize(output_path) > 0:
+            return output_path
+    raise RuntimeError(f"Could not extract a frame from {source_path}")
+
+
+def video_preview(source_path, output_path, width=PREVIEW_WIDTH, fps=PREVIEW_FPS,
+                  seconds=PREVIEW_SECONDS):
+    """Encode the opening seconds of a video as a small looping animated WebP"""
+    from ai_content_platform.utils.ffmpeg_utils import run_ffmpeg, PRIORITY_HIGH
+
+    cmd = ["ffmpeg", "-y", "-loglevel", "error", "-nostats",
+           "-t", str(seconds), "-i", source_path, "-an",
+           "-vf", f"fps={fps},scale={width}:-2",
+           "-c:v", "libwebp", "-loop", "0", "-quality", "60", output_path]
+    run_ffmpeg(cmd, priority=PRIORITY_HIGH)
+    return output_path
+
+
+def create_thumbnails(content_item):
+    """Create the poster (and for videos, the animated preview) for a content item.
+
+    Sets ``content_item.thumbnail_path`` and returns it; the caller commits.
+    """
+    source_path = content_item.output_path
+    if not source_path or not os.path.exists(source_path):
+        return None
+
+    # Create output paths
+    thumbnail_path = os.path.join(thumbnail_dir(), f"thumb_{content_item.id}.webp")
+
+    if is_video(source_path):
+        video_thumbnail(source_path, thumbnail_path)
+        if current_app.config.get('THUMBNAIL_PREVIEWS', True):
+            try:
+                video_preview(source_path, preview_path_for(thumbnail_path))
+            except RuntimeError as e:
+                print(f"Error creating preview for content {content_item.id}: {e}")
+    else:
+        image_thumbnail(source_path, thumbnail_path)
+
+    content_item.thumbnail_path = thumbnail_path
+    return thumbnail_path
+
+
+def remove_thumbnails(content_item):
+    """Delete the poster and preview files of a content item"""
+    if not content_item.thumbnail_path:
+        return
+    for path in (content_item.thumbnail_path, preview_path_for(content_item.thumbnail_path)):
+        if os.path.exists(path):
+            os.remove(path)
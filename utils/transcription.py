@@ -0,0 +1,202 @@
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from flask import current_app
+
+from ai_content_platform.utils.disk_cache import get_cache, make_key, file_digest
+from ai_content_platform.utils.ffmpeg_utils import decode_audio
+from ai_content_platform.utils.model_registry import get_model
+from ai_content_platform.utils.metrics import timed, count_fallback, count_cache_lookup, current_content_type
+
+SAMPLE_RATE = 16000
+FRAME_MS = 30
+
+# Bump when chunking or decoding changes so stale transcripts are not served
+TRANSCRIPT_VERSION = 2
+WHISPER_MODEL = 'openai/whisper-small'
+
+
+def frame_energy(samples, sample_rate=SAMPLE_RATE, frame_ms=FRAME_MS):
+    """RMS level in dBFS of consecutive ``frame_ms`` frames"""
+    frame = int(sample_rate * frame_ms / 1000)
+    count = len(samples) // frame
+    frames = samples[:count * frame].reshape(count, frame)
+    rms = np.sqrt(np.mean(np.square(frames, dtype=np.float32), axis=1))
+    return 20 * np.log10(np.maximum(rms, 1e-10))
+
+
+def detect_speech(samples, sample_rate=SAMPLE_RATE, frame_ms=FRAME_MS, margin_db=10, floor_db=-50):
+    """Energy-based VAD: True for frames louder than the noise floor by ``margin_db``
+
+    The noise floor is the 10th percentile of frame energy, so the threshold
+    adapts to the recording; it never drops below ``floor_db`` and never rises
+    above ``margin_db`` under the loudest frame.
+    """
+    energy = frame_energy(samples, sample_rate, frame_ms)
+    if len(energy) == 0 or energy.max() < floor_db:
+        return np.zeros(len(energy), dtype=bool)
+    threshold = max(np.percentile(energy, 10) + margin_db, floor_db)
+    threshold = min(threshold, energy.max() - margin_db)
+    return energy > threshold
+
+
+def speech_runs(speech, min_silence_frames):
+    """(start, end) frame ranges of speech, bridging silences shorter than ``min_silence_frames``"""
+    edges = np.flatnonzero(np.diff(np.concatenate([[False], speech, [False]]).astype(np.int8)))
+    runs = []
+    for start, end in zip(edges[::2], edges[1::2]):
+        if runs and start - runs[-1][1] < min_silence_frames:
+            runs[-1] = (runs[-1][0], end)
+        else:
+            runs.append((start, end))
+    return runs
+
+
+def split_on_silence(samples, sample_rate=SAMPLE_RATE, max_chunk_seconds=28, min_silence_ms=300,
+                     pad_ms=150, frame_ms=FRAME_MS):
+    """Split audio into (start, end) sample ranges of speech, cut inside silences.
+
+    Runs of speech are packed greedily into chunks no longer than
+    ``max_chunk_seconds`` (Whisper's window is 30 s); a single run longer than
+    that is cut at fixed intervals. Leading, trailing and long silences are
+    dropped.
+    """
+    frame = int(sample_rate * frame_ms / 1000)
+    max_frames = int(max_chunk_seconds * 1000 / frame_ms)
+    runs = speech_runs(detect_speech(samples, sample_rate, frame_ms),
+                       max(1, int(min_silence_ms / frame_ms)))
+
+    chunks = []
+    for start, end in runs:
+        if chunks and end - chunks[-1][0] <= max_frames:
+            chunks[-1] = (chunks[-1][0], end)
+            continue
+        while end - start > max_frames:
+            chunks.append((start, start + max_frames))
+            start += max_frames
+        chunks.append((start, end))
+
+    pad = int(sample_rate * pad_ms / 1000)
+    return [(max(0, start * frame - pad), min(len(samples), end * frame + pad))
+            for start, end in chunks]
+
+
+def _whisper_chunk(transcriber, chunk, offset):
+    result = transcriber({'raw': chunk, 'sampling_rate': SAMPLE_RATE}, return_timestamps='word')
+    words = []
+    for item in result.get('chunks', []):
+        start, end = item['timestamp']
+        words.append({
+            'word': item['text'].strip(),
+            'start': round(offset + start, 3),
+            'end': round(offset + (end if end is not None else start), 3),
+        })
+    return result['text'].strip(), words
+
+
+def _speech_recognition_chunk(chunk, offset):
+    """Fallback: Google Web Speech on the chunk, words spread evenly over its duration"""
+    import speech_recognition as sr
+
+    pcm = (np.clip(chunk, -1, 1) * 32767).astype('<i2').tobytes()
+    text = sr.Recognizer().recognize_google(sr.AudioData(pcm, SAMPLE_RATE, 2))
+    tokens = text.split()
+    step = len(chunk) / SAMPLE_RATE / max(len(tokens), 1)
+    words = [{'word': token, 'start': round(offset + i * step, 3), 'end': round(offset + (i + 1) * step, 3)}
+             for i, token in enumerate(tokens)]
+    return text, words
+
+
+def transcribe_samples(samples, on_partial=None, workers=2, max_chunk_seconds=28):
+    """Transcribe mono 16 kHz samples chunk by chunk on a worker pool.
+
+    Returns ``{'text', 'words', 'duration', 'complete', 'engine'}`` with word
+    timestamps in seconds; ``engine`` is 'whisper', or 'speech_recognition' if
+    any chunk needed the fallback. ``on_partial(text, fraction)`` is called
+    with the transcript so far each time the next chunk in order is done.
+    Raises RuntimeError when there was speech but no chunk could be
+    transcribed.
+    """
+    try:
+        transcriber = get_model('whisper')
+    except Exception as e:
+        print(f"Error using Whisper: {e}")
+        transcriber = None
+    
+    # Pool threads do not inherit the caller's metric labels
+    content_type = current_content_type()
+
+    def run(bounds):
+        start, end = bounds
+        chunk, offset = samples[start:end], start / SAMPLE_RATE
+        if transcriber is not None:
+            try:
+                return _whisper_chunk(transcriber, chunk, offset) + ('whisper',)
+            except Exception as e:
+                print(f"Error using Whisper on chunk at {offset:.1f}s: {e}")
+        count_fallback('speech_recognition', content_type)
+        try:
+            return _speech_recognition_chunk(chunk, offset) + ('speech_recognition',)
+        except Exception as e:
+            print(f"Error with SpeechRecognition on chunk at {offset:.1f}s: {e}")
+            return None
+
+    chunks = split_on_silence(samples, max_chunk_seconds=max_chunk_seconds)
+    texts, words, engines, failed = [], [], set(), 0
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix='transcribe') as executor:
+        futures = [executor.submit(run, bounds) for bounds in chunks]
+        for i, future in enumerate(futures):
+            result = future.result()
+            if result is None:
+                failed += 1
+            else:
+                engines.add(result[2])
+                if result[0]:
+                    texts.append(result[0])
+                    words.extend(result[1])
+            if on_partial is not None:
+                on_partial(' '.join(texts), (i + 1) / len(futures))
+
+    if chunks and failed == len(chunks):
+        raise RuntimeError(f"None of the {len(chunks)} audio chunks could be transcribed")
+
+    return {
+        'text': ' '.join(texts),
+        'words': words,
+        'duration': len(samples) / SAMPLE_RATE,
+        'complete': failed == 0,
+        'engine': 'speech_recognition' if 'speech_recognition' in engines else 'whisper',
+    }
+
+
+def get_transcript_cache():
+    directory = current_app.config.get('TRANSCRIPT_CACHE_DIR') or \
+        os.path.join(current_app.config['UPLOAD_FOLDER'], 'transcript_cache')
+    max_bytes = current_app.config.get('TRANSCRIPT_CACHE_MAX_MB', 256) * 1024 * 1024
+    return get_cache(directory, max_bytes)
+
+
+def transcribe(audio_path, on_partial=None):
+    """Transcript of an audio file with word timestamps, memoized by the audio's content hash"""
+    cache = get_transcript_cache()
+    key = make_key('transcript', TRANSCRIPT_VERSION, file_digest(audio_path), model=WHISPER_MODEL)
+    cached_path = cache.get(key, '.json')
+    count_cache_lookup('transcript', cached_path is not None)
+    if cached_path is not None:
+        with open(cached_path) as f:
+            transcript = json.load(f)
+        if on_partial is not None:
+            on_partial(transcript['text'], 1.0)
+        return transcript
+
+    with timed('transcription'):
+        samples = decode_audio(audio_path, SAMPLE_RATE)
+        transcript = transcribe_samples(
+            samples, on_partial, workers=current_app.config.get('TRANSCRIBE_WORKERS', 2))
+
+    # Chunks that failed, or that only the fallback could transcribe, would
+    # otherwise stay that way for good
+    if transcript['complete'] and transcript['engine'] == 'whisper':
+        cache.put_bytes(key, json.dumps(transcript).encode('utf-8'), '.json')
+    return transcript
@@ -0,0 +1,117 @@
+import io
+import os
+import re
+import wave
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from flask import current_app
+
+from ai_content_platform.utils.disk_cache import get_cache, make_key
+from ai_content_platform.utils.model_registry import get_model
+from ai_content_platform.utils.synthesis import write_wav
+from ai_content_platform.utils.metrics import timed, count_cache_lookup
+
+# Bump when synthesis or post-processing changes so stale sentences are not served
+TTS_VERSION = 1
+TTS_MODEL = 'transformers:text-to-speech'
+
+_SENTENCE_END = re.compile(r'(?<=[.!?])\s+')
+
+
+def split_sentences(text):
+    """Split a script into sentences on ., ! and ?, normalizing whitespace"""
+    text = ' '.join(text.split())
+    return [sentence for sentence in _SENTENCE_END.split(text) if sentence]
+
+
+def sentence_key(sentence, voice, model=TTS_MODEL):
+    return make_key('tts', TTS_VERSION, sentence, voice=voice, model=model)
+
+
+def read_wav(data):
+    """Decode 16-bit PCM WAV bytes to (float32 mono samples, sample rate)"""
+    with wave.open(io.BytesIO(data)) as wav:
+        sample_rate = wav.getframerate()
+        channels = wav.getnchannels()
+        samples = np.frombuffer(wav.readframes(wav.getnframes()), dtype='<i2').astype(np.float32) / 32768
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1)
+    return samples, sample_rate
+
+
+def synthesize(synthesizer, sentence):
+    """Run the TTS model on one sentence; returns (float32 mono samples, sample rate)"""
+    speech = synthesizer(sentence)
+    if 'bytes' in speech:
+        return read_wav(speech['bytes'])
+    samples = np.asarray(speech['audio'], dtype=np.float32).reshape(-1)
+    return samples, int(speech['sampling_rate'])
+
+
+def crossfade_concat(pieces, sample_rate, crossfade_ms=30):
+    """Join clips end to end, overlapping each junction with a linear crossfade"""
+    if not pieces:
+        return np.zeros(0, dtype=np.float32)
+    fade = int(sample_rate * crossfade_ms / 1000)
+    overlaps = [min(fade, len(a), len(b)) for a, b in zip(pieces, pieces[1:])]
+    output = np.zeros(sum(len(p) for p in pieces) - sum(overlaps), dtype=np.float32)
+
+    position = 0
+    for i, piece in enumerate(pieces):
+        piece = piece.copy()
+        if i > 0 and overlaps[i - 1]:
+            piece[:overlaps[i - 1]] *= np.linspace(0, 1, overlaps[i - 1], dtype=np.float32)
+        if i < len(overlaps) and overlaps[i]:
+            piece[len(piece) - overlaps[i]:] *= np.linspace(1, 0, overlaps[i], dtype=np.float32)
+        output[position:position + len(piece)] += piece
+        position += len(piece) - (overlaps[i] if i < len(overlaps) else 0)
+    return output
+
+
+def get_tts_cache():
+    directory = current_app.config.get('TTS_CACHE_DIR') or \
+        os.path.join(current_app.config['UPLOAD_FOLDER'], 'tts_cache')
+    max_bytes = current_app.config.get('TTS_CACHE_MAX_MB', 512) * 1024 * 1024
+    return get_cache(directory, max_bytes)
+
+
+def synthesize_script(text, output_path, voice=None):
+    """Speak ``text`` into ``output_path`` (WAV), one cached sentence at a time.
+
+    Each sentence is looked up by (sentence, voice, model); only misses reach
+    the model, in parallel on TTS_WORKERS threads. The clips are joined with
+    short crossfades. Raises if the model is unavailable.
+    """
+    voice = voice or current_app.config.get('TTS_VOICE', 'default')
+    sentences = split_sentences(text)
+    cache = get_tts_cache()
+
+    clips = {}
+    missing = []
+    for sentence in dict.fromkeys(sentences):
+        path = cache.get(sentence_key(sentence, voice), '.wav')
+        count_cache_lookup('tts', path is not None)
+        if path is not None:
+            with open(path, 'rb') as f:
+                clips[sentence] = read_wav(f.read())
+        else:
+            missing.append(sentence)
+
+    if missing:
+        synthesizer = get_model('tts')
+        workers = min(len(missing), current_app.config.get('TTS_WORKERS', 2))
+        with timed('tts_synthesis'), ThreadPoolExecutor(max_workers=workers, thread_name_prefix='tts') as executor:
+            for sentence, clip in zip(missing, executor.map(lambda s: synthesize(synthesizer, s), missing)):
+                clips[sentence] = clip
+                buffer = io.BytesIO()
+                write_wav(buffer, *clip)
+                cache.put_bytes(sentence_key(sentence, voice), buffer.getvalue(), '.wav')
+
+    sample_rates = {sample_rate for _, sample_rate in clips.values()}
+    if len(sample_rates) > 1:
+        raise ValueError(f"TTS clips have mixed sample rates: {sorted(sample_rates)}")
+    sample_rate = sample_rates.pop() if sample_rates else 22050
+
+    speech = crossfade_concat([clips[sentence][0] for sentence in sentences], sample_rate,
+                              current_app.config.get('TTS_CROSSFADE_MS', 30))
+    return write_wav(output_path, speech, sample_rate)
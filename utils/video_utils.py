@@ -1,127 +1,482 @@
 import os
+import shutil
 import tempfile
+import time
 import random
+import multiprocessing
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import numpy as np
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image
 import cv2
-import ffmpeg
 from flask import current_app
 
-from ai_content_platform.utils.image_utils import generate_background, create_gradient_background
+from ai_content_platform.utils.image_utils import get_background_image
+from ai_content_platform.utils.background_cache import background_prompt, DIFFUSION_SETTINGS
+from ai_content_platform.utils.ffmpeg_utils import (FFmpegPipeWriter, concat_segments, DEFAULT_ENCODER_SETTINGS,
+                                                   build_encode_command, run_ffmpeg, get_executor, configure_ffmpeg,
+                                                   current_cancel_event, FFmpegCancelled)
+from ai_content_platform.utils.text_layers import FrameCompositor, sprite_cache
+from ai_content_platform.utils.avatar_renderer import AvatarRenderer
+from ai_content_platform.utils.lipsync import analyze_speech
+from ai_content_platform.utils.streaming import package_stream
+from ai_content_platform.utils.render_cache import render_key, seed_from_key, fetch_render, store_render
+from ai_content_platform.utils.disk_cache import file_digest
+from ai_content_platform.utils.metrics import timed, observe_stage
 
-def generate_video_reel(text, content_id, duration=15, fps=30, audio_path=None):
-    """Generate a video reel with text overlay and optional audio"""
+# Ways of getting rendered frames into ffmpeg:
+#   pipe   - raw frames streamed into a single ffmpeg process over stdin
+#   frames - every frame saved as a JPEG in a temp directory, then encoded (legacy)
+ENCODER_MODES = ('pipe', 'frames')
+
+# libx264 tuning per content type, on top of DEFAULT_ENCODER_SETTINGS; the
+# VIDEO_ENCODER_SETTINGS config ('default' or a content type) overrides both
+ENCODER_PROFILES = {
+    'video_reel': {'tune': 'stillimage'},  # text fading over a still background
+    'voice_video': {'tune': 'stillimage'},
+    'avatar_video': {'tune': 'animation'},  # flat shapes, few moving regions
+}
+
+
+class JpegSequenceWriter:
+    """Legacy frame sink: saves JPEG frames to disk and encodes the directory on close"""
+
+    def __init__(self, frames_dir, output_path, fps, audio_path=None, pix_fmt="rgb24", settings=None):
+        self.frames_dir = frames_dir
+        self.output_path = output_path
+        self.fps = fps
+        self.audio_path = audio_path
+        self.pix_fmt = pix_fmt
+        self.settings = settings
+        self.frame_count = 0
+
+    def open(self):
+        os.makedirs(self.frames_dir, exist_ok=True)
+        return self
+
+    def write(self, frame):
+        frame_path = os.path.join(self.frames_dir, f"frame_{self.frame_count:04d}.jpg")
+        if isinstance(frame, np.ndarray) and self.pix_fmt == "bgr24":
+            cv2.imwrite(frame_path, frame)
+        elif isinstance(frame, np.ndarray):
+            Image.fromarray(frame).save(frame_path)
+        else:
+            frame.save(frame_path)
+        self.frame_count += 1
+
+    def close(self):
+        # Combine frames into video
+        frame_pattern = os.path.join(self.frames_dir, "frame_%04d.jpg")
+        input_args = ["-framerate", str(self.fps), "-i", frame_pattern]
+        try:
+            run_ffmpeg(build_encode_command(self.output_path, self.fps, input_args, self.audio_path,
+                                            settings=self.settings))
+        finally:
+            self._cleanup()
+
+    def abort(self):
+        self._cleanup()
+
+    def _cleanup(self):
+        # Clean up temporary files
+        if os.path.isdir(self.frames_dir):
+            for f in os.listdir(self.frames_dir):
+                os.remove(os.path.join(self.frames_dir, f))
+            os.rmdir(self.frames_dir)
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
+
+
+def resolve_encoder(encoder):
+    """Validate an encoder mode, defaulting to the VIDEO_ENCODER setting"""
+    if encoder is None:
+        encoder = current_app.config.get('VIDEO_ENCODER', 'pipe')
+    if encoder not in ENCODER_MODES:
+        raise ValueError(f"Unknown encoder mode: {encoder}")
+    return encoder
+
+def encoder_settings(content_type=None):
+    """libx264 settings for a content type: defaults, then its profile, then the config"""
+    overrides = current_app.config.get('VIDEO_ENCODER_SETTINGS') or {}
+    settings = dict(DEFAULT_ENCODER_SETTINGS)
+    settings.update(ENCODER_PROFILES.get(content_type, {}))
+    settings.update(overrides.get('default', {}))
+    settings.update(overrides.get(content_type, {}))
+    return settings
+
+def resolve_holds(holds):
+    """Whether runs of identical frames are encoded as holds (default VIDEO_HOLDS)"""
+    if holds is None:
+        holds = current_app.config.get('VIDEO_HOLDS', True)
+    return bool(holds)
+
+def hold_frames(source, start, stop):
+    """Frames in [start, stop) that differ from the one before them, plus the last frame
+    
+    Sources that can tell (``frame_key``) get their identical runs collapsed;
+    the final frame is always kept so the encoded timeline ends on time.
+    """
+    frame_key = getattr(source, 'frame_key', None)
+    if frame_key is None or stop - start < 2:
+        return list(range(start, stop))
+    
+    frames = [start]
+    previous = frame_key(start)
+    for n in range(start + 1, stop):
+        key = frame_key(n)
+        if key != previous:
+            frames.append(n)
+            previous = key
+    if frames[-1] != stop - 1:
+        frames.append(stop - 1)
+    return frames
+
+def _progress_part(progress, start, end):
+    """Map a 0-1 ``progress`` callback of one step onto [start, end] of the render (None stays None)"""
+    if progress is None:
+        return None
+    return lambda fraction: progress(start + (end - start) * fraction)
+
+def _render_share():
+    """Fraction of a video's progress for the render; HLS packaging encodes it again after"""
+    return 0.8 if current_app.config.get('VIDEO_HLS', False) else 1.0
+
+def open_frame_writer(encoder, output_path, width, height, fps, audio_path=None, frames_dir=None, pix_fmt="rgb24",
+                      settings=None, frame_starts=None):
+    """Create the frame sink for the requested encoder mode"""
+    encoder = resolve_encoder(encoder)
+    if encoder == 'frames':
+        return JpegSequenceWriter(frames_dir, output_path, fps, audio_path=audio_path, pix_fmt=pix_fmt,
+                                  settings=settings)
+    return FFmpegPipeWriter(output_path, width, height, fps, audio_path=audio_path, pix_fmt=pix_fmt,
+                            settings=settings, frame_starts=frame_starts)
+
+
+class ReelFrames:
+    """Frame source for text reels.
+    
+    Frame ``n`` depends only on ``n``, so any slice of the timeline can be
+    rendered on its own (see render_segments) and still match a serial render.
+    """
+    
+    def __init__(self, background, words, placements, font_size=60):
+        self.background = background
+        self.words = words
+        self.placements = placements  # (start_frame, word_frames, x, y) per word shown
+        self.font_size = font_size
+        self._starts = [placement[0] for placement in placements]
+        self._compositor = None
+    
+    @staticmethod
+    def plan(words, total_frames, width, height, rng=random):
+        """Lay out when and where each word appears"""
+        # Calculate frames per word
+        frames_per_word = min(30, total_frames // max(1, len(words)))
+        
+        placements = []
+        frame_count = 0
+        for word in words:
+            # Position for this word (centered with some randomness)
+            x_pos = width // 2 + rng.randint(-200, 200)
+            y_pos = height // 2 + rng.randint(-100, 100)
+            
+            # How many frames to show this word
+            word_frames = min(frames_per_word, total_frames - frame_count)
+            if word_frames <= 0:
+                break
+            
+            placements.append((frame_count, word_frames, x_pos, y_pos))
+            frame_count += word_frames
+        return placements
+    
+    def __getstate__(self):
+        # The compositor holds a frame buffer; workers build their own
+        state = self.__dict__.copy()
+        state['_compositor'] = None
+        return state
+    
+    def frame_key(self, n):
+        """What frame ``n`` shows: the word index and its opacity (equal keys, equal frames)"""
+        if not self.placements:
+            return None
+        
+        i = max(0, bisect_right(self._starts, n) - 1)
+        start, word_frames = self.placements[i][:2]
+        
+        # Frames past the last word hold its final frame
+        f = min(n - start, word_frames - 1)
+        
+        # Calculate animation effects (fade in/out)
+        opacity = 255
+        if f < 5:  # Fade in
+            opacity = int(255 * (f / 5))
+        elif f > word_frames - 5:  # Fade out
+            opacity = int(255 * ((word_frames - f) / 5))
+        return i, opacity
+    
+    def frame(self, n):
+        if self._compositor is None:
+            self._compositor = FrameCompositor(self.background)
+        if not self.placements:
+            return self._compositor.compose([])
+        
+        i, opacity = self.frame_key(n)
+        x_pos, y_pos = self.placements[i][2:]
+        
+        # Word with current opacity, then previous words with full opacity
+        height, width = self.background.shape[:2]
+        layers = [(sprite_cache.get(self.words[i], size=self.font_size), x_pos, y_pos, opacity / 255)]
+        if i > 0:
+            caption_sprite = sprite_cache.get(" ".join(self.words[:i]), size=self.font_size)
+            layers.append((caption_sprite, width//2 - 200, height - 200, 1.0))
+        return self._compositor.compose(layers)
+
+
+class AvatarFrames:
+    """Frame source for avatar videos; like ReelFrames, frame ``i`` depends only on ``i``"""
+    
+    def __init__(self, width, height, avatar_type, text, total_frames, mouth_levels=None):
+        self.width = width
+        self.height = height
+        self.avatar_type = avatar_type
+        self.text = text
+        self.total_frames = total_frames
+        self.mouth_levels = mouth_levels  # per-frame openness from the speech envelope
+        self._renderer = None
+    
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_renderer'] = None
+        return state
+    
+    def frame_key(self, i):
+        """Avatar state at frame ``i``: (mouth openness, blink, characters of caption shown)"""
+        # Calculate animation time (0 to 1)
+        t = i / self.total_frames
+        
+        # Blink every 100 frames for 5 frames
+        blink = i % 100 > 95
+        
+        # Animate the mouth from the speech envelope, or a simple oscillation without audio
+        if self.mouth_levels is not None:
+            mouth_open = int(self.mouth_levels[i]) if i < len(self.mouth_levels) else 0
+        else:
+            mouth_open = 10 + int(10 * np.sin(i * 0.2))
+        
+        # Get portion of text to display based on current time
+        text_position = min(len(self.text), int(len(self.text) * t * 1.2))
+        return mouth_open, blink, text_position
+    
+    def frame(self, i):
+        if self._renderer is None:
+            self._renderer = AvatarRenderer(self.width, self.height, self.avatar_type)
+        
+        mouth_open, blink, text_position = self.frame_key(i)
+        
+        # Only the regions that changed since the last frame are redrawn
+        return self._renderer.render(mouth_open, blink, self.text[:text_position])
+
+
+# Worker pool for segmented renders, created on first use. Spawned rather than
+# forked because renders are started from job threads.
+_render_pool = None
+_render_pool_size = 0
+
+_render_pool_settings = None
+
+def _get_render_pool(workers):
+    global _render_pool, _render_pool_size, _render_pool_settings
+    # Workers share this process's ffmpeg limit (the slots are host-wide lock files)
+    settings = get_executor().settings()
+    if _render_pool is None or _render_pool_size < workers or _render_pool_settings != settings:
+        if _render_pool is not None:
+            _render_pool.shutdown(wait=False)
+        _render_pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                                           initializer=configure_ffmpeg, initargs=(settings,))
+        _render_pool_size = workers
+        _render_pool_settings = settings
+    return _render_pool
+
+def resolve_segments(segments, total_frames, fps):
+    """Number of chunks to split a render into; at least one second per chunk"""
+    if segments is None:
+        segments = current_app.config.get('RENDER_SEGMENTS', 1)
+    if segments == 0:
+        segments = os.cpu_count() or 1
+    return max(1, min(segments, total_frames // max(1, fps)))
+
+def segment_bounds(total_frames, segments):
+    """Split [0, total_frames) into ``segments`` contiguous (start, stop) ranges"""
+    edges = [total_frames * k // segments for k in range(segments + 1)]
+    return [(edges[k], edges[k + 1]) for k in range(segments) if edges[k] < edges[k + 1]]
+
+def _render_segment(source, start, stop, output_path, width, height, fps, pix_fmt, settings=None, holds=False):
+    """Process-pool worker: render frames [start, stop) and encode them"""
+    frames = hold_frames(source, start, stop) if holds else range(start, stop)
+    frame_starts = [n - start for n in frames] if holds else None
+    with FFmpegPipeWriter(output_path, width, height, fps, pix_fmt=pix_fmt,
+                          settings=settings, frame_starts=frame_starts) as writer:
+        for n in frames:
+            writer.write(source.frame(n))
+    return output_path
+
+def render_segments(source, total_frames, output_path, width, height, fps, segments,
+                    audio_path=None, pix_fmt="rgb24", progress=None, settings=None, holds=False):
+    """Render and encode chunks of the timeline in parallel, then concat them losslessly
+
+    The render pool's processes cannot see this thread's cancel event (see
+    cancel_on), so cancellation is checked as each segment finishes.
+    """
+    bounds = segment_bounds(total_frames, segments)
+    segment_dir = tempfile.mkdtemp(prefix="segments_", dir=os.path.dirname(output_path))
+    segment_paths = [os.path.join(segment_dir, f"segment_{k:03d}.mp4") for k in range(len(bounds))]
+    
+    try:
+        pool = _get_render_pool(len(bounds))
+        futures = [
+            pool.submit(_render_segment, source, start, stop, path, width, height, fps, pix_fmt, settings, holds)
+            for (start, stop), path in zip(bounds, segment_paths)
+        ]
+        cancel_event = current_cancel_event()
+        try:
+            with timed('segment_render'):
+                for done, future in enumerate(as_completed(futures), 1):
+                    future.result()
+                    if cancel_event is not None and cancel_event.is_set():
+                        raise FFmpegCancelled("The render was cancelled")
+                    if progress:
+                        progress(done / len(futures))
+        except Exception:
+            for future in futures:
+                future.cancel()
+            raise
+        
+        with timed('concat'):
+            concat_segments(segment_paths, output_path, audio_path=audio_path,
+                            durations=[(stop - start) / fps for start, stop in bounds])
+    finally:
+        shutil.rmtree(segment_dir, ignore_errors=True)
+    
+    return output_path
+
+def encode_frames(source, total_frames, output_path, width, height, fps, audio_path=None,
+                  encoder=None, frames_dir=None, pix_fmt="rgb24", segments=None, progress=None,
+                  settings=None, holds=None):
+    """Render every frame of ``source`` and encode it, serially or in segments
+    
+    ``settings`` are libx264 options (see encoder_settings). With ``holds``
+    (default VIDEO_HOLDS) runs of identical frames are rendered and encoded
+    once and held on a variable-frame-rate timeline; the legacy 'frames'
+    encoder always writes every frame.
+    """
+    encoder = resolve_encoder(encoder)
+    holds = resolve_holds(holds) and encoder != 'frames'
+    segments = resolve_segments(segments, total_frames, fps)
+    if segments > 1 and encoder != 'frames':
+        return render_segments(source, total_frames, output_path, width, height, fps, segments,
+                               audio_path=audio_path, pix_fmt=pix_fmt, progress=progress,
+                               settings=settings, holds=holds)
+    
+    frames = hold_frames(source, 0, total_frames) if holds else range(total_frames)
+    writer = open_frame_writer(encoder, output_path, width, height, fps,
+                               audio_path=audio_path, frames_dir=frames_dir, pix_fmt=pix_fmt,
+                               settings=settings, frame_starts=frames if holds else None)
+    # Frame drawing and encoding interleave, so time them separately
+    render_seconds = 0.0
+    start = time.perf_counter()
+    reported = 0
+    with writer:
+        for n in frames:
+            frame_start = time.perf_counter()
+            frame = source.frame(n)
+            render_seconds += time.perf_counter() - frame_start
+            writer.write(frame)
+            if progress and n + 1 - reported >= fps:
+                reported = n + 1
+                progress((n + 1) / total_frames)
+    observe_stage('frame_render', render_seconds)
+    observe_stage('encode', time.perf_counter() - start - render_seconds)
+    
+    return output_path
+
+def generate_video_reel(text, content_id, duration=15, fps=30, audio_path=None, encoder=None,
+                        segments=None, progress=None, seed=None, content_type='video_reel'):
+    """Generate a video reel with text overlay and optional audio
+    
+    ``encoder`` picks the frame sink ('pipe' or 'frames', see ENCODER_MODES) and
+    defaults to the VIDEO_ENCODER setting. ``segments`` splits the render into
+    that many chunks rendered in parallel processes (0 = one per core, default
+    RENDER_SEGMENTS). ``progress`` is called with the fraction of work done.
+    ``content_type`` picks the encoder settings (voice videos are reels too).
+    Identical requests are served from the render cache (see generate_photo_quote).
+    With VIDEO_HLS the result is also packaged for streaming (see package_stream).
+    """
     # Create output paths
     upload_folder = current_app.config['UPLOAD_FOLDER']
     os.makedirs(upload_folder, exist_ok=True)
     
-    background_path = os.path.join(upload_folder, f"background_{content_id}.jpg")
     frames_dir = os.path.join(upload_folder, f"frames_{content_id}")
-    os.makedirs(frames_dir, exist_ok=True)
     
     output_path = os.path.join(upload_folder, f"video_{content_id}.mp4")
     
-    # Generate background image
-    prompt = f"Cinematic scene for video about: {text[:50]}"
-    generate_background(prompt, background_path)
+    # Reuse an identical earlier render if there is one
+    settings = encoder_settings(content_type)
+    holds = resolve_holds(None)
+    key = render_key('video_reel', text, audio_path=audio_path, width=1920, height=1080,
+                     fps=fps, duration=duration, seed=seed, style={'style': 'dynamic'},
+                     encoding=dict(settings, holds=holds), background=DIFFUSION_SETTINGS)
+    if fetch_render(key, output_path):
+        package_stream(output_path, content_type, audio=bool(audio_path), duration=duration, progress=progress)
+        return output_path
     
     # Create frames with text animation
     total_frames = duration * fps
     
-    try:
-        # Try to use a nice font if available
-        font = ImageFont.truetype("arial.ttf", 60)
-    except IOError:
-        # Fallback to default font
-        font = ImageFont.load_default()
-    
-    # Open background image
-    try:
-        background = Image.open(background_path)
-    except Exception as e:
-        print(f"Error opening background image: {e}")
-        create_gradient_background(background_path)
-        background = Image.open(background_path)
-    
-    # Resize to standard video dimensions (1080p)
+    # Background at video size, from the cache when possible
     width, height = 1920, 1080
-    background = background.resize((width, height), Image.LANCZOS)
+    prompt = background_prompt('video_reel', text)
+    with timed('background'):
+        background, diffused = get_background_image(prompt, (width, height), seed=seed)
+    
+    # Word placement is random but reproducible for a given request
+    if seed is None:
+        seed = seed_from_key(key)
     
     # Split text into words for animation
     words = text.split()
-    
-    # Calculate frames per word
-    frames_per_word = min(30, total_frames // max(1, len(words)))
+    placements = ReelFrames.plan(words, total_frames, width, height, rng=random.Random(seed))
+    source = ReelFrames(np.asarray(background), words, placements)
     
     # Generate frames
-    frame_count = 0
-    for i, word in enumerate(words):
-        # Position for this word (centered with some randomness)
-        x_pos = width // 2 + random.randint(-200, 200)
-        y_pos = height // 2 + random.randint(-100, 100)
-        
-        # How many frames to show this word
-        word_frames = min(frames_per_word, total_frames - frame_count)
-        
-        for f in range(word_frames):
-            # Create a new frame from the background
-            frame = background.copy()
-            draw = ImageDraw.Draw(frame)
-            
-            # Calculate animation effects (fade in/out)
-            opacity = 255
-            if f < 5:  # Fade in
-                opacity = int(255 * (f / 5))
-            elif f > word_frames - 5:  # Fade out
-                opacity = int(255 * ((word_frames - f) / 5))
-            
-            # Draw word with current opacity
-            draw.text((x_pos, y_pos), word, fill=(255, 255, 255, opacity), font=font)
-            
-            # Add previous words with full opacity
-            if i > 0:
-                prev_text = " ".join(words[:i])
-                draw.text((width//2 - 200, height - 200), prev_text, fill=(255, 255, 255, 255), font=font)
-            
-            # Save the frame
-            frame_path = os.path.join(frames_dir, f"frame_{frame_count:04d}.jpg")
-            frame.save(frame_path)
-            frame_count += 1
-            
-            # Break if we've generated all needed frames
-            if frame_count >= total_frames:
-                break
-        
-        if frame_count >= total_frames:
-            break
-    
-    # If we didn't generate enough frames, duplicate the last frame
-    last_frame_path = os.path.join(frames_dir, f"frame_{frame_count-1:04d}.jpg")
-    while frame_count < total_frames:
-        frame_path = os.path.join(frames_dir, f"frame_{frame_count:04d}.jpg")
-        os.system(f"cp {last_frame_path} {frame_path}")
-        frame_count += 1
-    
-    # Combine frames into video
-    frame_pattern = os.path.join(frames_dir, "frame_%04d.jpg")
+    share = _render_share()
+    encode_frames(source, total_frames, output_path, width, height, fps, audio_path=audio_path,
+                  encoder=encoder, frames_dir=frames_dir, segments=segments,
+                  progress=_progress_part(progress, 0.0, share), settings=settings, holds=holds)
+    if diffused:
+        store_render(key, output_path)
     
-    # Use ffmpeg to create video
-    if audio_path:
-        # With audio
-        os.system(f"ffmpeg -y -framerate {fps} -i {frame_pattern} -i {audio_path} -c:v libx264 -pix_fmt yuv420p -c:a aac -shortest {output_path}")
-    else:
-        # Without audio
-        os.system(f"ffmpeg -y -framerate {fps} -i {frame_pattern} -c:v libx264 -pix_fmt yuv420p {output_path}")
-    
-    # Clean up temporary files
-    for f in os.listdir(frames_dir):
-        os.remove(os.path.join(frames_dir, f))
-    os.rmdir(frames_dir)
+    # Optional HLS package for adaptive streaming
+    package_stream(output_path, content_type, audio=bool(audio_path), duration=duration,
+                   progress=_progress_part(progress, share, 1.0))
     
     return output_path
 
-def generate_avatar_video(text, content_id, audio_path=None, avatar_type="default"):
-    """Generate a video with an animated avatar speaking the given text or audio"""
+def generate_avatar_video(text, content_id, audio_path=None, avatar_type="default", encoder=None,
+                          segments=None, progress=None, soundtrack_path=None):
+    """Generate a video with an animated avatar speaking the given text or audio
+    
+    ``encoder``, ``segments`` and ``progress`` work as in generate_video_reel.
+    ``soundtrack_path`` replaces the voice as the muxed audio (voice plus music);
+    lip sync always follows ``audio_path``.
+    """
     # Create output paths
     upload_folder = current_app.config['UPLOAD_FOLDER']
     os.makedirs(upload_folder, exist_ok=True)
@@ -130,100 +485,48 @@ def generate_avatar_video(text, content_id, audio_path=None, avatar_type="defaul
     
     # For demonstration purposes, we'll create a simple animation
     # In a real implementation, we would use SadTalker, EchoMimic, or similar
-    
-    # Create a simple background
     width, height = 1280, 720
-    background_color = (50, 50, 100)  # Dark blue background
     
-    # Create frame directory
+    # Frame directory (only used by the legacy 'frames' encoder)
     frames_dir = os.path.join(upload_folder, f"avatar_frames_{content_id}")
-    os.makedirs(frames_dir, exist_ok=True)
     
     # Determine video duration based on audio or text length
+    fps = 30
+    levels = None
     if audio_path:
-        # Get audio duration using ffmpeg
-        probe = ffmpeg.probe(audio_path)
-        audio_info = next(s for s in probe['streams'] if s['codec_type'] == 'audio')
-        duration = float(audio_info['duration'])
+        # One decode gives both the duration and the lip-sync envelope
+        duration, levels = analyze_speech(audio_path, fps)
     else:
         # Estimate duration based on text length (approx. 3 words per second)
         word_count = len(text.split())
         duration = max(3, word_count / 3)  # At least 3 seconds
     
     # Determine frame count
-    fps = 30
     total_frames = int(duration * fps)
     
-    # Generate frames
-    for i in range(total_frames):
-        # Create blank frame
-        frame = np.ones((height, width, 3), dtype=np.uint8) * np.array(background_color, dtype=np.uint8)
-        
-        # Calculate animation time (0 to 1)
-        t = i / total_frames
-        
-        # Draw a simple avatar (circle with features)
-        # In a real implementation, this would be a proper 3D model with lip syncing
-        cv2.circle(frame, (width//2, height//3), 100, (200, 200, 200), -1)  # Head
-        
-        # Eyes
-        eye_y = height//3 - 20
-        left_eye_x = width//2 - 30
-        right_eye_x = width//2 + 30
-        
-        # Animate the eyes (blink occasionally)
-        if i % 100 > 95:  # Blink every 100 frames for 5 frames
-            cv2.line(frame, (left_eye_x-10, eye_y), (left_eye_x+10, eye_y), (0, 0, 0), 2)
-            cv2.line(frame, (right_eye_x-10, eye_y), (right_eye_x+10, eye_y), (0, 0, 0), 2)
-        else:
-            cv2.circle(frame, (left_eye_x, eye_y), 5, (0, 0, 0), -1)
-            cv2.circle(frame, (right_eye_x, eye_y), 5, (0, 0, 0), -1)
-        
-        # Mouth animation
-        mouth_y = height//3 + 30
-        mouth_x = width//2
-        
-        # Animate the mouth (open and close)
-        # This would be synchronized with audio in a real implementation
-        mouth_open = 10 + int(10 * np.sin(i * 0.2))  # Simple oscillation for mouth movement
-        cv2.ellipse(frame, (mouth_x, mouth_y), (30, mouth_open), 0, 0, 180, (0, 0, 0), -1)
-        
-        # Add text caption at the bottom
-        font = cv2.FONT_HERSHEY_SIMPLEX
-        
-        # Get portion of text to display based on current time
-        text_position = min(len(text), int(len(text) * t * 1.2))
-        current_text = text[:text_position]
-        
-        # Split into lines if too long
-        max_line_length = 50
-        lines = []
-        for j in range(0, len(current_text), max_line_length):
-            lines.append(current_text[j:j+max_line_length])
-        
-        # Draw each line
-        for idx, line in enumerate(lines):
-            y_position = height - 100 + (idx * 30)
-            cv2.putText(frame, line, (50, y_position), font, 0.7, (255, 255, 255), 2)
-        
-        # Save the frame
-        frame_path = os.path.join(frames_dir, f"frame_{i:04d}.jpg")
-        cv2.imwrite(frame_path, frame)
-    
-    # Combine frames into video
-    frame_pattern = os.path.join(frames_dir, "frame_%04d.jpg")
+    # Reuse an identical earlier render if there is one
+    settings = encoder_settings('avatar_video')
+    holds = resolve_holds(None)
+    key = render_key('avatar_video', text, audio_path=audio_path, width=width, height=height,
+                     fps=fps, duration=duration, style={'avatar_type': avatar_type, 'lipsync': 'envelope'},
+                     soundtrack=file_digest(soundtrack_path) if soundtrack_path else None,
+                     encoding=dict(settings, holds=holds))
+    if fetch_render(key, output_path):
+        package_stream(output_path, 'avatar_video', audio=bool(soundtrack_path or audio_path),
+                       duration=duration, progress=progress)
+        return output_path
     
-    # Use ffmpeg to create video
-    if audio_path:
-        # With audio
-        os.system(f"ffmpeg -y -framerate {fps} -i {frame_pattern} -i {audio_path} -c:v libx264 -pix_fmt yuv420p -c:a aac -shortest {output_path}")
-    else:
-        # Without audio
-        os.system(f"ffmpeg -y -framerate {fps} -i {frame_pattern} -c:v libx264 -pix_fmt yuv420p {output_path}")
+    # Generate frames
+    source = AvatarFrames(width, height, avatar_type, text, total_frames, mouth_levels=levels)
+    share = _render_share()
+    encode_frames(source, total_frames, output_path, width, height, fps,
+                  audio_path=soundtrack_path or audio_path,
+                  encoder=encoder, frames_dir=frames_dir, pix_fmt="bgr24", segments=segments,
+                  progress=_progress_part(progress, 0.0, share), settings=settings, holds=holds)
+    store_render(key, output_path)
     
-    # Clean up temporary files
-    for f in os.listdir(frames_dir):
-        os.remove(os.path.join(frames_dir, f))
-    os.rmdir(frames_dir)
+    # Optional HLS package for adaptive streaming
+    package_stream(output_path, 'avatar_video', audio=bool(soundtrack_path or audio_path),
+                   duration=duration, progress=_progress_part(progress, share, 1.0))
     
     return output_path